@@ -10,17 +10,147 @@ import csv
 import io
 import uuid
 import time
-from flask import Flask, request, render_template_string, jsonify, send_from_directory
+import json
+import shutil
+import sqlite3
+import zipfile
+import tempfile
+import math
+import atexit
+import hashlib
+import hmac
+import random
+import cProfile
+import pstats
+import fcntl
+import bisect
+import heapq
+import queue
+import contextvars
+import threading
+import multiprocessing
+import multiprocessing.util
+from collections import Counter, OrderedDict, deque
+from contextlib import contextmanager
+from functools import cached_property, lru_cache, wraps
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+from flask import (Flask, Response, request, g, render_template, stream_template, stream_with_context, jsonify,
+                   send_from_directory)
+from jinja2 import DictLoader
 from werkzeug.utils import secure_filename
+from werkzeug.http import parse_options_header
+from werkzeug.sansio.multipart import MultipartDecoder, Field, File, Data, Epilogue, NeedData
 from PIL import Image, ImageFilter, ImageEnhance, ImageOps
 import pytesseract
 from difflib import SequenceMatcher
 
+# Threads per tesseract pass. OpenMP reads this when tesseract starts (in each
+# subprocess, or when tesserocr loads), so it is fixed before the import below.
+os.environ['OMP_THREAD_LIMIT'] = os.environ.get('OCR_THREAD_LIMIT') or os.environ.get('OMP_THREAD_LIMIT') or '1'
+
+try:
+    import tesserocr
+except ImportError:
+    tesserocr = None
+
 app = Flask(__name__, static_folder='static')
 app.config['MAX_CONTENT_LENGTH'] = 100 * 1024 * 1024
 app.config['UPLOAD_FOLDER'] = '/tmp/uploads'
+# Concurrent tesseract passes per request. Defaults to a share of the CPUs so the
+# two gunicorn workers from the Dockerfile don't oversubscribe the box.
+app.config['OCR_PARALLELISM'] = int(os.environ.get('OCR_PARALLELISM', max(1, (os.cpu_count() or 1) // 2)))
+# 'full' runs every OCR strategy; 'cascade' stops once all required fields pass;
+# 'layout' finds text blocks in one pass and OCRs each block on its own
+app.config['OCR_MODE'] = os.environ.get('OCR_MODE', 'full')
+OCR_MODES = ('full', 'cascade', 'layout')
+# Long edge of the downscaled copy the layout pass detects text blocks on
+app.config['LAYOUT_DETECT_EDGE'] = int(os.environ.get('LAYOUT_DETECT_EDGE', 1000))
+# Quality tier (see QUALITY_TIERS): 'full', 'fast', 'draft', or 'auto' to pick one
+# per request from the load; overridable per request with `quality`
+app.config['QUALITY'] = os.environ.get('QUALITY', 'auto').lower()
+app.config['QUALITY_DRAFT_MAX_EDGE'] = int(os.environ.get('QUALITY_DRAFT_MAX_EDGE', 1200))
+# 'auto' drops to 'fast' / 'draft' once this share of ADMISSION_MAX_INFLIGHT is in use...
+app.config['QUALITY_FAST_LOAD'] = float(os.environ.get('QUALITY_FAST_LOAD', 0.5))
+app.config['QUALITY_DRAFT_LOAD'] = float(os.environ.get('QUALITY_DRAFT_LOAD', 0.8))
+# ...or once tesseract passes recently waited this long (seconds) for an OCR slot
+app.config['QUALITY_FAST_WAIT'] = float(os.environ.get('QUALITY_FAST_WAIT', 2))
+app.config['QUALITY_DRAFT_WAIT'] = float(os.environ.get('QUALITY_DRAFT_WAIT', 8))
+# Images are decoded, downscaled so the long edge is at most IMAGE_MAX_EDGE pixels and
+# converted to grayscale once before OCR. IMAGE_DPI tells tesseract the resolution
+# of the processed image; 0 uses the file's own DPI (scaled with the image), if any
+app.config['IMAGE_MAX_EDGE'] = int(os.environ.get('IMAGE_MAX_EDGE', 2000))
+app.config['IMAGE_DPI'] = int(os.environ.get('IMAGE_DPI', 0))
+# Parallel batch verification: rows fan out to a process pool, each with its own timeout
+app.config['BATCH_WORKERS'] = int(os.environ.get('BATCH_WORKERS', max(1, (os.cpu_count() or 1) // 2)))
+app.config['BATCH_ITEM_TIMEOUT'] = float(os.environ.get('BATCH_ITEM_TIMEOUT', 90))
+# Verify batch images while the upload is still arriving (also per request with ?stream_upload=1)
+app.config['BATCH_STREAM_UPLOADS'] = os.environ.get('BATCH_STREAM_UPLOADS', '0').lower() in ('1', 'true', 'yes')
+# How /verify/batch responds: 'html' renders the page once every label is done,
+# 'stream' flushes each result card as it finishes, 'ndjson' sends one JSON
+# record per label. Per request with ?output=; NDJSON also via the Accept header
+app.config['BATCH_OUTPUT'] = os.environ.get('BATCH_OUTPUT', 'html')
+BATCH_OUTPUTS = ('html', 'stream', 'ndjson')
+# Async batch jobs: queued in SQLite and run by a background thread in each worker
+app.config['DATABASE'] = os.environ.get('DATABASE_PATH', os.path.join(app.config['UPLOAD_FOLDER'], 'verifier.db'))
+app.config['JOBS_FOLDER'] = os.path.join(app.config['UPLOAD_FOLDER'], 'jobs')
+app.config['JOB_STALE_SECONDS'] = float(os.environ.get('JOB_STALE_SECONDS', 2 * app.config['BATCH_ITEM_TIMEOUT'] + 60))
+# Stream responses end before gunicorn's 120s timeout; clients reconnect with ?after=
+app.config['JOB_STREAM_MAX_SECONDS'] = float(os.environ.get('JOB_STREAM_MAX_SECONDS', 100))
+# Batch results are kept for paginated viewing (/batches/<id>) for this long
+app.config['BATCH_RESULTS_TTL'] = float(os.environ.get('BATCH_RESULTS_TTL', 24 * 3600))
+app.config['BATCH_PAGE_SIZE'] = int(os.environ.get('BATCH_PAGE_SIZE', 50))
+# Every served result is recorded for /api/history, written in the background
+app.config['HISTORY_ENABLED'] = os.environ.get('HISTORY_ENABLED', '1').lower() not in ('0', 'false', 'no')
+app.config['HISTORY_RETENTION_DAYS'] = float(os.environ.get('HISTORY_RETENTION_DAYS', 90))
+
+# OCR result cache: bounded in-process LRU in front of an on-disk tier shared by all workers
+app.config['OCR_CACHE_ENABLED'] = os.environ.get('OCR_CACHE_ENABLED', '1').lower() not in ('0', 'false', 'no')
+app.config['OCR_CACHE_DIR'] = os.environ.get('OCR_CACHE_DIR', os.path.join(app.config['UPLOAD_FOLDER'], 'ocr_cache'))
+app.config['OCR_CACHE_MEMORY_ENTRIES'] = int(os.environ.get('OCR_CACHE_MEMORY_ENTRIES', 512))
+app.config['OCR_CACHE_DISK_MB'] = int(os.environ.get('OCR_CACHE_DISK_MB', 200))
+app.config['OCR_CACHE_TTL'] = int(os.environ.get('OCR_CACHE_TTL', 7 * 24 * 3600))
+# Batch rows that share an image (same content hash) are OCRed once and the text reused
+app.config['BATCH_DEDUP'] = os.environ.get('BATCH_DEDUP', '1').lower() not in ('0', 'false', 'no')
+# Perceptual index: reuse the OCR text of an earlier image whose difference hash is within
+# PERCEPTUAL_THRESHOLD bits (of 64) of a new one, e.g. a re-scan of the same label. Off by
+# default: labels whose artwork differs only in small print hash alike.
+app.config['PERCEPTUAL_INDEX_ENABLED'] = os.environ.get('PERCEPTUAL_INDEX_ENABLED', '0').lower() not in ('0', 'false', 'no')
+app.config['PERCEPTUAL_THRESHOLD'] = int(os.environ.get('PERCEPTUAL_THRESHOLD', 4))
+app.config['PERCEPTUAL_INDEX_TTL'] = int(os.environ.get('PERCEPTUAL_INDEX_TTL', app.config['OCR_CACHE_TTL']))
+
+# Uploads are verified straight from memory; larger files (and batch uploads past
+# this total) are spilled to a temp file in UPLOAD_FOLDER instead
+app.config['UPLOAD_MEMORY_LIMIT'] = int(os.environ.get('UPLOAD_MEMORY_LIMIT_MB', 64)) * 1024 * 1024
+
+# 'pytesseract' runs a tesseract subprocess per pass; 'tesserocr' keeps resident
+# engine handles in each worker (needs the optional tesserocr package); 'auto'
+# uses tesserocr when it is installed and works, pytesseract otherwise
+app.config['OCR_BACKEND'] = os.environ.get('OCR_BACKEND', 'auto').lower()
+app.config['OCR_PRELOAD'] = os.environ.get('OCR_PRELOAD', '1').lower() not in ('0', 'false', 'no')
+# Tesseract passes allowed at once across every worker and batch process on the host (0: no limit)
+app.config['OCR_SLOTS'] = int(os.environ.get('OCR_SLOTS', os.cpu_count() or 1))
+app.config['OCR_SLOT_DIR'] = os.environ.get('OCR_SLOT_DIR', os.path.join(app.config['UPLOAD_FOLDER'], 'ocr_slots'))
+# Admission control, in units of concurrent OCR work across all workers: a single-label
+# request is 1 unit, a batch BATCH_WORKERS units. ADMISSION_MAX_INFLIGHT=0 disables it.
+app.config['ADMISSION_MAX_INFLIGHT'] = int(os.environ.get('ADMISSION_MAX_INFLIGHT', 4 * max(1, app.config['OCR_SLOTS'])))
+# Units only single-label requests may use, so batches can't crowd them out
+app.config['ADMISSION_INTERACTIVE_RESERVE'] = int(os.environ.get('ADMISSION_INTERACTIVE_RESERVE',
+                                                                 max(1, app.config['ADMISSION_MAX_INFLIGHT'] // 4)))
+# Reject when the predicted time to serve a new request exceeds these (seconds)
+app.config['ADMISSION_MAX_LATENCY'] = float(os.environ.get('ADMISSION_MAX_LATENCY', 60))
+app.config['ADMISSION_BATCH_MAX_LATENCY'] = float(os.environ.get('ADMISSION_BATCH_MAX_LATENCY', 30))
+app.config['ADMISSION_DIR'] = os.environ.get('ADMISSION_DIR', os.path.join(app.config['UPLOAD_FOLDER'], 'admission'))
+# Profiling: PROFILE_SAMPLE_RATE profiles that fraction of single-label requests; with
+# PROFILE_TOKEN set, a request sending it as X-Profile (or ?profile=) is always profiled
+app.config['PROFILE_DIR'] = os.environ.get('PROFILE_DIR', os.path.join(app.config['UPLOAD_FOLDER'], 'profiles'))
+app.config['PROFILE_SAMPLE_RATE'] = float(os.environ.get('PROFILE_SAMPLE_RATE', 0))
+app.config['PROFILE_TOKEN'] = os.environ.get('PROFILE_TOKEN', '')
+app.config['PROFILE_MAX_FILES'] = int(os.environ.get('PROFILE_MAX_FILES', 500))
+# Each process (gunicorn worker or batch pool process) writes its counters here; /metrics sums them
+app.config['METRICS_DIR'] = os.environ.get('METRICS_DIR', os.path.join(app.config['UPLOAD_FOLDER'], 'metrics'))
 
-os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg'}
 
 GOVERNMENT_WARNING = """GOVERNMENT WARNING: (1) According to the Surgeon General, women should not drink alcoholic beverages during pregnancy because of the risk of birth defects. (2) Consumption of alcoholic beverages impairs your ability to drive a car or operate machinery, and may cause health problems."""
@@ -219,51 +349,326 @@ ALCOHOL_CORRECTIONS = {
 }
 
 
+# rn -> m substitutions applied after the brand dictionary
+RN_TO_M_WORDS = ['michelob', 'miller', 'beam', 'jameson', 'morgan', 'malibu',
+                 'modelo', 'merlot', 'cream', 'moscato', 'premium', 'malt',
+                 'forman', 'mendocino']
+
+
+def _trie_regex(keys):
+    """Regex source matching any of keys, factored into a prefix trie (longest key wins)."""
+    trie = {}
+    for key in keys:
+        node = trie
+        for ch in key:
+            node = node.setdefault(ch, {})
+        node[''] = True
+    
+    def build(node):
+        branches = [re.escape(ch) + build(child) for ch, child in node.items() if ch]
+        if not branches:
+            return ''
+        terminal = '' in node
+        group = branches[0] if len(branches) == 1 and not terminal else f"(?:{'|'.join(branches)})"
+        return group + '?' if terminal else group
+    
+    return build(trie)
+
+
+class _SegmentCorrector:
+    """
+    A run of correction entries (none containing a space) applied to one
+    segment of text, with the output of the sequential loop over that run.
+    
+    Only entries whose key occurs in the segment run, in order. When one
+    changes the text, the later entries whose key could overlap what it wrote
+    (or span the join, for an empty replacement) are queued too: a key that
+    appears partway through the loop must overlap such a write. The keys
+    present are found in one scan of a trie-shaped regex.
+    """
+    
+    CACHE_SIZE = 8192
+    
+    def __init__(self, entries, ignore_case):
+        self.entries = entries
+        self.ignore_case = ignore_case
+        self._subs = [re.compile(re.escape(key), re.IGNORECASE) if ignore_case else None for key, _ in entries]
+        self._creates = {}
+        
+        entries_for = {}
+        for index, (key, _) in enumerate(entries):
+            entries_for.setdefault(key, []).append(index)
+        # Entries whose key is present when the regex matches this text at a position
+        self._present_for = {}
+        for key in entries_for:
+            prefixes = [entries_for.get(key[:end], ()) for end in range(1, len(key) + 1)]
+            self._present_for[key] = [index for group in prefixes for index in group]
+        self._regex = re.compile(_trie_regex(entries_for), re.IGNORECASE if ignore_case else 0)
+        self.correct = lru_cache(maxsize=self.CACHE_SIZE)(self._correct)
+    
+    def _present(self, text):
+        present = set()
+        match = self._regex.search(text)
+        while match is not None:
+            present.update(self._present_for[match.group(0).lower()])
+            match = self._regex.search(text, match.start() + 1)
+        return present
+    
+    def _overlaps(self, key, written):
+        """Whether some alignment of key and written shares at least one character."""
+        if self.ignore_case:
+            written = written.lower()
+        for offset in range(1 - len(written), len(key)):
+            start, end = max(0, offset), min(len(key), offset + len(written))
+            if key[start:end] == written[start - offset:end - offset]:
+                return True
+        return False
+    
+    def _created_by(self, index):
+        """Later entries whose key a change made by entry `index` could bring into the text."""
+        creates = self._creates.get(index)
+        if creates is None:
+            written = self.entries[index][1]
+            creates = self._creates[index] = [
+                later for later in range(index + 1, len(self.entries))
+                if not written or self._overlaps(self.entries[later][0], written)
+            ]
+        return creates
+    
+    def _correct(self, text):
+        pending = sorted(self._present(text))
+        queued = set(pending)
+        while pending:
+            index = heapq.heappop(pending)
+            key, correct = self.entries[index]
+            if self.ignore_case:
+                updated = self._subs[index].sub(lambda m, r=correct: r, text)
+            else:
+                updated = text.replace(key, correct)
+            if updated == text:
+                continue
+            text = updated
+            for later in self._created_by(index):
+                if later not in queued:
+                    queued.add(later)
+                    heapq.heappush(pending, later)
+        return text
+
+
+class CorrectionEngine:
+    """
+    Applies a corrections dictionary with exactly the output of the original
+    sequential loop (every entry applied in turn, with str.replace or a
+    case-insensitive re.sub), without scanning the text once per entry.
+    
+    A key without a space can never match across one, so the text is split
+    on spaces and each word corrected on its own (see _SegmentCorrector),
+    with the results cached: label text repeats the same words many times.
+    A key containing a space ('pu re') is applied to the whole text at its
+    place in the dictionary order, splitting the entries around it into
+    separate word passes.
+    """
+    
+    def __init__(self, corrections, ignore_case=False, lowercase=True):
+        self.ignore_case = ignore_case
+        self.lowercase = lowercase
+        
+        # Every entry is kept, duplicates included: a repeated key runs again in
+        # the loop and can match text that entries in between created
+        entries = [(wrong.lower(), correct) for wrong, correct in corrections if wrong]
+        self._steps = []
+        run = []
+        for key, correct in entries:
+            if ' ' not in key:
+                run.append((key, correct))
+                continue
+            if run:
+                self._steps.append(_SegmentCorrector(run, ignore_case))
+                run = []
+            self._steps.append((key, correct, re.compile(re.escape(key), re.IGNORECASE) if ignore_case else None))
+        if run:
+            self._steps.append(_SegmentCorrector(run, ignore_case))
+    
+    def apply(self, text):
+        if not text:
+            return ""
+        if self.lowercase:
+            text = text.lower()
+        words = text.split(' ')
+        for step in self._steps:
+            if isinstance(step, _SegmentCorrector):
+                words = list(map(step.correct, words))
+                continue
+            key, correct, pattern = step
+            text = ' '.join(words)
+            if pattern is not None:
+                updated = pattern.sub(lambda m: correct, text)
+            else:
+                updated = text.replace(key, correct)
+            if updated != text:
+                words = updated.split(' ')
+        return ' '.join(words)
+
+
+class KeywordMatcher:
+    """
+    Finds which of a set of keywords occur in a text, each keyword having any
+    number of alternative spellings (OCR variants).
+    
+    Each keyword's own spelling is checked with a plain substring test, which
+    is what usually succeeds. The variants of the keywords still missing are
+    substring-tested too, up to SCAN_LIMIT tests: each is a C-speed search,
+    far cheaper per spelling than a regex is per character. Keywords left
+    after that are found in one scan of a single trie-shaped regex (compiled
+    once per set of missing keywords), so adding more variants grows the trie
+    rather than adding another pass over the text. At each position the regex reports the longest spelling that
+    matches; every shorter spelling matching there is a prefix of it, so each
+    matched string maps to all the keywords it proves present.
+    """
+    
+    # Substring tests after which one regex scan is cheaper than testing the
+    # remaining variants (see `benchmark.py warning --extra-variants`)
+    SCAN_LIMIT = 120
+    
+    def __init__(self, keywords, variants=None, ignore_spaces=True, max_patterns=256):
+        self.keywords = list(keywords)
+        self.ignore_spaces = ignore_spaces
+        self.max_patterns = max_patterns
+        variants = variants or {}
+        
+        self._primary = [(keyword, self._prepare(keyword)) for keyword in self.keywords]
+        self._spellings = {}
+        for keyword in self.keywords:
+            for spelling in [keyword] + list(variants.get(keyword, [])):
+                spelling = self._prepare(spelling)
+                if spelling:
+                    self._spellings.setdefault(spelling, set()).add(keyword)
+        self._variants = {keyword: [spelling for spelling in dict.fromkeys(
+                              self._prepare(variant) for variant in variants.get(keyword, []))
+                              if spelling and spelling != primary]
+                          for keyword, primary in self._primary}
+        self._patterns = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def _prepare(self, text):
+        text = text.lower()
+        return text.replace(' ', '') if self.ignore_spaces else text
+    
+    def _pattern_for(self, missing):
+        """(regex, spelling -> keywords) over every spelling of the missing keywords."""
+        with self._lock:
+            pattern = self._patterns.get(missing)
+            if pattern is not None:
+                self._patterns.move_to_end(missing)
+                return pattern
+        
+        spellings = {spelling: keywords & missing for spelling, keywords in self._spellings.items()
+                     if keywords & missing}
+        keywords_for = {}
+        for spelling in spellings:
+            prefixes = (spellings.get(spelling[:end], ()) for end in range(1, len(spelling) + 1))
+            keywords_for[spelling] = frozenset().union(*prefixes)
+        pattern = (re.compile(_trie_regex(spellings)), keywords_for)
+        
+        with self._lock:
+            self._patterns[missing] = pattern
+            while len(self._patterns) > self.max_patterns:
+                self._patterns.popitem(last=False)
+        return pattern
+    
+    def find(self, text):
+        """Set of keywords present in text (already lowercased)."""
+        if not text:
+            return set()
+        if self.ignore_spaces and ' ' in text:
+            text = text.replace(' ', '')
+        
+        found = {keyword for keyword, spelling in self._primary if spelling and spelling in text}
+        missing = frozenset(self.keywords) - found
+        if not missing:
+            return found
+        
+        # Substring tests while they stay cheap: a variant found early costs
+        # little, a keyword with no variant in the text costs all of them
+        tested = 0
+        for keyword in self.keywords:
+            if keyword in found:
+                continue
+            variants = self._variants[keyword]
+            if tested + len(variants) > self.SCAN_LIMIT:
+                break
+            for spelling in variants:
+                tested += 1
+                if spelling in text:
+                    found.add(keyword)
+                    break
+            else:
+                missing -= {keyword}
+        else:
+            return found
+        missing -= found
+        
+        # Resume one character past each match start, so spellings that
+        # overlap an earlier match are still seen
+        regex, keywords_for = self._pattern_for(missing)
+        match = regex.search(text)
+        while match is not None:
+            found |= keywords_for[match.group(0)]
+            if missing <= found:
+                break
+            match = regex.search(text, match.start() + 1)
+        return found
+
+
+_correction_engines = {}
+
+
+def get_correction_engine(corrections_dict):
+    """Compiled engine for a corrections dictionary, built on first use."""
+    engine = _correction_engines.get(id(corrections_dict))
+    if engine is None:
+        engine = CorrectionEngine(corrections_dict.items())
+        _correction_engines[id(corrections_dict)] = engine
+    return engine
+
+
+def compile_correction_engines():
+    """(Re)build the per-field engines. Call again after editing a corrections dictionary."""
+    global BRAND_ENGINE, TYPE_ENGINE, VOLUME_ENGINE, ALCOHOL_ENGINE
+    _correction_engines.clear()
+    rn_to_m = [(word.replace('m', 'rn'), word) for word in RN_TO_M_WORDS]
+    BRAND_ENGINE = CorrectionEngine(list(BRAND_CORRECTIONS.items()) + rn_to_m)
+    TYPE_ENGINE = get_correction_engine(TYPE_CORRECTIONS)
+    VOLUME_ENGINE = CorrectionEngine(VOLUME_CORRECTIONS.items(), ignore_case=True, lowercase=False)
+    ALCOHOL_ENGINE = CorrectionEngine(ALCOHOL_CORRECTIONS.items(), ignore_case=True, lowercase=False)
+
+
+compile_correction_engines()
+
+
 def apply_corrections(text, corrections_dict):
     """Apply a dictionary of corrections to text."""
-    if not text:
-        return ""
-    result = text.lower()
-    for wrong, correct in corrections_dict.items():
-        result = result.replace(wrong.lower(), correct)
-    return result
+    return get_correction_engine(corrections_dict).apply(text)
 
 
 def apply_brand_corrections(text):
-    """Apply brand-specific OCR corrections."""
-    result = apply_corrections(text, BRAND_CORRECTIONS)
-    # Handle rn -> m substitution for brand names
-    rn_to_m_words = ['michelob', 'miller', 'beam', 'jameson', 'morgan', 'malibu', 
-                     'modelo', 'merlot', 'cream', 'moscato', 'premium', 'malt',
-                     'forman', 'mendocino']
-    for word in rn_to_m_words:
-        mangled = word.replace('m', 'rn')
-        result = result.replace(mangled, word)
-    return result
+    """Apply brand-specific OCR corrections (including rn -> m for brand names)."""
+    return BRAND_ENGINE.apply(text)
 
 
 def apply_type_corrections(text):
     """Apply wine/beer type-specific OCR corrections."""
-    return apply_corrections(text, TYPE_CORRECTIONS)
+    return TYPE_ENGINE.apply(text)
 
 
 def apply_volume_corrections(text):
-    """Apply volume-specific OCR corrections."""
-    result = text
-    # Case-insensitive replacement
-    for wrong, correct in VOLUME_CORRECTIONS.items():
-        pattern = re.compile(re.escape(wrong), re.IGNORECASE)
-        result = pattern.sub(correct, result)
-    return result
+    """Apply volume-specific OCR corrections (case-insensitive)."""
+    return VOLUME_ENGINE.apply(text)
 
 
 def apply_alcohol_corrections(text):
-    """Apply alcohol content-specific OCR corrections."""
-    result = text
-    for wrong, correct in ALCOHOL_CORRECTIONS.items():
-        pattern = re.compile(re.escape(wrong), re.IGNORECASE)
-        result = pattern.sub(correct, result)
-    return result
+    """Apply alcohol content-specific OCR corrections (case-insensitive)."""
+    return ALCOHOL_ENGINE.apply(text)
 
 
 # ============================================================================
@@ -277,8 +682,28 @@ def fuzzy_ratio(s1, s2):
     return int(SequenceMatcher(None, s1.lower(), s2.lower()).ratio() * 100)
 
 
+def _lcs_length(pattern_masks, size, text):
+    """Bit-parallel LCS length of a pattern (as per-character bitmasks) against text."""
+    full = (1 << size) - 1
+    v = full
+    for ch in text:
+        u = v & pattern_masks.get(ch, 0)
+        v = ((v + u) | (v - u)) & full
+    return size - v.bit_count()
+
+
 def fuzzy_partial_ratio(s1, s2):
-    """Partial matching - check if shorter string is contained in longer."""
+    """
+    Partial matching - best similarity of the shorter string against any
+    same-length window of the longer one.
+    
+    A window's SequenceMatcher ratio is bounded by its LCS with the shorter
+    string, which is in turn bounded by how many characters they share. The
+    shared-character count updates in O(1) as the window slides, so windows are
+    visited best-bound first and the scan stops once no remaining window could
+    beat the best ratio found. Survivors get a bit-parallel LCS check before a
+    SequenceMatcher is built. Scores are identical to scoring every window.
+    """
     if not s1 or not s2:
         return 0
     
@@ -293,12 +718,43 @@ def fuzzy_partial_ratio(s1, s2):
     if len(shorter) == 0:
         return 0
     
-    # Sliding window
+    size = len(shorter)
+    need = Counter(shorter)
+    have = Counter(longer[:size])
+    overlap = sum(min(count, have[ch]) for ch, count in need.items())
+    
+    # Bucket window start offsets by their character overlap
+    buckets = [[] for _ in range(size + 1)]
+    buckets[overlap].append(0)
+    for i in range(1, len(longer) - size + 1):
+        out_ch = longer[i - 1]
+        if have[out_ch] <= need[out_ch]:
+            overlap -= 1
+        have[out_ch] -= 1
+        in_ch = longer[i + size - 1]
+        have[in_ch] += 1
+        if have[in_ch] <= need[in_ch]:
+            overlap += 1
+        buckets[overlap].append(i)
+    
+    pattern_masks = {}
+    for bit, ch in enumerate(shorter):
+        pattern_masks[ch] = pattern_masks.get(ch, 0) | (1 << bit)
+    
+    # Same arithmetic as SequenceMatcher.ratio(), so bounds compare exactly
+    def bound(matches):
+        return 2.0 * matches / (2 * size) * 100
+    
     best_ratio = 0
-    for i in range(len(longer) - len(shorter) + 1):
-        window = longer[i:i + len(shorter)]
-        ratio = SequenceMatcher(None, shorter, window).ratio() * 100
-        best_ratio = max(best_ratio, ratio)
+    for overlap in range(size, 0, -1):
+        if bound(overlap) <= best_ratio:
+            break
+        for i in buckets[overlap]:
+            window = longer[i:i + size]
+            if bound(_lcs_length(pattern_masks, size, window)) <= best_ratio:
+                continue
+            ratio = SequenceMatcher(None, shorter, window).ratio() * 100
+            best_ratio = max(best_ratio, ratio)
     
     return int(best_ratio)
 
@@ -331,550 +787,3724 @@ def word_match_score(field_words, text):
 
 
 # ============================================================================
-# OCR EXTRACTION
+# STAGE TIMING
 # ============================================================================
 
-def extract_text_from_image(image_path):
+_stage_timings = contextvars.ContextVar('stage_timings', default=None)
+
+
+@contextmanager
+def record_stages():
     """
-    Multi-strategy OCR extraction.
-    Uses multiple preprocessing approaches and combines results to maximize text capture.
-    Different preprocessing works better for different parts of labels (light text, dark text, etc.)
+    Collect (stage, seconds) pairs from every timed_stage run inside the block,
+    including OCR passes on the shared pool. Yields the list being filled.
     """
+    outer = _stage_timings.get()
+    timings = []
+    token = _stage_timings.set(timings)
     try:
-        image = Image.open(image_path)
-        
-        all_texts = []
-        
-        # Strategy 1: Basic grayscale + moderate contrast (good general purpose)
-        img1 = image.convert('L')
-        img1 = ImageEnhance.Contrast(img1).enhance(1.5)
-        text1 = pytesseract.image_to_string(img1, config='--oem 3 --psm 3')
-        all_texts.append(text1)
-        
-        # Strategy 2: High contrast (captures faint text better)
-        img2 = image.convert('L')
-        img2 = ImageEnhance.Contrast(img2).enhance(2.0)
-        text2 = pytesseract.image_to_string(img2, config='--oem 3 --psm 3')
-        all_texts.append(text2)
-        
-        # Strategy 3: Sharpen + contrast (captures stylized/script fonts better)
-        img3 = image.convert('L')
-        img3 = img3.filter(ImageFilter.SHARPEN)
-        img3 = ImageEnhance.Contrast(img3).enhance(1.5)
-        text3 = pytesseract.image_to_string(img3, config='--oem 3 --psm 3')
-        all_texts.append(text3)
-        
-        # Strategy 4: Threshold/binarize (clean separation for printed text)
-        img4 = image.convert('L')
-        img4 = img4.point(lambda x: 0 if x < 128 else 255, '1')
-        text4 = pytesseract.image_to_string(img4, config='--oem 3 --psm 3')
-        all_texts.append(text4)
-        
-        # Combine all extracted text (deduplicate words while preserving order)
-        combined = " ".join(all_texts)
-        combined = " ".join(combined.split())  # Normalize whitespace
-        
-        return combined
-        
-    except Exception as e:
-        return ""
+        yield timings
+    finally:
+        _stage_timings.reset(token)
+        # Nested recorders also report to the enclosing one
+        if outer is not None:
+            outer.extend(timings)
+
+
+@contextmanager
+def timed_stage(name):
+    """Time a block (or, as a decorator, a function) when stages are being recorded."""
+    timings = _stage_timings.get()
+    if timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.append((name, time.perf_counter() - start))
+
+
+def submit_in_context(executor, fn, *args):
+    """executor.submit that keeps the caller's stage recording and profiling in the worker thread."""
+    return executor.submit(contextvars.copy_context().run, _profile_in_worker, fn, *args)
+
+
+def stage_totals(timings):
+    """Seconds per stage name; stages that ran several times (or in parallel) are summed."""
+    totals = {}
+    for stage, seconds in timings:
+        totals[stage] = totals.get(stage, 0) + seconds
+    return {stage: round(seconds, 4) for stage, seconds in totals.items()}
 
 
 # ============================================================================
-# VERIFICATION FUNCTIONS
+# METRICS
 # ============================================================================
 
-def allowed_file(filename):
-    """Check if file extension is allowed."""
-    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+# Histogram bucket upper bounds, in seconds
+METRIC_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
 
+METRIC_DEFINITIONS = {
+    'verifier_http_requests_total': ('counter', 'HTTP requests handled, by endpoint and status code.'),
+    'verifier_http_request_duration_seconds': ('histogram', 'HTTP request handling time, by endpoint.'),
+    'verifier_http_requests_in_flight': ('gauge', 'HTTP requests currently being handled.'),
+    'verifier_labels_total': ('counter', 'Labels verified, by OCR mode and outcome (pass, fail or error).'),
+    'verifier_label_duration_seconds': ('histogram', 'verify_label time per label, by OCR mode.'),
+    'verifier_stage_duration_seconds': ('histogram', 'Time per pipeline stage (decode, preprocess, tesseract, verify).'),
+    'verifier_ocr_passes_total': ('counter', 'Tesseract passes run, by strategy or layout pass.'),
+    'verifier_quality_tier_total': ('counter', 'Labels verified per quality tier, by why the tier was used.'),
+    'verifier_ocr_cache_lookups_total': ('counter', 'OCR cache lookups, by result.'),
+    'verifier_ocr_reuse_total': ('counter', 'Labels verified against OCR text read for another image, by kind (duplicate or perceptual).'),
+    'verifier_batch_items_in_flight': ('gauge', 'Batch rows running on the process pool.'),
+    'verifier_job_queue_depth': ('gauge', 'Background job rows still waiting for a result.'),
+    'verifier_admission_rejections_total': ('counter', 'Requests turned away with 429, by traffic class and reason.'),
+    'verifier_admission_units_in_flight': ('gauge', 'Admitted OCR work units in flight across all workers, by traffic class.'),
+}
 
-def normalize_text(text):
-    """Normalize text for comparison."""
-    if not text:
-        return ""
-    text = re.sub(r'\s+', ' ', text)
-    return text.lower().strip()
 
+def process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
 
-def verify_brand_name(input_value, extracted_text, threshold=80):
-    """Verify brand name with brand-specific OCR corrections."""
-    if not input_value:
-        return (True, 100, "Field not provided (optional)")
-    if not extracted_text:
-        return (False, 0, "No text extracted from image")
+
+class MetricsStore:
+    """
+    Counters, gauges and histograms for this process.
     
-    input_norm = normalize_text(input_value)
-    text_norm = normalize_text(extracted_text)
+    Every process writes its values to `<directory>/<pid>.json` on flush();
+    collect() sums the files of all processes. Files left behind by processes
+    that have exited are folded into an archive file, keeping their counters
+    and histograms and dropping their gauges.
+    """
     
-    # Apply brand-specific corrections to both
-    input_corr = apply_brand_corrections(input_norm)
-    text_corr = apply_brand_corrections(text_norm)
+    ARCHIVE = 'archive.json'
     
-    # Exact match after correction
-    if input_corr in text_corr:
-        return (True, 100, "Exact match found")
+    def __init__(self, directory):
+        self.directory = directory
+        self._values = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._flushed_pid = None
+        # A forked worker starts counting from zero under its own pid
+        os.register_at_fork(after_in_child=self._values.clear)
     
-    # Try matching individual words (for multi-word brands)
-    input_words = [w for w in input_corr.split() if len(w) > 1]
-    if input_words:
-        word_score = word_match_score(input_words, text_corr)
-        if word_score >= 100:
-            return (True, 100, "All brand words found")
-        if word_score >= threshold:
-            return (True, word_score, f"Brand match ({word_score}% words found)")
+    @staticmethod
+    def _key(name, labels):
+        return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
     
-    # Fuzzy matching
-    partial_score = fuzzy_partial_ratio(input_corr, text_corr)
-    if partial_score >= threshold:
-        return (True, partial_score, f"Fuzzy match ({partial_score}% similarity)")
+    def inc(self, name, value=1, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + value
     
-    return (False, partial_score, f"Brand not found ({partial_score}% similarity)")
-
-
-def verify_class_type(input_value, extracted_text, threshold=75):
-    """Verify class/type designation with type-specific OCR corrections."""
-    if not input_value:
-        return (True, 100, "Field not provided (optional)")
-    if not extracted_text:
-        return (False, 0, "No text extracted from image")
+    def set(self, name, value, **labels):
+        with self._lock:
+            self._values[self._key(name, labels)] = value
     
-    input_norm = normalize_text(input_value)
-    text_norm = normalize_text(extracted_text)
+    def observe(self, name, value, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            histogram = self._values.get(key)
+            if histogram is None:
+                histogram = self._values[key] = {'buckets': [0] * len(METRIC_BUCKETS), 'sum': 0, 'count': 0}
+            bucket = bisect.bisect_left(METRIC_BUCKETS, value)
+            if bucket < len(METRIC_BUCKETS):
+                histogram['buckets'][bucket] += 1
+            histogram['sum'] += value
+            histogram['count'] += 1
     
-    # Apply type-specific corrections
-    input_corr = apply_type_corrections(input_norm)
-    text_corr = apply_type_corrections(text_norm)
+    def _path(self, pid):
+        return os.path.join(self.directory, f"{pid}.json")
     
-    # Exact match
-    if input_corr in text_corr:
-        return (True, 100, "Exact match found")
+    def flush(self):
+        """Write this process's values for the other workers to read."""
+        if not self.directory:
+            return
+        pid = os.getpid()
+        with self._lock:
+            entries = [[name, dict(labels), value if not isinstance(value, dict) else
+                        dict(value, buckets=list(value['buckets']))]
+                       for (name, labels), value in self._values.items()]
+        with self._flush_lock:
+            path = self._path(pid)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            try:
+                if self._flushed_pid != pid:
+                    # A file under our pid belongs to an earlier process that exited
+                    self._fold(path)
+                    self._flushed_pid = pid
+                with open(tmp_path, 'w') as f:
+                    json.dump(entries, f)
+                os.replace(tmp_path, path)
+            except OSError:
+                # Including a directory init_process() hasn't created (a CLI import)
+                pass
     
-    # Word matching (important for multi-word types like "California Cabernet Sauvignon")
-    input_words = [w for w in input_corr.split() if len(w) > 2]
-    if input_words:
-        word_score = word_match_score(input_words, text_corr)
-        if word_score >= 100:
-            return (True, 100, "All type words found")
-        if word_score >= threshold:
-            return (True, word_score, f"Type match ({word_score}% words found)")
+    @staticmethod
+    def _load(path):
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return []
     
-    # Fuzzy matching
-    partial_score = fuzzy_partial_ratio(input_corr, text_corr)
-    token_score = fuzzy_token_set_ratio(input_corr, text_corr)
-    best_score = max(partial_score, token_score)
+    @staticmethod
+    def _merge(totals, entries, include_gauges=True):
+        for name, labels, value in entries:
+            kind = METRIC_DEFINITIONS.get(name, ('gauge',))[0]
+            if kind == 'gauge' and not include_gauges:
+                continue
+            key = MetricsStore._key(name, labels)
+            current = totals.get(key)
+            if kind == 'histogram':
+                if current is None:
+                    current = totals[key] = {'buckets': [0] * len(METRIC_BUCKETS), 'sum': 0, 'count': 0}
+                current['buckets'] = [a + b for a, b in zip(current['buckets'], value['buckets'])]
+                current['sum'] += value['sum']
+                current['count'] += value['count']
+            else:
+                totals[key] = (current or 0) + value
     
-    if best_score >= threshold:
-        return (True, best_score, f"Fuzzy match ({best_score}% similarity)")
+    def _fold(self, path):
+        """Move a dead process's counters into the archive."""
+        archive = os.path.join(self.directory, self.ARCHIVE)
+        with open(os.path.join(self.directory, '.lock'), 'w') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            if not os.path.exists(path):
+                return
+            totals = {}
+            self._merge(totals, self._load(archive))
+            self._merge(totals, self._load(path), include_gauges=False)
+            tmp_path = f"{archive}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump([[name, dict(labels), value] for (name, labels), value in totals.items()], f)
+            os.replace(tmp_path, archive)
+            os.remove(path)
     
-    return (False, best_score, f"Type not found ({best_score}% similarity)")
+    def collect(self):
+        """Sum of every process's values, keyed by (name, labels)."""
+        self.flush()
+        if not self.directory:
+            with self._lock:
+                return {key: value if not isinstance(value, dict) else dict(value, buckets=list(value['buckets']))
+                        for key, value in self._values.items()}
+        
+        totals = {}
+        for entry in os.scandir(self.directory):
+            stem, ext = os.path.splitext(entry.name)
+            if ext != '.json' or not stem.isdigit():
+                continue
+            if not process_alive(int(stem)):
+                self._fold(entry.path)
+                continue
+            self._merge(totals, self._load(entry.path))
+        self._merge(totals, self._load(os.path.join(self.directory, self.ARCHIVE)))
+        return totals
 
 
-def verify_net_contents(input_value, extracted_text):
-    """Strict net contents verification - number must match exactly."""
-    if not input_value:
-        return (True, 100, "Field not provided (optional)")
-    if not extracted_text:
-        return (False, 0, "No text extracted from image")
+metrics = MetricsStore(app.config['METRICS_DIR'])
+
+
+def flush_metrics():
+    """Snapshot the per-process OCR cache counters and write this process's metrics."""
+    if ocr_cache is not None:
+        stats = ocr_cache.get_stats()
+        for result, stat in (('memory_hit', 'memory_hits'), ('disk_hit', 'disk_hits'), ('miss', 'misses')):
+            metrics.set('verifier_ocr_cache_lookups_total', stats[stat], result=result)
+    metrics.flush()
+
+
+# Seconds a metric update can wait before this process's file is rewritten
+METRICS_FLUSH_INTERVAL = 1.0
+
+_metrics_flusher = None
+_metrics_flusher_lock = threading.Lock()
+_metrics_dirty = threading.Event()
+
+
+def schedule_metrics_flush():
+    """Have this process's metrics written within METRICS_FLUSH_INTERVAL, off the request path."""
+    global _metrics_flusher
+    _metrics_dirty.set()
+    with _metrics_flusher_lock:
+        # A forked worker inherits the thread object but not the thread
+        if _metrics_flusher is None or not _metrics_flusher.is_alive():
+            _metrics_flusher = threading.Thread(target=_run_metrics_flusher, name='metrics-flusher', daemon=True)
+            _metrics_flusher.start()
+
+
+def _run_metrics_flusher():
+    while True:
+        _metrics_dirty.wait()
+        time.sleep(METRICS_FLUSH_INTERVAL)
+        _metrics_dirty.clear()
+        flush_metrics()
+
+
+def flush_pending_metrics():
+    """Write updates the flusher thread hasn't got to yet (at exit); nothing if there are none."""
+    if _metrics_dirty.is_set():
+        _metrics_dirty.clear()
+        flush_metrics()
+
+
+atexit.register(flush_pending_metrics)
+
+
+def record_label_metrics(result, timings):
+    """Count one verify_label call and its stage timings."""
+    outcome = 'error' if not result['success'] else 'pass' if result['overall_pass'] else 'fail'
+    metrics.inc('verifier_labels_total', ocr_mode=result['ocr_mode'], outcome=outcome)
+    metrics.observe('verifier_label_duration_seconds', result['processing_time'], ocr_mode=result['ocr_mode'])
+    metrics.inc('verifier_quality_tier_total', tier=result['quality']['tier'], reason=result['quality']['reason'])
+    for stage, seconds in timings:
+        metrics.observe('verifier_stage_duration_seconds', seconds, stage=stage)
+        if stage.startswith('tesseract:'):
+            metrics.inc('verifier_ocr_passes_total', stage=stage.split(':', 1)[1])
+    schedule_metrics_flush()
+
+
+def _format_labels(labels, **extra):
+    pairs = list(labels) + [(k, v) for k, v in extra.items()]
+    if not pairs:
+        return ''
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in pairs)
+    return '{' + ','.join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + '}'
+
+
+def render_metrics(totals):
+    """Prometheus text exposition format for collected metric values."""
+    lines = []
+    for name, (kind, help_text) in METRIC_DEFINITIONS.items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for (metric, labels), value in sorted(totals.items(), key=lambda item: item[0]):
+            if metric != name:
+                continue
+            if kind != 'histogram':
+                lines.append(f"{name}{_format_labels(labels)} {value:g}")
+                continue
+            cumulative = 0
+            for bound, count in zip(METRIC_BUCKETS, value['buckets']):
+                cumulative += count
+                lines.append(f"{name}_bucket{_format_labels(labels, le=f'{bound:g}')} {cumulative}")
+            lines.append(f"{name}_bucket{_format_labels(labels, le='+Inf')} {value['count']}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {value['sum']:.6f}")
+            lines.append(f"{name}_count{_format_labels(labels)} {value['count']}")
+    return '\n'.join(lines) + '\n'
+
+
+# ============================================================================
+# PROFILING
+# ============================================================================
+
+# Profilers started in pool threads on behalf of the request being profiled
+_thread_profilers = contextvars.ContextVar('thread_profilers', default=None)
+
+
+def _profile_in_worker(fn, *args):
+    profilers = _thread_profilers.get()
+    if profilers is None:
+        return fn(*args)
+    # cProfile only sees its own thread, so each pool task gets a profiler
+    profiler = cProfile.Profile()
+    profilers.append(profiler)
+    return profiler.runcall(fn, *args)
+
+
+def prune_profiles(folder, max_files):
+    """Delete the oldest profiles beyond max_files."""
+    try:
+        entries = sorted((entry.stat().st_mtime, entry.path) for entry in os.scandir(folder)
+                         if entry.name.endswith('.prof'))
+    except OSError:
+        return
+    for _, path in entries[:max(0, len(entries) - max_files)]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+@contextmanager
+def profiled(tag):
+    """
+    Profile the block, including OCR passes handed to the pool with submit_in_context,
+    and save the merged pstats file to PROFILE_DIR. Yields a dict that gets the
+    file's 'path' on exit.
+    """
+    profile = {}
+    profilers = []
+    token = _thread_profilers.set(profilers)
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield profile
+    finally:
+        profiler.disable()
+        _thread_profilers.reset(token)
+        stats = pstats.Stats(profiler)
+        for thread_profiler in profilers:
+            stats.add(thread_profiler)
+        folder = app.config['PROFILE_DIR']
+        os.makedirs(folder, exist_ok=True)
+        profile['path'] = os.path.join(folder, f"{time.strftime('%Y%m%d-%H%M%S')}_{tag}.prof")
+        stats.dump_stats(profile['path'])
+        prune_profiles(folder, app.config['PROFILE_MAX_FILES'])
+
+
+def request_id():
+    """This request's id: the caller's X-Request-ID if it is a safe token, otherwise a new one."""
+    if 'request_id' not in g:
+        supplied = request.headers.get('X-Request-ID', '')
+        g.request_id = supplied if re.fullmatch(r'[A-Za-z0-9._-]{1,64}', supplied) else uuid.uuid4().hex
+    return g.request_id
+
+
+def profiling_reason():
+    """'requested', 'sampled' or None: whether (and why) to profile this request."""
+    token = app.config['PROFILE_TOKEN']
+    supplied = request.headers.get('X-Profile') or request.args.get('profile')
+    if token and supplied and hmac.compare_digest(supplied.encode(), token.encode()):
+        return 'requested'
+    rate = app.config['PROFILE_SAMPLE_RATE']
+    if rate > 0 and random.random() < rate:
+        return 'sampled'
+    return None
+
+
+@contextmanager
+def request_profile():
+    """Profile the block if this request asked for it or was sampled; the file is named after the request id."""
+    reason = profiling_reason()
+    if reason is None:
+        yield
+        return
+    with profiled(f"{request_id()}_{reason}") as profile:
+        yield
+    g.profile_path = profile['path']
+
+
+# ============================================================================
+# OCR RESULT CACHE
+# ============================================================================
+
+OCR_CACHE_VERSION = '1'
+
+
+def image_digest(image_bytes):
+    """Content hash of an uploaded image, used to key cached OCR output."""
+    return hashlib.sha256(image_bytes).hexdigest()
+
+
+def file_digest(f):
+    """image_digest of the rest of a binary file object, read in chunks."""
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: f.read(1024 * 1024), b''):
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def source_digest(image_source):
+    """
+    The content hash load_image would give image_source, without decoding it.
+    None for a file-like object (hashing would consume it) or an unreadable path.
+    """
+    if isinstance(image_source, Image.Image):
+        return load_image(image_source)[1]
+    if isinstance(image_source, (bytes, bytearray, memoryview)):
+        return image_digest(image_source)
+    if not isinstance(image_source, str):
+        return None
+    try:
+        with open(image_source, 'rb') as f:
+            return file_digest(f)
+    except OSError:
+        return None
+
+
+def ocr_config_fingerprint():
+    """Everything besides the image bytes that changes what tesseract returns."""
+    return (f"v{OCR_CACHE_VERSION}|{TESSERACT_CONFIG}|{get_ocr_backend().name}|"
+            f"edge={app.config['IMAGE_MAX_EDGE']}|dpi={app.config['IMAGE_DPI']}")
+
+
+def ocr_cache_key(image_hash, strategy_name):
+    """Cache key for one strategy's OCR output on one image."""
+    raw = f"{image_hash}|{strategy_name}|{ocr_config_fingerprint()}"
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+class OCRCache:
+    """
+    Two-tier cache for OCR text.
     
-    # Apply volume-specific corrections
-    text_corr = apply_volume_corrections(extracted_text)
-    input_corr = apply_volume_corrections(input_value)
+    A bounded in-process LRU sits in front of a directory shared by every gunicorn
+    worker. Entries expire after `ttl` seconds; the disk tier is also trimmed
+    oldest-first once it grows past `max_disk_bytes`.
+    """
     
-    # Extract number from input
-    input_match = re.search(r'(\d+\.?\d*)', input_corr)
-    if not input_match:
-        return (False, 0, "Could not parse input volume")
-    input_num = input_match.group(1)
+    # Trim the disk tier after this many writes rather than on every one
+    PRUNE_EVERY = 50
     
-    # Find all volume patterns in corrected text
-    volume_patterns = [
-        r'(\d+\.?\d*)\s*fl\.?\s*oz',
-        r'(\d+\.?\d*)\s*floz',
-        r'(\d+\.?\d*)\s*ml',
-        r'(\d+\.?\d*)\s*l\b',
-        r'(\d+\.?\d*)\s*liter',
-        r'(\d+\.?\d*)\s*oz',
-        r'(\d+\.?\d*)\s*pint',
-    ]
+    def __init__(self, directory, max_entries=512, max_disk_bytes=200 * 1024 * 1024, ttl=7 * 24 * 3600):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.max_disk_bytes = max_disk_bytes
+        self.ttl = ttl
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._writes_since_prune = 0
+        self.stats = {
+            'memory_hits': 0,
+            'disk_hits': 0,
+            'misses': 0,
+            'writes': 0,
+            'memory_evictions': 0,
+            'disk_evictions': 0,
+            'expired': 0,
+        }
     
-    text_lower = text_corr.lower()
-    found_volumes = []
+    def _disk_path(self, key):
+        return os.path.join(self.directory, key[:2], f"{key}.txt")
     
-    for pattern in volume_patterns:
-        matches = re.findall(pattern, text_lower)
-        found_volumes.extend(matches)
+    def _count(self, stat):
+        with self._lock:
+            self.stats[stat] += 1
     
-    # Strict number matching
-    for found_num in found_volumes:
+    def get(self, key):
+        """Return cached text for key, or None on a miss."""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                stored_at, text = entry
+                if now - stored_at <= self.ttl:
+                    self._memory.move_to_end(key)
+                    self.stats['memory_hits'] += 1
+                    return text
+                del self._memory[key]
+                self.stats['expired'] += 1
+        
+        if self.directory:
+            path = self._disk_path(key)
+            try:
+                stored_at = os.path.getmtime(path)
+                if now - stored_at > self.ttl:
+                    os.remove(path)
+                    self._count('expired')
+                else:
+                    with open(path, 'r', encoding='utf-8') as f:
+                        text = f.read()
+                    self._remember(key, text, stored_at)
+                    self._count('disk_hits')
+                    return text
+            except OSError:
+                pass
+        
+        self._count('misses')
+        return None
+    
+    def set(self, key, text):
+        """Store text in both tiers."""
+        self._remember(key, text, time.time())
+        self._count('writes')
+        if not self.directory:
+            return
+        
+        path = self._disk_path(key)
         try:
-            if float(found_num) == float(input_num):
-                return (True, 100, f"Exact volume match: {found_num}")
-        except ValueError:
-            continue
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(text)
+            os.replace(tmp_path, path)
+        except OSError:
+            return
+        
+        with self._lock:
+            self._writes_since_prune += 1
+            should_prune = self._writes_since_prune >= self.PRUNE_EVERY
+            if should_prune:
+                self._writes_since_prune = 0
+        if should_prune:
+            self.prune_disk()
     
-    if found_volumes:
-        return (False, 0, f"No match - expected {input_num}, found: {', '.join(set(found_volumes))}")
-    return (False, 0, "No volume found in text")
+    def _remember(self, key, text, stored_at):
+        with self._lock:
+            self._memory[key] = (stored_at, text)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+                self.stats['memory_evictions'] += 1
+    
+    def prune_disk(self):
+        """Drop expired disk entries, then the oldest ones until under max_disk_bytes."""
+        if not self.directory:
+            return
+        now = time.time()
+        entries = []
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if not name.endswith('.txt'):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                if now - st.st_mtime > self.ttl:
+                    self._remove_disk_entry(path, 'expired')
+                else:
+                    entries.append((st.st_mtime, st.st_size, path))
+        
+        total = sum(size for _, size, _ in entries)
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_disk_bytes:
+                break
+            self._remove_disk_entry(path, 'disk_evictions')
+            total -= size
+    
+    def _remove_disk_entry(self, path, stat):
+        try:
+            os.remove(path)
+        except OSError:
+            # Another worker got there first
+            return
+        self._count(stat)
+    
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self.stats)
+            stats['memory_entries'] = len(self._memory)
+        lookups = stats['memory_hits'] + stats['disk_hits'] + stats['misses']
+        stats['hit_rate'] = round((stats['memory_hits'] + stats['disk_hits']) / lookups, 3) if lookups else 0.0
+        return stats
 
 
-def verify_alcohol_content(input_value, extracted_text):
-    """Strict alcohol content verification - numbers must match exactly."""
-    if not input_value:
-        return (True, 100, "Field not provided (optional)")
-    if not extracted_text:
-        return (False, 0, "No text extracted from image")
+ocr_cache = OCRCache(
+    app.config['OCR_CACHE_DIR'],
+    max_entries=app.config['OCR_CACHE_MEMORY_ENTRIES'],
+    max_disk_bytes=app.config['OCR_CACHE_DISK_MB'] * 1024 * 1024,
+    ttl=app.config['OCR_CACHE_TTL'],
+) if app.config['OCR_CACHE_ENABLED'] else None
+
+
+def perceptual_hash(image):
+    """
+    64-bit difference hash (dHash) of an image: shrink to 9x8 grayscale and set
+    a bit wherever a pixel is brighter than its right-hand neighbour. Re-scans
+    and re-exports of the same artwork land within a few bits of each other.
+    """
+    pixels = list(image.convert('L').resize((9, 8), Image.LANCZOS).getdata())
+    value = 0
+    for row in range(8):
+        for col in range(8):
+            value = (value << 1) | (pixels[row * 9 + col] > pixels[row * 9 + col + 1])
+    return value
+
+
+class PerceptualIndex:
+    """
+    OCR text of earlier images, found by perceptual hash, so a near-identical
+    image can reuse it instead of running tesseract.
     
-    # Apply alcohol-specific corrections
-    text_corr = apply_alcohol_corrections(extracted_text)
+    Entries live in SQLite, shared by every worker. Each 64-bit hash is also
+    stored as BANDS 8-bit bands in an indexed table: two hashes fewer than BANDS
+    bits apart must agree on at least one whole band, so candidates come from a
+    single indexed lookup and only those are compared bit by bit. `threshold`
+    is capped at BANDS - 1 to keep that guarantee.
     
-    # Extract number from input
-    input_match = re.search(r'(\d+\.?\d*)', input_value)
-    if not input_match:
-        return (False, 0, "Could not parse input alcohol content")
-    input_num = input_match.group(1)
+    Entries are kept per variant (quality tier, plain or layout text, OCR config),
+    since each produces different text for the same image.
+    """
     
-    # Find all alcohol percentage patterns in corrected text  
-    text_lower = text_corr.lower()
+    BANDS = 8
+    # Drop entries past `ttl` after this many writes rather than on every one
+    PRUNE_EVERY = 50
     
-    patterns = [
-        r'(\d+\.?\d*)\s*%\s*alc',
-        r'(\d+\.?\d*)\s*%\s*vol',
-        r'(\d+\.?\d*)\s*%\s*abv',
-        r'alc\.?/?vol\.?\s*(\d+\.?\d*)\s*%',
-        r'alc\.?\s*/?\s*(\d+\.?\d*)\s*%',
-        r'(\d+\.?\d*)\s*%\s*by\s*vol',
-        r'alcohol\s*:?\s*(\d+\.?\d*)\s*%',
-        r'(\d+\.?\d*)\s*%\s*alcohol',
-        r'(\d+\.?\d*)\s*alc/vol',
-        r'(\d+\.?\d*)\s*alc\s*/\s*vol',
-    ]
+    def __init__(self, threshold, ttl):
+        self.threshold = max(0, min(threshold, self.BANDS - 1))
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._writes_since_prune = 0
+        self.stats = {'hits': 0, 'misses': 0, 'writes': 0, 'errors': 0}
     
-    found_values = set()
-    for pattern in patterns:
-        matches = re.findall(pattern, text_lower)
-        found_values.update(matches)
+    def _band_keys(self, value):
+        return [band * 256 + ((value >> (band * 8)) & 0xFF) for band in range(self.BANDS)]
     
-    # Also look for standalone percentages near "alc" or "vol"
-    # Split text into segments and look for numbers near alcohol indicators
-    if not found_values:
-        # Find all percentages
-        all_percents = re.findall(r'(\d+\.?\d*)\s*%', text_lower)
-        # Check if "alc" or "vol" appears in text
-        if 'alc' in text_lower or 'vol' in text_lower:
-            found_values.update(all_percents)
+    def _count(self, stat):
+        with self._lock:
+            self.stats[stat] += 1
     
-    # Strict matching - number must match exactly
-    for match in found_values:
+    def find(self, value, variant):
+        """
+        The closest entry within threshold bits, as a dict with text, blocks,
+        image_hash and distance; or None. A database error counts as a miss.
+        """
+        keys = self._band_keys(value)
         try:
-            if float(match) == float(input_num):
-                return (True, 100, f"Exact match: {match}%")
-        except ValueError:
-            continue
+            rows = get_db().execute(
+                f"SELECT * FROM perceptual_index WHERE variant = ? AND created_at >= ? AND id IN "
+                f"(SELECT entry_id FROM perceptual_bands WHERE key IN ({','.join('?' * len(keys))}))",
+                [variant, time.time() - self.ttl] + keys
+            ).fetchall()
+        except sqlite3.Error:
+            self._count('errors')
+            rows = []
+        best, best_distance = None, None
+        for row in rows:
+            distance = (int(row['dhash'], 16) ^ value).bit_count()
+            if distance <= self.threshold and (best is None or distance < best_distance):
+                best, best_distance = row, distance
+        if best is None:
+            self._count('misses')
+            return None
+        self._count('hits')
+        return {
+            'text': best['text'],
+            'blocks': json.loads(best['blocks_json']) if best['blocks_json'] else None,
+            'image_hash': best['image_hash'],
+            'distance': best_distance,
+        }
     
-    if found_values:
-        return (False, 0, f"No match - expected {input_num}%, found: {', '.join(found_values)}%")
-    return (False, 0, "No alcohol percentage found in text")
+    def add(self, value, variant, image_hash, text, blocks=None):
+        """Index an image's OCR output. A database error skips the write."""
+        conn = get_db()
+        try:
+            with conn:
+                cursor = conn.execute(
+                    "INSERT OR IGNORE INTO perceptual_index (variant, image_hash, dhash, text, blocks_json, created_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (variant, image_hash, f"{value:016x}", text, json.dumps(blocks) if blocks is not None else None,
+                     time.time())
+                )
+                if cursor.rowcount != 1:
+                    return
+                conn.executemany("INSERT INTO perceptual_bands (key, entry_id) VALUES (?, ?)",
+                                 [(key, cursor.lastrowid) for key in self._band_keys(value)])
+        except sqlite3.Error:
+            self._count('errors')
+            return
+        
+        with self._lock:
+            self.stats['writes'] += 1
+            self._writes_since_prune += 1
+            should_prune = self._writes_since_prune >= self.PRUNE_EVERY
+            if should_prune:
+                self._writes_since_prune = 0
+        if should_prune:
+            self.prune()
+    
+    def prune(self):
+        expired_before = time.time() - self.ttl
+        conn = get_db()
+        try:
+            with conn:
+                conn.execute("DELETE FROM perceptual_bands WHERE entry_id IN "
+                             "(SELECT id FROM perceptual_index WHERE created_at < ?)", (expired_before,))
+                conn.execute("DELETE FROM perceptual_index WHERE created_at < ?", (expired_before,))
+        except sqlite3.Error:
+            # Expired entries are already ignored by find(); the next prune retries
+            self._count('errors')
+    
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self.stats)
+        stats['threshold'] = self.threshold
+        return stats
 
 
-def verify_producer_name(input_value, extracted_text, threshold=75):
-    """Verify producer/bottler name with brand corrections."""
-    if not input_value:
-        return (True, 100, "Field not provided (optional)")
-    if not extracted_text:
-        return (False, 0, "No text extracted from image")
+def perceptual_variant(tier, layout):
+    """Which OCR output an index entry holds; entries only match within a variant."""
+    raw = f"{tier}|{'layout' if layout else 'text'}|{ocr_config_fingerprint()}"
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+perceptual_index = PerceptualIndex(
+    app.config['PERCEPTUAL_THRESHOLD'],
+    app.config['PERCEPTUAL_INDEX_TTL'],
+) if app.config['PERCEPTUAL_INDEX_ENABLED'] else None
+
+
+# ============================================================================
+# OCR BACKENDS
+# ============================================================================
+
+class OCRBackend:
+    """
+    One way of running tesseract. Subclasses implement _image_to_string and
+    _image_to_data; callers use image_to_string / image_to_data, which also
+    record per-call latency for /api/stats.
+    """
     
-    input_norm = normalize_text(input_value)
-    text_norm = normalize_text(extracted_text)
+    name = None
+    LATENCY_SAMPLES = 1000
     
-    # Apply brand corrections (producers often share naming patterns with brands)
-    input_corr = apply_brand_corrections(input_norm)
-    text_corr = apply_brand_corrections(text_norm)
+    def __init__(self):
+        self._stats_lock = threading.Lock()
+        self._latencies = deque(maxlen=self.LATENCY_SAMPLES)
+        self.calls = 0
+        self.total_seconds = 0.0
     
-    # Exact match
-    if input_corr in text_corr:
-        return (True, 100, "Exact match found")
+    def _record(self, seconds):
+        with self._stats_lock:
+            self.calls += 1
+            self.total_seconds += seconds
+            self._latencies.append(seconds)
     
-    # Word matching
-    input_words = [w for w in input_corr.split() if len(w) > 2]
-    if input_words:
-        word_score = word_match_score(input_words, text_corr)
-        if word_score >= 100:
-            return (True, 100, "All producer words found")
-        if word_score >= threshold:
-            return (True, word_score, f"Producer match ({word_score}% words found)")
+    def image_to_string(self, image, config):
+        start = time.perf_counter()
+        try:
+            return self._image_to_string(image, config)
+        finally:
+            self._record(time.perf_counter() - start)
     
-    # Fuzzy matching
-    partial_score = fuzzy_partial_ratio(input_corr, text_corr)
-    if partial_score >= threshold:
-        return (True, partial_score, f"Fuzzy match ({partial_score}% similarity)")
+    def image_to_data(self, image, config):
+        """Word boxes in pytesseract's Output.DICT layout."""
+        start = time.perf_counter()
+        try:
+            return self._image_to_data(image, config)
+        finally:
+            self._record(time.perf_counter() - start)
     
-    return (False, partial_score, f"Producer not found ({partial_score}% similarity)")
+    def preload(self):
+        """Do any expensive setup now instead of on the first request."""
+    
+    def get_stats(self):
+        with self._stats_lock:
+            latencies = sorted(self._latencies)
+            calls, total = self.calls, self.total_seconds
+        
+        def percentile(fraction):
+            if not latencies:
+                return None
+            return round(latencies[min(len(latencies) - 1, int(fraction * len(latencies)))] * 1000, 1)
+        
+        return {
+            'backend': self.name,
+            'calls': calls,
+            'mean_ms': round(total / calls * 1000, 1) if calls else None,
+            'p50_ms': percentile(0.5),
+            'p95_ms': percentile(0.95),
+        }
 
 
-def verify_location(input_value, extracted_text, field_name, threshold=70):
-    """Verify city or country with basic matching."""
-    if not input_value:
-        return (True, 100, "Optional field not provided")
-    if not extracted_text:
-        return (False, 0, "No text extracted from image")
-    
-    input_norm = normalize_text(input_value)
-    text_norm = normalize_text(extracted_text)
+class PytesseractBackend(OCRBackend):
+    """A tesseract subprocess per call, which reloads the language model every time."""
     
-    # Exact match
-    if input_norm in text_norm:
-        return (True, 100, "Exact match found")
+    name = 'pytesseract'
     
-    # Fuzzy match
-    partial_score = fuzzy_partial_ratio(input_norm, text_norm)
-    if partial_score >= threshold:
-        return (True, partial_score, f"Match found ({partial_score}% similarity)")
+    def _image_to_string(self, image, config):
+        return pytesseract.image_to_string(image, config=config)
     
-    return (False, partial_score, f"{field_name.title()} not found ({partial_score}% similarity)")
+    def _image_to_data(self, image, config):
+        return pytesseract.image_to_data(image, config=config, output_type=pytesseract.Output.DICT)
 
 
-def verify_government_warning(extracted_text, threshold=66):
+def parse_tesseract_config(config):
+    """The --oem, --psm and --dpi values of a tesseract command line (None when absent)."""
+    values = {}
+    for option in ('oem', 'psm', 'dpi'):
+        match = re.search(rf'--{option}\s+(\d+)', config)
+        values[option] = int(match.group(1)) if match else None
+    return values
+
+
+class TesserocrBackend(OCRBackend):
     """
-    Government warning verification using keyword detection.
-    
-    Labels sometimes have OCR issues like (2) appearing twice instead of (1)/(2),
-    or missing punctuation. We verify based on required keywords.
+    Resident tesseract engines via tesserocr's API handles. The language model
+    is loaded once per handle; handles are created on demand (one per
+    concurrent pass, so at most OCR_PARALLELISM) and reused across requests.
     """
-    if not extracted_text:
-        return (False, 0, "No text extracted from image")
     
-    # Normalize: lowercase, collapse whitespace, remove most punctuation
-    text = extracted_text.lower()
-    text = re.sub(r'\s+', ' ', text)
+    name = 'tesserocr'
     
-    # Strip non-alphanumeric except spaces
-    text_clean = re.sub(r'[^a-z0-9\s]', '', text)
-    text_clean = re.sub(r'\s+', ' ', text_clean)
-    
-    # Required keywords/phrases that must appear
-    required_keywords = [
-        'government warning',
-        'surgeon general', 
-        'women',
-        'drink',
-        'alcoholic beverages',
-        'pregnancy',
-        'birth defect',
-        'consumption',
-        'impair',
-        'ability',
-        'drive',
-        'machinery',
-        'health problem',
-    ]
+    def __init__(self, lang='eng'):
+        super().__init__()
+        if tesserocr is None:
+            raise RuntimeError('tesserocr is not installed')
+        self.lang = lang
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
     
-    # Alternative spellings/OCR variants
-    keyword_variants = {
-        'government warning': ['covernment warning', 'qovernment warning', 'govemment warning', 'governmentwarning'],
-        'surgeon general': ['surgeqn general', 'surgeongeneral', 'surgeon qeneral', 'surgeongenera', 'surgeon genera'],
-        'women': ['wornen', 'wom3n', 'wamen'],
-        'drink': ['drlnk', 'dr1nk', 'drnk'],
-        'alcoholic beverages': ['alcoholic beverag', 'alcoholicbeverages', 'aleoholic beverages'],
-        'pregnancy': ['pregnan', 'preg nan', 'prenant', 'pregnacy'],
-        'birth defect': ['blrth defect', 'birth defecl', 'birthdefect', 'birth detect'],
-        'consumption': ['consumpt1on', 'consumpti0n', 'consumpton'],
-        'impair': ['lmpair', '1mpair', 'impalr'],
-        'ability': ['ab1lity', 'abiiity', 'abilty'],
-        'drive': ['dr1ve', 'drlve', 'driv3'],
-        'machinery': ['machlnery', 'mach1nery', 'machin', 'machnery'],
-        'health problem': ['health prob', 'hea1th problem', 'healthproblem', 'health problems'],
-    }
+    def _new_handle(self):
+        oem = parse_tesseract_config(TESSERACT_CONFIG)['oem']
+        if oem is None:
+            return tesserocr.PyTessBaseAPI(lang=self.lang)
+        return tesserocr.PyTessBaseAPI(lang=self.lang, oem=tesserocr.OEM(oem))
     
-    found_keywords = []
-    missing_keywords = []
+    def _acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            self._created += 1
+        try:
+            return self._new_handle()
+        except Exception:
+            with self._lock:
+                self._created -= 1
+            raise
     
-    for keyword in required_keywords:
-        # Check primary keyword
-        if keyword.replace(' ', '') in text_clean.replace(' ', ''):
-            found_keywords.append(keyword)
-            continue
-        if keyword in text_clean:
-            found_keywords.append(keyword)
-            continue
-        
-        # Check variants
-        variants = keyword_variants.get(keyword, [])
-        variant_found = False
-        for variant in variants:
-            if variant.replace(' ', '') in text_clean.replace(' ', ''):
-                found_keywords.append(keyword)
-                variant_found = True
-                break
-        
-        if not variant_found:
-            missing_keywords.append(keyword)
+    def _release(self, handle):
+        handle.Clear()
+        self._idle.put(handle)
     
-    # Calculate score
-    score = int((len(found_keywords) / len(required_keywords)) * 100)
+    def _run(self, image, config, read):
+        options = parse_tesseract_config(config)
+        if image.mode == '1':
+            image = image.convert('L')
+        handle = self._acquire()
+        try:
+            handle.SetPageSegMode(tesserocr.PSM(options['psm'] if options['psm'] is not None else 3))
+            handle.SetImage(image)
+            if options['dpi']:
+                handle.SetSourceResolution(options['dpi'])
+            return read(handle)
+        finally:
+            self._release(handle)
     
-    # Pass criteria: must have header + at least threshold% of keywords
-    has_header = 'government warning' in found_keywords
+    def _image_to_string(self, image, config):
+        return self._run(image, config, lambda handle: handle.GetUTF8Text())
     
-    if has_header and score >= threshold:
-        return (True, score, f"Government warning verified ({len(found_keywords)}/{len(required_keywords)} keywords)")
-    elif not has_header:
-        return (False, score, "GOVERNMENT WARNING header not found")
-    else:
-        return (False, score, f"Warning incomplete ({score}% - missing: {', '.join(missing_keywords[:3])}...)")
+    def _image_to_data(self, image, config):
+        header = 'level\tpage_num\tblock_num\tpar_num\tline_num\tword_num\tleft\ttop\twidth\theight\tconf\ttext\n'
+        tsv = self._run(image, config, lambda handle: handle.GetTSVText(0))
+        return pytesseract.pytesseract.file_to_dict(header + tsv, '\t', -1)
+    
+    def preload(self):
+        if self._idle.empty():
+            self._release(self._acquire())
+    
+    def get_stats(self):
+        stats = super().get_stats()
+        stats['handles'] = self._created
+        return stats
 
 
-def verify_label(image_path, label_data):
-    """Verify all label fields against extracted text."""
-    start_time = time.time()
+OCR_BACKENDS = {
+    'pytesseract': PytesseractBackend,
+    'tesserocr': TesserocrBackend,
+}
+
+_ocr_backend = None
+_ocr_backend_lock = threading.Lock()
+
+
+def create_ocr_backend(name):
+    """Backend for an OCR_BACKEND value; 'auto' falls back to pytesseract if tesserocr can't start."""
+    if name != 'auto':
+        return OCR_BACKENDS[name]()
+    if tesserocr is not None:
+        try:
+            backend = TesserocrBackend()
+            backend.preload()
+            return backend
+        except Exception:
+            pass
+    return PytesseractBackend()
+
+
+def get_ocr_backend():
+    """This process's OCR backend, created on first use (after gunicorn forks)."""
+    global _ocr_backend
+    with _ocr_backend_lock:
+        if _ocr_backend is None:
+            _ocr_backend = create_ocr_backend(app.config['OCR_BACKEND'])
+        return _ocr_backend
+
+
+def preload_ocr_backend():
+    """Create the backend and load the language model before the first request."""
+    get_ocr_backend().preload()
+
+
+class OCRGovernor:
+    """
+    Host-wide cap on concurrent tesseract passes, shared by every gunicorn
+    worker and batch process.
     
-    extracted_text = extract_text_from_image(image_path)
+    Each slot is a lock file held with flock for the length of a pass, so the
+    kernel frees the slots of a process that dies. Waiters queue on a separate
+    lock file and only the one at the front polls the slots, so passes start
+    roughly in arrival order.
     
-    if not extracted_text:
-        return {
-            'success': False,
-            'error': 'Unable to extract text from image',
-            'extracted_text': None,
-            'fields': {},
-            'overall_pass': False,
-            'processing_time': time.time() - start_time
-        }
+    The recent wait for a slot is a moving average kept in a file beside the
+    slots, so every process sees the host's value. It is updated by the waiter
+    at the front of the queue and decays with the time since the last wait,
+    so an idle host reads as unloaded.
+    """
     
-    results = {
-        'success': True,
-        'extracted_text': extracted_text,
-        'fields': {},
-        'overall_pass': True
-    }
+    POLL_INTERVAL = 0.005
+    MAX_POLL_INTERVAL = 0.05
+    RECENT_WAIT_WEIGHT = 0.2
+    # Seconds for the recent wait to decay by a factor of e with no passes
+    RECENT_WAIT_DECAY = 10.0
     
-    # Brand name
-    passed, score, details = verify_brand_name(
-        label_data.get('brand_name', ''), extracted_text
-    )
-    results['fields']['brand_name'] = {
-        'input': label_data.get('brand_name', ''),
-        'passed': passed,
-        'score': score,
-        'details': details,
-        'optional': False
-    }
-    if not passed:
-        results['overall_pass'] = False
+    def __init__(self, directory, slots):
+        self.directory = directory
+        self.slots = slots
+        self._stats_lock = threading.Lock()
+        self.waits = 0
+        self.wait_seconds = 0.0
+        self.max_wait = 0.0
     
-    # Class/Type
-    passed, score, details = verify_class_type(
-        label_data.get('class_type', ''), extracted_text
-    )
-    results['fields']['class_type'] = {
-        'input': label_data.get('class_type', ''),
-        'passed': passed,
-        'score': score,
-        'details': details,
-        'optional': False
-    }
-    if not passed:
-        results['overall_pass'] = False
+    def _open(self, name):
+        return os.open(os.path.join(self.directory, name), os.O_RDWR | os.O_CREAT, 0o644)
     
-    # Net Contents
-    passed, score, details = verify_net_contents(
-        label_data.get('net_contents', ''), extracted_text
-    )
-    results['fields']['net_contents'] = {
-        'input': label_data.get('net_contents', ''),
-        'passed': passed,
-        'score': score,
-        'details': details,
-        'optional': False
-    }
-    if not passed:
-        results['overall_pass'] = False
+    def _acquire(self, start):
+        """Block until a slot is free; returns the descriptor holding it."""
+        queue_fd = self._open('queue.lock')
+        try:
+            fcntl.flock(queue_fd, fcntl.LOCK_EX)
+            delay = self.POLL_INTERVAL
+            while True:
+                for slot in range(self.slots):
+                    fd = self._open(f'slot-{slot}.lock')
+                    try:
+                        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    except BlockingIOError:
+                        os.close(fd)
+                        continue
+                    # Still holding queue.lock, so no other process updates it meanwhile
+                    self._update_recent_wait(time.perf_counter() - start)
+                    return fd
+                time.sleep(delay)
+                delay = min(delay * 2, self.MAX_POLL_INTERVAL)
+        finally:
+            os.close(queue_fd)
     
-    # Producer Name
-    passed, score, details = verify_producer_name(
-        label_data.get('producer_name', ''), extracted_text
-    )
-    results['fields']['producer_name'] = {
-        'input': label_data.get('producer_name', ''),
-        'passed': passed,
-        'score': score,
-        'details': details,
-        'optional': False
-    }
-    if not passed:
-        results['overall_pass'] = False
+    def _read_recent_wait(self):
+        """(average, time of last update) from the shared file; (0.0, 0.0) if unset."""
+        try:
+            with open(os.path.join(self.directory, 'recent_wait'), 'r') as f:
+                average, updated = f.read().split()
+            return float(average), float(updated)
+        except (OSError, ValueError):
+            return 0.0, 0.0
+    
+    def _decayed(self, average, updated, now):
+        return average * math.exp(-max(0.0, now - updated) / self.RECENT_WAIT_DECAY)
+    
+    def _update_recent_wait(self, waited):
+        now = time.time()
+        average = self._decayed(*self._read_recent_wait(), now)
+        average += self.RECENT_WAIT_WEIGHT * (waited - average)
+        path = os.path.join(self.directory, 'recent_wait')
+        try:
+            with open(f"{path}.{os.getpid()}.tmp", 'w') as f:
+                f.write(f"{average:.6f} {now:.3f}")
+            os.replace(f"{path}.{os.getpid()}.tmp", path)
+        except OSError:
+            pass
+    
+    @property
+    def recent_wait(self):
+        """Host-wide moving average of the wait for a slot, in seconds, decayed to now."""
+        if self.slots <= 0:
+            return 0.0
+        return self._decayed(*self._read_recent_wait(), time.time())
+    
+    @contextmanager
+    def slot(self):
+        """Hold one slot for the block; the wait is recorded as the ocr_wait stage."""
+        if self.slots <= 0:
+            yield
+            return
+        start = time.perf_counter()
+        with timed_stage('ocr_wait'):
+            fd = self._acquire(start)
+        waited = time.perf_counter() - start
+        with self._stats_lock:
+            self.waits += 1
+            self.wait_seconds += waited
+            self.max_wait = max(self.max_wait, waited)
+        try:
+            yield
+        finally:
+            # Closing the descriptor releases the flock
+            os.close(fd)
+    
+    def get_stats(self):
+        recent_wait = self.recent_wait
+        with self._stats_lock:
+            return {
+                'slots': self.slots,
+                'thread_limit': int(os.environ['OMP_THREAD_LIMIT']),
+                'passes': self.waits,
+                'mean_wait_ms': round(self.wait_seconds / self.waits * 1000, 1) if self.waits else None,
+                'max_wait_ms': round(self.max_wait * 1000, 1),
+                'recent_wait_ms': round(recent_wait * 1000, 1),
+            }
+
+
+ocr_governor = OCRGovernor(app.config['OCR_SLOT_DIR'], app.config['OCR_SLOTS'])
+
+
+@contextmanager
+def tesseract_pass(name):
+    """Wait for an OCR slot, then time the block as stage tesseract:<name>."""
+    with ocr_governor.slot():
+        with timed_stage(f'tesseract:{name}'):
+            yield
+
+
+# ============================================================================
+# OCR EXTRACTION
+# ============================================================================
+
+TESSERACT_CONFIG = '--oem 3 --psm 3'
+
+
+def grayscale(image):
+    """The image in mode 'L'; normalized images already are, so no copy is made."""
+    return image if image.mode == 'L' else image.convert('L')
+
+
+def preprocess_contrast(image):
+    """Strategy 1: Basic grayscale + moderate contrast (good general purpose)."""
+    img = grayscale(image)
+    return ImageEnhance.Contrast(img).enhance(1.5)
+
+
+def preprocess_high_contrast(image):
+    """Strategy 2: High contrast (captures faint text better)."""
+    img = grayscale(image)
+    return ImageEnhance.Contrast(img).enhance(2.0)
+
+
+def preprocess_sharpen(image):
+    """Strategy 3: Sharpen + contrast (captures stylized/script fonts better)."""
+    img = grayscale(image)
+    img = img.filter(ImageFilter.SHARPEN)
+    return ImageEnhance.Contrast(img).enhance(1.5)
+
+
+def preprocess_binarize(image):
+    """Strategy 4: Threshold/binarize (clean separation for printed text)."""
+    img = grayscale(image)
+    return img.point(lambda x: 0 if x < 128 else 255, '1')
+
+
+# Preprocessing strategies in the order their text is combined.
+# Different preprocessing works better for different parts of labels (light text, dark text, etc.)
+OCR_STRATEGIES = [
+    ('contrast', preprocess_contrast),
+    ('high_contrast', preprocess_high_contrast),
+    ('sharpen', preprocess_sharpen),
+    ('binarize', preprocess_binarize),
+]
+
+# Quality tiers, best first: the strategies each one runs and the long edge images
+# are downscaled to (None: IMAGE_MAX_EDGE)
+QUALITY_TIERS = {
+    'full': {'strategies': ('contrast', 'high_contrast', 'sharpen', 'binarize'), 'max_edge': None},
+    'fast': {'strategies': ('contrast', 'binarize'), 'max_edge': None},
+    'draft': {'strategies': ('contrast',), 'max_edge': app.config['QUALITY_DRAFT_MAX_EDGE']},
+}
+QUALITY_CHOICES = tuple(QUALITY_TIERS) + ('auto',)
+
+
+def quality_strategies(tier):
+    """The OCR_STRATEGIES a quality tier runs, in their usual order."""
+    names = QUALITY_TIERS[tier]['strategies']
+    return [strategy for strategy in OCR_STRATEGIES if strategy[0] in names]
+
+
+class QualityController:
+    """
+    Picks a quality tier per request from the current load: the share of
+    admission units in flight across all workers (queue depth) and the recent
+    wait for an OCR slot (latency). Crossing either signal's 'fast' threshold
+    drops to the two-strategy tier; crossing its 'draft' threshold drops to a
+    single downscaled pass.
+    
+    Both signals are read from shared files, so each process samples them at
+    most once per SAMPLE_INTERVAL rather than on every label.
+    """
+    
+    SAMPLE_INTERVAL = 0.5
+    
+    def __init__(self):
+        self._sample = None
+        self._sampled_at = 0.0
+        self._lock = threading.Lock()
+    
+    def load(self):
+        if admission.max_units <= 0:
+            return 0.0
+        return sum(admission.in_flight().values()) / admission.max_units
+    
+    def signals(self):
+        """(queue depth, recent OCR-slot wait), at most SAMPLE_INTERVAL seconds old."""
+        with self._lock:
+            now = time.monotonic()
+            if self._sample is None or now - self._sampled_at >= self.SAMPLE_INTERVAL:
+                self._sample = (self.load(), ocr_governor.recent_wait)
+                self._sampled_at = now
+            return self._sample
+    
+    def choose(self):
+        """(tier, reason): reason is 'queue_depth' or 'latency' when load lowered the tier, else 'idle'."""
+        load, wait = self.signals()
+        for tier in ('draft', 'fast'):
+            if load >= app.config[f'QUALITY_{tier.upper()}_LOAD']:
+                return tier, 'queue_depth'
+            if wait >= app.config[f'QUALITY_{tier.upper()}_WAIT']:
+                return tier, 'latency'
+        return 'full', 'idle'
+
+
+quality_controller = QualityController()
+
+
+def resolve_quality(quality=None):
+    """
+    (tier, reason) for a requested quality: a tier name is used as given
+    ('pinned'); 'auto' asks the controller. None means the QUALITY setting.
+    """
+    if quality is None:
+        quality = app.config['QUALITY']
+    if quality in QUALITY_TIERS:
+        return quality, 'pinned'
+    return quality_controller.choose()
+
+
+def load_for_ocr(image_source, tier='full'):
+    """
+    load_image + normalize_image at a quality tier's resolution. Returns the
+    image, its OCR cache hash and the normalize_image summary.
+    """
+    max_edge = QUALITY_TIERS[tier]['max_edge']
+    image, image_hash = load_image(image_source)
+    image, image_info = normalize_image(image, max_edge=max_edge)
+    image_info['sha256'] = image_hash
+    if max_edge is not None:
+        # Cache keys assume IMAGE_MAX_EDGE, so a tier's own edge gets its own entries
+        image_hash = image_digest(f"{image_hash}|edge={max_edge}".encode('utf-8'))
+    return image, image_hash, image_info
+
+
+_ocr_executor = None
+_ocr_executor_lock = threading.Lock()
+
+
+def get_ocr_executor():
+    """Return this process's shared OCR thread pool, creating it on first use.
+
+    Created lazily so each gunicorn worker gets its own pool after forking.
+    Threads are enough here: each pass spends its time in a tesseract subprocess.
+    """
+    global _ocr_executor
+    with _ocr_executor_lock:
+        if _ocr_executor is None:
+            _ocr_executor = ThreadPoolExecutor(
+                max_workers=app.config['OCR_PARALLELISM'],
+                thread_name_prefix='ocr'
+            )
+        return _ocr_executor
+
+
+def tesseract_config(image, psm=None):
+    """
+    TESSERACT_CONFIG plus the resolution normalize_image recorded for the image,
+    if any. psm overrides the page segmentation mode.
+    """
+    config = TESSERACT_CONFIG
+    if psm is not None:
+        config = re.sub(r'--psm \d+', f'--psm {psm}', config)
+    dpi = image.info.get('dpi')
+    if dpi:
+        return f"{config} --dpi {int(round(dpi[0]))}"
+    return config
+
+
+def run_ocr_strategy(image, strategy, image_hash=None):
+    """
+    Preprocess an image with one strategy and OCR it.
+    When image_hash is given the result is served from / stored in the OCR cache.
+    """
+    name, preprocess = strategy
+    key = None
+    if ocr_cache is not None and image_hash:
+        key = ocr_cache_key(image_hash, name)
+        cached = ocr_cache.get(key)
+        if cached is not None:
+            return cached
+    
+    with timed_stage(f'preprocess:{name}'):
+        processed = preprocess(image)
+    with tesseract_pass(name):
+        text = get_ocr_backend().image_to_string(processed, tesseract_config(image))
+    if key is not None:
+        ocr_cache.set(key, text)
+    return text
+
+
+def ocr_strategies(image, strategies=None, parallelism=None, image_hash=None):
+    """
+    OCR an image with each strategy and return the texts in strategy order.
+    With parallelism > 1 the passes run concurrently on the shared OCR pool,
+    which is sized by OCR_PARALLELISM.
+    """
+    if strategies is None:
+        strategies = OCR_STRATEGIES
+    if parallelism is None:
+        parallelism = app.config['OCR_PARALLELISM']
+
+    # Force the lazy decode now so worker threads don't race to load the file
+    image.load()
+
+    if parallelism <= 1 or len(strategies) <= 1:
+        return [run_ocr_strategy(image, strategy, image_hash) for strategy in strategies]
+
+    executor = get_ocr_executor()
+    futures = [submit_in_context(executor, run_ocr_strategy, image, strategy, image_hash) for strategy in strategies]
+    return [future.result() for future in futures]
+
+
+def load_image(image_source):
+    """
+    Open an image from a file path, encoded bytes, a binary file-like object or
+    a PIL image. Returns the (lazily decoded) image and a content hash for the
+    OCR cache: of the encoded bytes, or of the pixels for a PIL image.
+    
+    Paths and seekable file objects are hashed in chunks and decoded from the
+    file itself, so an upload spilled to disk is never read into memory whole.
+    """
+    if isinstance(image_source, Image.Image):
+        pixels = image_source.tobytes()
+        header = f"{image_source.mode}|{image_source.size}|".encode('utf-8')
+        return image_source, image_digest(header + pixels)
+    if isinstance(image_source, (bytes, bytearray, memoryview)):
+        image_bytes = bytes(image_source)
+        return Image.open(io.BytesIO(image_bytes)), image_digest(image_bytes)
+    if hasattr(image_source, 'read'):
+        if not (hasattr(image_source, 'seekable') and image_source.seekable()):
+            image_bytes = image_source.read()
+            return Image.open(io.BytesIO(image_bytes)), image_digest(image_bytes)
+        start = image_source.tell()
+        digest = file_digest(image_source)
+        image_source.seek(start)
+        return Image.open(image_source), digest
+    with open(image_source, 'rb') as f:
+        digest = file_digest(f)
+    return Image.open(image_source), digest
+
+
+def normalize_image(image, max_edge=None, dpi=None):
+    """
+    Shared preprocessing run once before the OCR strategies: downscale so the
+    long edge is at most max_edge and convert to grayscale.
+    
+    Must be given a freshly opened (not yet loaded) image. JPEGs are decoded
+    with Pillow's draft mode, which lets libjpeg decode straight to grayscale at
+    1/2, 1/4 or 1/8 scale, so a 12MP phone photo is never fully decoded; a
+    final resize brings any format down to max_edge. The resolution handed to
+    tesseract is the file's DPI scaled with the image, or `dpi` when set.
+    Returns the processed image and a summary of what was done.
+    """
+    if max_edge is None:
+        max_edge = app.config['IMAGE_MAX_EDGE']
+    if dpi is None:
+        dpi = app.config['IMAGE_DPI']
+    
+    original_size = image.size
+    source_dpi = image.info.get('dpi')
+    scale = 1.0
+    if max_edge and max(original_size) > max_edge:
+        scale = max_edge / max(original_size)
+    target_size = (max(1, round(original_size[0] * scale)), max(1, round(original_size[1] * scale)))
+    
+    if image.format == 'JPEG':
+        # Picks the smallest DCT scale that still covers target_size
+        image.draft('L', target_size)
+    decoded_size = image.size
+    
+    image = grayscale(image)
+    if image.size != target_size:
+        image = image.resize(target_size, Image.LANCZOS)
+    
+    if dpi:
+        image.info['dpi'] = (dpi, dpi)
+    elif source_dpi and source_dpi[0]:
+        image.info['dpi'] = (source_dpi[0] * scale, source_dpi[1] * scale)
+    else:
+        image.info.pop('dpi', None)
+    image.load()
+    
+    return image, {
+        'original_size': list(original_size),
+        'processed_size': list(image.size),
+        'scale': round(scale, 4),
+        'decoded_size': list(decoded_size),
+        'dpi': round(image.info['dpi'][0]) if image.info.get('dpi') else None,
+    }
+
+
+def combine_texts(texts):
+    """Combine per-strategy OCR output into one whitespace-normalized string."""
+    combined = " ".join(texts)
+    return " ".join(combined.split())
+
+
+def extract_text_from_image(image_source, parallelism=None, quality=None):
+    """
+    Multi-strategy OCR extraction from anything load_image accepts.
+    Uses multiple preprocessing approaches and combines results to maximize text capture.
+    Strategies run concurrently when OCR_PARALLELISM > 1; output is always joined in strategy order.
+    quality picks the tier (see resolve_quality); lower tiers run fewer strategies.
+    """
+    tier, _ = resolve_quality(quality)
+    try:
+        image, image_hash, _ = load_for_ocr(image_source, tier)
+        return combine_texts(ocr_strategies(image, quality_strategies(tier), parallelism=parallelism,
+                                            image_hash=image_hash))
+    except Exception as e:
+        return ""
+
+
+# ----------------------------------------------------------------------------
+# Layout mode: find text blocks once, then OCR each block with a matching PSM
+# ----------------------------------------------------------------------------
+
+# Blocks with at least this many lines are paragraphs (the government warning)
+# and are read as a uniform block; shorter ones (brand, ABV, volume lines) are
+# read as sparse text
+LAYOUT_PARAGRAPH_LINES = 3
+LAYOUT_PARAGRAPH_PSM = 6
+LAYOUT_SPARSE_PSM = 11
+LAYOUT_BLOCK_PADDING = 8
+
+
+def detect_text_blocks(image):
+    """
+    One tesseract layout pass on a downscaled copy of the image.
+    Returns the text blocks in reading order as dicts with a bounding box in
+    the image's own coordinates, the number of lines and the words found.
+    Blocks without any recognized words (artwork, photos) are dropped.
+    """
+    max_edge = app.config['LAYOUT_DETECT_EDGE']
+    scale = 1.0
+    small = image
+    if max_edge and max(image.size) > max_edge:
+        scale = max_edge / max(image.size)
+        small = image.resize((max(1, round(image.width * scale)), max(1, round(image.height * scale))), Image.LANCZOS)
+        if image.info.get('dpi'):
+            small.info['dpi'] = tuple(d * scale for d in image.info['dpi'])
+    
+    data = get_ocr_backend().image_to_data(preprocess_contrast(small), tesseract_config(small))
+    blocks = {}
+    for i, word in enumerate(data['text']):
+        if not word.strip():
+            continue
+        left, top = data['left'][i], data['top'][i]
+        right, bottom = left + data['width'][i], top + data['height'][i]
+        block = blocks.setdefault(data['block_num'][i], {'box': [left, top, right, bottom], 'lines': set(), 'words': []})
+        box = block['box']
+        block['box'] = [min(box[0], left), min(box[1], top), max(box[2], right), max(box[3], bottom)]
+        block['lines'].add((data['par_num'][i], data['line_num'][i]))
+        block['words'].append(word)
+    
+    detected = []
+    for number in sorted(blocks):
+        block = blocks[number]
+        left, top, right, bottom = (int(round(v / scale)) for v in block['box'])
+        detected.append({
+            'bbox': [max(0, left - LAYOUT_BLOCK_PADDING), max(0, top - LAYOUT_BLOCK_PADDING),
+                     min(image.width, right + LAYOUT_BLOCK_PADDING), min(image.height, bottom + LAYOUT_BLOCK_PADDING)],
+            'lines': len(block['lines']),
+            'detected_text': " ".join(block['words']),
+        })
+    return detected
+
+
+def ocr_text_block(image, block):
+    """OCR one detected block at full resolution with a PSM suited to its shape."""
+    psm = LAYOUT_PARAGRAPH_PSM if block['lines'] >= LAYOUT_PARAGRAPH_LINES else LAYOUT_SPARSE_PSM
+    region = image.crop(tuple(block['bbox']))
+    with tesseract_pass('layout_block'):
+        text = get_ocr_backend().image_to_string(preprocess_contrast(region), tesseract_config(image, psm))
+    return {
+        'bbox': block['bbox'],
+        'lines': block['lines'],
+        'psm': psm,
+        'text': " ".join(text.split()) or block['detected_text'],
+    }
+
+
+def run_layout_ocr(image, image_hash=None, parallelism=None):
+    """
+    Layout mode OCR: detect blocks once, then OCR the blocks concurrently on the
+    shared OCR pool. Returns the combined text (blocks in reading order) and the
+    per-block results. Served from / stored in the OCR cache like a strategy.
+    """
+    if parallelism is None:
+        parallelism = app.config['OCR_PARALLELISM']
+    
+    key = None
+    if ocr_cache is not None and image_hash:
+        key = ocr_cache_key(image_hash, f"layout|{app.config['LAYOUT_DETECT_EDGE']}")
+        cached = ocr_cache.get(key)
+        if cached is not None:
+            blocks = json.loads(cached)
+            return combine_texts(block['text'] for block in blocks), blocks
+    
+    image.load()
+    with tesseract_pass('layout_detect'):
+        detected = detect_text_blocks(image)
+    if parallelism <= 1 or len(detected) <= 1:
+        blocks = [ocr_text_block(image, block) for block in detected]
+    else:
+        executor = get_ocr_executor()
+        futures = [submit_in_context(executor, ocr_text_block, image, block) for block in detected]
+        blocks = [future.result() for future in futures]
+    
+    if key is not None:
+        ocr_cache.set(key, json.dumps(blocks))
+    return combine_texts(block['text'] for block in blocks), blocks
+
+
+# ============================================================================
+# VERIFICATION FUNCTIONS
+# ============================================================================
+
+def allowed_file(filename):
+    """Check if file extension is allowed."""
+    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+
+
+def normalize_text(text):
+    """Normalize text for comparison."""
+    if not text:
+        return ""
+    text = re.sub(r'\s+', ' ', text)
+    return text.lower().strip()
+
+
+class LabelText:
+    """
+    One label's extracted text plus the derived forms the verifiers need.
+    
+    Each form is computed the first time a verifier asks for it and reused by
+    the rest, so every normalization/correction pass runs at most once per label.
+    The verify_* functions accept either a LabelText or a plain string.
+    In layout mode it also carries the per-block OCR results, so verifiers can
+    require what they look for to sit within one block or region.
+    """
+    
+    def __init__(self, raw, blocks=None):
+        self.raw = raw or ""
+        self.blocks = blocks or []
+    
+    def __bool__(self):
+        return bool(self.raw)
+    
+    def __str__(self):
+        return self.raw
+    
+    @cached_property
+    def normalized(self):
+        """Lowercased, whitespace-collapsed text."""
+        return normalize_text(self.raw)
+    
+    @cached_property
+    def brand_corrected(self):
+        return apply_brand_corrections(self.normalized)
+    
+    @cached_property
+    def type_corrected(self):
+        return apply_type_corrections(self.normalized)
+    
+    @cached_property
+    def volume_corrected(self):
+        """Volume corrections run on the raw text, then lowercased."""
+        return apply_volume_corrections(self.raw).lower()
+    
+    @cached_property
+    def alcohol_corrected(self):
+        """Alcohol corrections run on the raw text, then lowercased."""
+        return apply_alcohol_corrections(self.raw).lower()
+    
+    @cached_property
+    def alnum(self):
+        """Normalized text with everything but letters, digits and single spaces stripped."""
+        return re.sub(r'\s+', ' ', re.sub(r'[^a-z0-9\s]', '', self.normalized))
+    
+    @cached_property
+    def alnum_nospace(self):
+        return self.alnum.replace(' ', '')
+    
+    @cached_property
+    def block_texts(self):
+        """A LabelText per layout block, in reading order (empty without blocks)."""
+        return [LabelText(block['text']) for block in self.blocks]
+    
+    @cached_property
+    def warning_region(self):
+        """
+        The text of the block with the most government warning keywords, joined
+        with neighbouring blocks that add more (the paragraph is sometimes split
+        across blocks), or None when there are no blocks or none mention the warning.
+        """
+        found = [WARNING_MATCHER.find(block.alnum_nospace) for block in self.block_texts]
+        if not any(found):
+            return None
+        start = max(range(len(found)), key=lambda i: len(found[i]))
+        end, keywords = start + 1, set(found[start])
+        while start > 0 and not found[start - 1] <= keywords:
+            start -= 1
+            keywords |= found[start]
+        while end < len(found) and not found[end] <= keywords:
+            keywords |= found[end]
+            end += 1
+        return LabelText(" ".join(block['text'] for block in self.blocks[start:end]))
+
+
+def as_label_text(extracted_text):
+    """Wrap raw OCR text in a LabelText unless it already is one."""
+    if isinstance(extracted_text, LabelText):
+        return extracted_text
+    return LabelText(extracted_text)
+
+
+@timed_stage('verify:brand_name')
+def verify_brand_name(input_value, extracted_text, threshold=80):
+    """Verify brand name with brand-specific OCR corrections."""
+    if not input_value:
+        return (True, 100, "Field not provided (optional)")
+    if not extracted_text:
+        return (False, 0, "No text extracted from image")
+    
+    text = as_label_text(extracted_text)
+    input_norm = normalize_text(input_value)
+    
+    # Apply brand-specific corrections to both
+    input_corr = apply_brand_corrections(input_norm)
+    text_corr = text.brand_corrected
+    
+    # Exact match after correction
+    if input_corr in text_corr:
+        return (True, 100, "Exact match found")
+    
+    # Try matching individual words (for multi-word brands)
+    input_words = [w for w in input_corr.split() if len(w) > 1]
+    if input_words:
+        word_score = word_match_score(input_words, text_corr)
+        if word_score >= 100:
+            return (True, 100, "All brand words found")
+        if word_score >= threshold:
+            return (True, word_score, f"Brand match ({word_score}% words found)")
+    
+    # Fuzzy matching
+    partial_score = fuzzy_partial_ratio(input_corr, text_corr)
+    if partial_score >= threshold:
+        return (True, partial_score, f"Fuzzy match ({partial_score}% similarity)")
+    
+    return (False, partial_score, f"Brand not found ({partial_score}% similarity)")
+
+
+@timed_stage('verify:class_type')
+def verify_class_type(input_value, extracted_text, threshold=75):
+    """Verify class/type designation with type-specific OCR corrections."""
+    if not input_value:
+        return (True, 100, "Field not provided (optional)")
+    if not extracted_text:
+        return (False, 0, "No text extracted from image")
+    
+    text = as_label_text(extracted_text)
+    input_norm = normalize_text(input_value)
+    
+    # Apply type-specific corrections
+    input_corr = apply_type_corrections(input_norm)
+    text_corr = text.type_corrected
+    
+    # Exact match
+    if input_corr in text_corr:
+        return (True, 100, "Exact match found")
+    
+    # Word matching (important for multi-word types like "California Cabernet Sauvignon")
+    input_words = [w for w in input_corr.split() if len(w) > 2]
+    if input_words:
+        word_score = word_match_score(input_words, text_corr)
+        if word_score >= 100:
+            return (True, 100, "All type words found")
+        if word_score >= threshold:
+            return (True, word_score, f"Type match ({word_score}% words found)")
+    
+    # Fuzzy matching
+    partial_score = fuzzy_partial_ratio(input_corr, text_corr)
+    token_score = fuzzy_token_set_ratio(input_corr, text_corr)
+    best_score = max(partial_score, token_score)
+    
+    if best_score >= threshold:
+        return (True, best_score, f"Fuzzy match ({best_score}% similarity)")
+    
+    return (False, best_score, f"Type not found ({best_score}% similarity)")
+
+
+@timed_stage('verify:net_contents')
+def verify_net_contents(input_value, extracted_text):
+    """Strict net contents verification - number must match exactly."""
+    if not input_value:
+        return (True, 100, "Field not provided (optional)")
+    if not extracted_text:
+        return (False, 0, "No text extracted from image")
+    
+    # Apply volume-specific corrections
+    text = as_label_text(extracted_text)
+    input_corr = apply_volume_corrections(input_value)
+    
+    # Extract number from input
+    input_match = re.search(r'(\d+\.?\d*)', input_corr)
+    if not input_match:
+        return (False, 0, "Could not parse input volume")
+    input_num = input_match.group(1)
+    
+    # Find all volume patterns in corrected text
+    volume_patterns = [
+        r'(\d+\.?\d*)\s*fl\.?\s*oz',
+        r'(\d+\.?\d*)\s*floz',
+        r'(\d+\.?\d*)\s*ml',
+        r'(\d+\.?\d*)\s*l\b',
+        r'(\d+\.?\d*)\s*liter',
+        r'(\d+\.?\d*)\s*oz',
+        r'(\d+\.?\d*)\s*pint',
+    ]
+    
+    # With layout blocks, a number and its unit must come from the same block
+    sources = [block.volume_corrected for block in text.block_texts] or [text.volume_corrected]
+    found_volumes = []
+    
+    for pattern in volume_patterns:
+        for source in sources:
+            found_volumes.extend(re.findall(pattern, source))
+    
+    # Strict number matching
+    for found_num in found_volumes:
+        try:
+            if float(found_num) == float(input_num):
+                return (True, 100, f"Exact volume match: {found_num}")
+        except ValueError:
+            continue
+    
+    if found_volumes:
+        return (False, 0, f"No match - expected {input_num}, found: {', '.join(set(found_volumes))}")
+    return (False, 0, "No volume found in text")
+
+
+@timed_stage('verify:alcohol_content')
+def verify_alcohol_content(input_value, extracted_text):
+    """Strict alcohol content verification - numbers must match exactly."""
+    if not input_value:
+        return (True, 100, "Field not provided (optional)")
+    if not extracted_text:
+        return (False, 0, "No text extracted from image")
+    
+    # Apply alcohol-specific corrections
+    text = as_label_text(extracted_text)
+    
+    # Extract number from input
+    input_match = re.search(r'(\d+\.?\d*)', input_value)
+    if not input_match:
+        return (False, 0, "Could not parse input alcohol content")
+    input_num = input_match.group(1)
+    
+    # Find all alcohol percentage patterns in corrected text; with layout
+    # blocks, a number and its label must come from the same block
+    sources = [block.alcohol_corrected for block in text.block_texts] or [text.alcohol_corrected]
+    
+    patterns = [
+        r'(\d+\.?\d*)\s*%\s*alc',
+        r'(\d+\.?\d*)\s*%\s*vol',
+        r'(\d+\.?\d*)\s*%\s*abv',
+        r'alc\.?/?vol\.?\s*(\d+\.?\d*)\s*%',
+        r'alc\.?\s*/?\s*(\d+\.?\d*)\s*%',
+        r'(\d+\.?\d*)\s*%\s*by\s*vol',
+        r'alcohol\s*:?\s*(\d+\.?\d*)\s*%',
+        r'(\d+\.?\d*)\s*%\s*alcohol',
+        r'(\d+\.?\d*)\s*alc/vol',
+        r'(\d+\.?\d*)\s*alc\s*/\s*vol',
+    ]
+    
+    found_values = set()
+    for pattern in patterns:
+        for source in sources:
+            found_values.update(re.findall(pattern, source))
+    
+    # Also look for standalone percentages near "alc" or "vol"
+    # Split text into segments and look for numbers near alcohol indicators
+    if not found_values:
+        for source in sources:
+            # Check if "alc" or "vol" appears in the text (or in this block)
+            if 'alc' in source or 'vol' in source:
+                found_values.update(re.findall(r'(\d+\.?\d*)\s*%', source))
+    
+    # Strict matching - number must match exactly
+    for match in found_values:
+        try:
+            if float(match) == float(input_num):
+                return (True, 100, f"Exact match: {match}%")
+        except ValueError:
+            continue
+    
+    if found_values:
+        return (False, 0, f"No match - expected {input_num}%, found: {', '.join(found_values)}%")
+    return (False, 0, "No alcohol percentage found in text")
+
+
+@timed_stage('verify:producer_name')
+def verify_producer_name(input_value, extracted_text, threshold=75):
+    """Verify producer/bottler name with brand corrections."""
+    if not input_value:
+        return (True, 100, "Field not provided (optional)")
+    if not extracted_text:
+        return (False, 0, "No text extracted from image")
+    
+    text = as_label_text(extracted_text)
+    input_norm = normalize_text(input_value)
+    
+    # Apply brand corrections (producers often share naming patterns with brands)
+    input_corr = apply_brand_corrections(input_norm)
+    text_corr = text.brand_corrected
+    
+    # Exact match
+    if input_corr in text_corr:
+        return (True, 100, "Exact match found")
+    
+    # Word matching
+    input_words = [w for w in input_corr.split() if len(w) > 2]
+    if input_words:
+        word_score = word_match_score(input_words, text_corr)
+        if word_score >= 100:
+            return (True, 100, "All producer words found")
+        if word_score >= threshold:
+            return (True, word_score, f"Producer match ({word_score}% words found)")
+    
+    # Fuzzy matching
+    partial_score = fuzzy_partial_ratio(input_corr, text_corr)
+    if partial_score >= threshold:
+        return (True, partial_score, f"Fuzzy match ({partial_score}% similarity)")
+    
+    return (False, partial_score, f"Producer not found ({partial_score}% similarity)")
+
+
+@timed_stage('verify:location')
+def verify_location(input_value, extracted_text, field_name, threshold=70):
+    """Verify city or country with basic matching."""
+    if not input_value:
+        return (True, 100, "Optional field not provided")
+    if not extracted_text:
+        return (False, 0, "No text extracted from image")
+    
+    input_norm = normalize_text(input_value)
+    text_norm = as_label_text(extracted_text).normalized
+    
+    # Exact match
+    if input_norm in text_norm:
+        return (True, 100, "Exact match found")
+    
+    # Fuzzy match
+    partial_score = fuzzy_partial_ratio(input_norm, text_norm)
+    if partial_score >= threshold:
+        return (True, partial_score, f"Match found ({partial_score}% similarity)")
+    
+    return (False, partial_score, f"{field_name.title()} not found ({partial_score}% similarity)")
+
+
+# Required keywords/phrases that must appear in the government warning
+WARNING_KEYWORDS = [
+    'government warning',
+    'surgeon general',
+    'women',
+    'drink',
+    'alcoholic beverages',
+    'pregnancy',
+    'birth defect',
+    'consumption',
+    'impair',
+    'ability',
+    'drive',
+    'machinery',
+    'health problem',
+]
+
+# Alternative spellings/OCR variants
+WARNING_KEYWORD_VARIANTS = {
+    'government warning': ['covernment warning', 'qovernment warning', 'govemment warning', 'governmentwarning'],
+    'surgeon general': ['surgeqn general', 'surgeongeneral', 'surgeon qeneral', 'surgeongenera', 'surgeon genera'],
+    'women': ['wornen', 'wom3n', 'wamen'],
+    'drink': ['drlnk', 'dr1nk', 'drnk'],
+    'alcoholic beverages': ['alcoholic beverag', 'alcoholicbeverages', 'aleoholic beverages'],
+    'pregnancy': ['pregnan', 'preg nan', 'prenant', 'pregnacy'],
+    'birth defect': ['blrth defect', 'birth defecl', 'birthdefect', 'birth detect'],
+    'consumption': ['consumpt1on', 'consumpti0n', 'consumpton'],
+    'impair': ['lmpair', '1mpair', 'impalr'],
+    'ability': ['ab1lity', 'abiiity', 'abilty'],
+    'drive': ['dr1ve', 'drlve', 'driv3'],
+    'machinery': ['machlnery', 'mach1nery', 'machin', 'machnery'],
+    'health problem': ['health prob', 'hea1th problem', 'healthproblem', 'health problems'],
+}
+
+WARNING_MATCHER = KeywordMatcher(WARNING_KEYWORDS, WARNING_KEYWORD_VARIANTS)
+
+
+@timed_stage('verify:government_warning')
+def verify_government_warning(extracted_text, threshold=66):
+    """
+    Government warning verification using keyword detection.
+    
+    Labels sometimes have OCR issues like (2) appearing twice instead of (1)/(2),
+    or missing punctuation. We verify based on required keywords.
+    """
+    if not extracted_text:
+        return (False, 0, "No text extracted from image")
+    
+    text = as_label_text(extracted_text)
+    
+    # With layout blocks the warning has to be one region, not keywords
+    # picked up from anywhere on the label
+    region = text.warning_region
+    # Normalized: lowercase, whitespace collapsed, non-alphanumerics stripped
+    text_nospace = (region if region is not None else text).alnum_nospace
+    
+    required_keywords = WARNING_KEYWORDS
+    
+    # Keywords, then every OCR variant of the missing ones in a single pass
+    present = WARNING_MATCHER.find(text_nospace)
+    found_keywords = [keyword for keyword in required_keywords if keyword in present]
+    missing_keywords = [keyword for keyword in required_keywords if keyword not in present]
+    
+    # Calculate score
+    score = int((len(found_keywords) / len(required_keywords)) * 100)
+    
+    # Pass criteria: must have header + at least threshold% of keywords
+    has_header = 'government warning' in found_keywords
+    
+    if has_header and score >= threshold:
+        return (True, score, f"Government warning verified ({len(found_keywords)}/{len(required_keywords)} keywords)")
+    elif not has_header:
+        return (False, score, "GOVERNMENT WARNING header not found")
+    else:
+        return (False, score, f"Warning incomplete ({score}% - missing: {', '.join(missing_keywords[:3])}...)")
+
+
+def verify_fields(extracted_text, label_data):
+    """Run every field verifier against extracted text. Returns the fields dict and overall pass."""
+    # One shared view, so each normalization/correction pass runs once for all verifiers
+    extracted_text = as_label_text(extracted_text)
+    results = {
+        'fields': {},
+        'overall_pass': True
+    }
+    
+    # Brand name
+    passed, score, details = verify_brand_name(
+        label_data.get('brand_name', ''), extracted_text
+    )
+    results['fields']['brand_name'] = {
+        'input': label_data.get('brand_name', ''),
+        'passed': passed,
+        'score': score,
+        'details': details,
+        'optional': False
+    }
+    if not passed:
+        results['overall_pass'] = False
+    
+    # Class/Type
+    passed, score, details = verify_class_type(
+        label_data.get('class_type', ''), extracted_text
+    )
+    results['fields']['class_type'] = {
+        'input': label_data.get('class_type', ''),
+        'passed': passed,
+        'score': score,
+        'details': details,
+        'optional': False
+    }
+    if not passed:
+        results['overall_pass'] = False
+    
+    # Net Contents
+    passed, score, details = verify_net_contents(
+        label_data.get('net_contents', ''), extracted_text
+    )
+    results['fields']['net_contents'] = {
+        'input': label_data.get('net_contents', ''),
+        'passed': passed,
+        'score': score,
+        'details': details,
+        'optional': False
+    }
+    if not passed:
+        results['overall_pass'] = False
+    
+    # Producer Name
+    passed, score, details = verify_producer_name(
+        label_data.get('producer_name', ''), extracted_text
+    )
+    results['fields']['producer_name'] = {
+        'input': label_data.get('producer_name', ''),
+        'passed': passed,
+        'score': score,
+        'details': details,
+        'optional': False
+    }
+    if not passed:
+        results['overall_pass'] = False
+    
+    # City (optional)
+    city_value = label_data.get('city', '')
+    if city_value:
+        passed, score, details = verify_location(city_value, extracted_text, 'city')
+    else:
+        passed, score, details = True, 100, "Optional field not provided"
+    results['fields']['city'] = {
+        'input': city_value,
+        'passed': passed,
+        'score': score,
+        'details': details,
+        'optional': True
+    }
+    
+    # Country (optional)
+    country_value = label_data.get('country', '')
+    if country_value:
+        passed, score, details = verify_location(country_value, extracted_text, 'country')
+    else:
+        passed, score, details = True, 100, "Optional field not provided"
+    results['fields']['country'] = {
+        'input': country_value,
+        'passed': passed,
+        'score': score,
+        'details': details,
+        'optional': True
+    }
+    
+    # Alcohol content
+    alcohol_value = label_data.get('alcohol_content', '')
+    if alcohol_value:
+        passed, score, details = verify_alcohol_content(alcohol_value, extracted_text)
+    else:
+        passed, score, details = True, 100, "Field not provided (optional)"
+    
+    results['fields']['alcohol_content'] = {
+        'input': alcohol_value,
+        'passed': passed,
+        'score': score,
+        'details': details,
+        'optional': not bool(alcohol_value)  # Required if provided
+    }
+    if alcohol_value and not passed:
+        results['overall_pass'] = False
+    
+    # Government warning
+    passed, score, details = verify_government_warning(extracted_text)
+    results['fields']['government_warning'] = {
+        'input': 'Required',
+        'passed': passed,
+        'score': score,
+        'details': details,
+        'optional': False
+    }
+    if not passed:
+        results['overall_pass'] = False
+    
+    return results['fields'], results['overall_pass']
+
+
+def run_ocr_cascade(image, label_data, strategies=None, image_hash=None):
+    """
+    Early-exit OCR: run strategies one at a time (cheapest first), accumulating text,
+    and stop as soon as every required field passes.
+    Returns the combined text, the field results for it, and the strategies that ran.
+    """
+    if strategies is None:
+        strategies = OCR_STRATEGIES
+    
+    texts = []
+    strategies_run = []
+    extracted_text = ""
+    fields, overall_pass = {}, False
+    for strategy in strategies:
+        texts.append(run_ocr_strategy(image, strategy, image_hash))
+        strategies_run.append(strategy[0])
+        extracted_text = combine_texts(texts)
+        if not extracted_text:
+            continue
+        fields, overall_pass = verify_fields(extracted_text, label_data)
+        if overall_pass:
+            break
+    
+    return extracted_text, fields, overall_pass, strategies_run
+
+
+def verify_label(image_source, label_data, ocr_mode=None, quality=None):
+    """
+    Verify all label fields against extracted text.
+    
+    image_source is a path, encoded image bytes, a file-like object or a PIL
+    image (see load_image).
+    
+    ocr_mode 'full' runs every OCR strategy before checking fields; 'cascade' stops
+    running strategies once all required fields pass; 'layout' OCRs each detected
+    text block separately and adds the blocks to the result. Defaults to OCR_MODE.
+    
+    quality is a tier name or 'auto' (see resolve_quality). Lower tiers run fewer
+    strategies and skip layout mode; the result's `quality` records the tier and
+    whether a re-check at full quality is advisable.
+    
+    The result's `timings` holds seconds per pipeline stage (see record_stages);
+    OCR passes that ran in parallel are summed, so they can exceed processing_time.
+    """
+    start_time = time.time()
+    if ocr_mode is None:
+        ocr_mode = app.config['OCR_MODE']
+    tier, reason = resolve_quality(quality)
+    
+    with record_stages() as timings:
+        result = _verify_label(image_source, label_data, ocr_mode, tier)
+    result['quality'] = {'tier': tier, 'reason': reason, 'recheck_advised': tier != 'full'}
+    result['processing_time'] = time.time() - start_time
+    result['timings'] = stage_totals(timings)
+    result['ocr_passes'] = sum(1 for stage, _ in timings if stage.startswith('tesseract:'))
+    # Time spent running tesseract vs queueing for an OCR slot (see OCRGovernor)
+    result['ocr_time'] = round(sum(seconds for stage, seconds in timings if stage.startswith('tesseract:')), 4)
+    result['ocr_wait_time'] = round(sum(seconds for stage, seconds in timings if stage == 'ocr_wait'), 4)
+    record_label_metrics(result, timings)
+    return result
+
+
+def _verify_label(image_source, label_data, ocr_mode, tier):
+    extracted_text = ""
+    fields, overall_pass = {}, False
+    strategies_run = []
+    image_info = None
+    blocks = None
+    ocr_source = None
+    strategies = quality_strategies(tier)
+    layout = ocr_mode == 'layout' and tier == 'full'
+    try:
+        with timed_stage('decode'):
+            image, image_hash, image_info = load_for_ocr(image_source, tier)
+    except Exception as e:
+        image = None
+    
+    # Index lookups and writes stay outside the OCR error handling: a failing
+    # index is a miss or a skipped write, never a lost OCR result
+    match = None
+    if image is not None and perceptual_index is not None:
+        with timed_stage('perceptual_lookup'):
+            dhash = perceptual_hash(image)
+            variant = perceptual_variant(tier, layout)
+            match = perceptual_index.find(dhash, variant)
+    
+    if match is not None:
+        extracted_text, blocks = match['text'], match['blocks']
+        ocr_source = {'kind': 'perceptual', 'image_hash': match['image_hash'], 'distance': match['distance']}
+        metrics.inc('verifier_ocr_reuse_total', kind='perceptual')
+    elif image is not None:
+        try:
+            if ocr_mode == 'cascade':
+                extracted_text, fields, overall_pass, strategies_run = run_ocr_cascade(
+                    image, label_data, strategies=strategies, image_hash=image_hash
+                )
+            elif layout:
+                extracted_text, blocks = run_layout_ocr(image, image_hash=image_hash)
+                strategies_run = ['layout']
+            else:
+                extracted_text = combine_texts(ocr_strategies(image, strategies, image_hash=image_hash))
+                strategies_run = [name for name, _ in strategies]
+        except Exception as e:
+            extracted_text = ""
+        # A cascade that stopped early has only part of the text, so it isn't indexed
+        if (perceptual_index is not None and extracted_text
+                and (ocr_mode != 'cascade' or len(strategies_run) == len(strategies))):
+            perceptual_index.add(dhash, variant, image_info['sha256'], extracted_text, blocks)
+    
+    if not extracted_text:
+        return {
+            'success': False,
+            'error': 'Unable to extract text from image',
+            'extracted_text': None,
+            'fields': {},
+            'overall_pass': False,
+            'ocr_mode': ocr_mode,
+            'strategies_run': strategies_run,
+            'image': image_info,
+        }
+    
+    if not fields:
+        fields, overall_pass = verify_fields(LabelText(extracted_text, blocks), label_data)
+    
+    result = {
+        'success': True,
+        'extracted_text': extracted_text,
+        'fields': fields,
+        'overall_pass': overall_pass,
+        'ocr_mode': ocr_mode,
+        'strategies_run': strategies_run,
+        'image': image_info,
+    }
+    if blocks is not None:
+        result['blocks'] = blocks
+    if ocr_source is not None:
+        result['ocr_source'] = ocr_source
+    return result
+
+
+def reuse_ocr_result(source, label_data, ocr_source):
+    """
+    verify_label's result for label_data on an image already verified as
+    `source`, checking the fields against source's text without running OCR.
+    ocr_source describes where the text came from and is added to the result.
+    
+    Returns None when source's text can't stand in for a fresh pass: a cascade
+    that stopped once source's own fields passed may be missing strategies these
+    fields need. An error result is copied, since the same image would fail again.
+    """
+    start_time = time.time()
+    if not source.get('success'):
+        return dict(source, ocr_source=ocr_source, processing_time=0)
+    
+    tier = source['quality']['tier']
+    partial = (source['ocr_mode'] == 'cascade' and 'ocr_source' not in source
+               and len(source['strategies_run']) < len(quality_strategies(tier)))
+    
+    with record_stages() as timings:
+        fields, overall_pass = verify_fields(LabelText(source['extracted_text'], source.get('blocks')), label_data)
+    if partial and not overall_pass:
+        return None
+    
+    result = {key: source[key] for key in ('success', 'extracted_text', 'ocr_mode', 'strategies_run', 'image',
+                                           'blocks', 'quality') if key in source}
+    result.update({
+        'fields': fields,
+        'overall_pass': overall_pass,
+        'ocr_source': ocr_source,
+        'processing_time': time.time() - start_time,
+        'timings': stage_totals(timings),
+        'ocr_passes': 0,
+        'ocr_time': 0.0,
+        'ocr_wait_time': 0.0,
+    })
+    metrics.inc('verifier_ocr_reuse_total', kind=ocr_source['kind'])
+    record_label_metrics(result, timings)
+    return result
+
+
+LABEL_FIELDS = ('brand_name', 'class_type', 'alcohol_content', 'net_contents', 'producer_name', 'city', 'country')
+
+
+def label_data_from(source):
+    """Pull the label fields out of a submitted form or CSV row."""
+    return {field: source.get(field, '') for field in LABEL_FIELDS}
+
+
+def parse_ocr_mode(value):
+    """A known OCR mode from a request parameter, or None for the configured default."""
+    mode = (value or '').strip().lower()
+    return mode if mode in OCR_MODES else None
+
+
+def requested_ocr_mode():
+    """OCR mode requested via the ocr_mode form/query parameter, or None for the configured default."""
+    return parse_ocr_mode(request.values.get('ocr_mode'))
+
+
+def parse_quality(value):
+    """A quality tier or 'auto' from a request parameter, or None for the configured default."""
+    quality = (value or '').strip().lower()
+    return quality if quality in QUALITY_CHOICES else None
+
+
+def requested_quality():
+    """Quality requested via the quality form/query parameter, or None for the configured default."""
+    return parse_quality(request.values.get('quality'))
+
+
+def format_time(seconds):
+    """Format time for display."""
+    if seconds < 1:
+        return f"{seconds * 1000:.0f}ms"
+    elif seconds < 60:
+        return f"{seconds:.2f}s"
+    else:
+        mins = int(seconds // 60)
+        secs = seconds % 60
+        return f"{mins}m {secs:.1f}s"
+
+
+# ============================================================================
+# BATCH PROCESSING
+# ============================================================================
+
+def batch_error_result(message, processing_time=0):
+    """Result dict for a batch row that could not be verified."""
+    return {
+        'success': False,
+        'error': message,
+        'overall_pass': False,
+        'fields': {},
+        'processing_time': processing_time
+    }
+
+
+def verify_batch_item(image_source, label_data, ocr_mode=None, quality=None):
+    """Batch pool entry point: verify one label, turning any crash into an error result."""
+    start_time = time.time()
+    try:
+        return verify_label(image_source, label_data, ocr_mode=ocr_mode, quality=quality)
+    except Exception as e:
+        return batch_error_result(f'Verification failed: {e}', time.time() - start_time)
+
+
+def _init_batch_worker():
+    # Rows already run in parallel across processes; don't fan each one out again
+    app.config['OCR_PARALLELISM'] = 1
+    # Pool workers leave through os._exit, which skips atexit
+    multiprocessing.util.Finalize(None, flush_pending_metrics, exitpriority=0)
+
+
+_batch_pool = None
+_batch_pool_lock = threading.Lock()
+
+
+def get_batch_pool():
+    """Return this worker's batch process pool, creating it on first use."""
+    global _batch_pool
+    with _batch_pool_lock:
+        if _batch_pool is None:
+            _batch_pool = ProcessPoolExecutor(
+                max_workers=app.config['BATCH_WORKERS'],
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_batch_worker
+            )
+        return _batch_pool
+
+
+def reset_batch_pool(pool):
+    """Discard a broken pool so the next batch starts a fresh one."""
+    global _batch_pool
+    with _batch_pool_lock:
+        if _batch_pool is pool:
+            _batch_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+class BatchExecutor:
+    """
+    Runs batch rows on the process pool with bounded concurrency and per-item timeouts.
+    
+    submit() blocks while `workers` rows are in flight. Finished rows come back as
+    (index, result) pairs from completed() / drain() in completion order; callers
+    that need CSV order index into a list. A row that crashes, times out, or takes
+    down its worker process becomes an error result instead of failing the batch.
+    With a single worker everything runs inline in the calling process.
+    
+    With dedup, each image is hashed as it is submitted and OCRed once per batch:
+    later rows with the same content wait for the first one (without taking a
+    slot) and are checked against its text (see reuse_ocr_result).
+    """
+    
+    def __init__(self, workers=None, item_timeout=None, ocr_mode=None, quality=None, dedup=None):
+        self.workers = workers if workers is not None else app.config['BATCH_WORKERS']
+        self.item_timeout = item_timeout if item_timeout is not None else app.config['BATCH_ITEM_TIMEOUT']
+        self.ocr_mode = ocr_mode
+        self.quality = quality
+        self.dedup = dedup if dedup is not None else app.config['BATCH_DEDUP']
+        self._pool = None
+        self._inflight = {}
+        # A timed-out row keeps its worker process busy until it actually
+        # finishes, so it still counts against the concurrency limit
+        self._abandoned = set()
+        self._finished = deque()
+        # Dedup state: image hash -> index of the row OCRing it, and back
+        self._leaders = {}
+        self._leader_digests = {}
+        # Leader index -> [(index, image_source, label_data)] of the rows waiting on it
+        self._followers = {}
+        # Image hash -> (leader index, result) once the leader has finished
+        self._ocr_results = {}
+        # Rows that turned out to need their own OCR after all; submitted before the next row
+        self._retry = deque()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+    
+    def submit(self, index, image_source, label_data):
+        """Queue one row, waiting for a free slot first, unless its image is already being OCRed."""
+        self._submit_retries()
+        digest = source_digest(image_source) if self.dedup else None
+        if digest is not None:
+            if digest in self._leaders:
+                self._followers[self._leaders[digest]].append((index, image_source, label_data))
+                return
+            if digest in self._ocr_results:
+                leader, leader_result = self._ocr_results[digest]
+                result = reuse_ocr_result(leader_result, label_data, self._duplicate_source(leader, digest))
+                if result is not None:
+                    self._finished.append((index, result))
+                    return
+            self._lead(index, digest, [])
+        self._dispatch(index, image_source, label_data)
+    
+    def _lead(self, index, digest, followers):
+        self._leaders[digest] = index
+        self._leader_digests[index] = digest
+        self._followers[index] = followers
+    
+    @staticmethod
+    def _duplicate_source(leader, digest):
+        return {'kind': 'duplicate', 'row': leader, 'image_hash': digest}
+    
+    def _submit_retries(self):
+        while self._retry:
+            self._dispatch(*self._retry.popleft())
+    
+    def _finish(self, index, result):
+        """Report a row's result and, if other rows were waiting on its image, theirs."""
+        self._finished.append((index, result))
+        digest = self._leader_digests.pop(index, None)
+        if digest is None:
+            return
+        del self._leaders[digest]
+        self._ocr_results[digest] = (index, result)
+        retry = []
+        for follower, image_source, label_data in self._followers.pop(index):
+            reused = reuse_ocr_result(result, label_data, self._duplicate_source(index, digest))
+            if reused is None:
+                retry.append((follower, image_source, label_data))
+            else:
+                self._finished.append((follower, reused))
+        if retry:
+            # The first of them OCRs the image again; the rest wait on it in turn
+            self._lead(retry[0][0], digest, retry[1:])
+            self._retry.append(retry[0])
+    
+    def _dispatch(self, index, image_source, label_data):
+        if self.workers <= 1:
+            self._finish(index, verify_batch_item(image_source, label_data, self.ocr_mode, self.quality))
+            return
+        
+        while len(self._inflight) + len(self._abandoned) >= self.workers:
+            self._collect(block=True)
+        
+        if self._pool is None:
+            self._pool = get_batch_pool()
+        try:
+            future = self._pool.submit(verify_batch_item, image_source, label_data, self.ocr_mode, self.quality)
+        except BrokenProcessPool:
+            reset_batch_pool(self._pool)
+            self._pool = get_batch_pool()
+            future = self._pool.submit(verify_batch_item, image_source, label_data, self.ocr_mode, self.quality)
+        self._inflight[future] = (index, time.time())
+        metrics.inc('verifier_batch_items_in_flight')
+    
+    def _collect(self, block):
+        """Move finished and timed-out rows into the finished queue."""
+        pending = set(self._inflight) | self._abandoned
+        if not pending:
+            return
+        
+        wait_timeout = 0
+        if block:
+            wait_timeout = None
+            if self.item_timeout and self._inflight:
+                oldest = min(started for _, started in self._inflight.values())
+                wait_timeout = max(0, oldest + self.item_timeout - time.time())
+        done, _ = wait(pending, timeout=wait_timeout, return_when=FIRST_COMPLETED)
+        
+        for future in done:
+            metrics.inc('verifier_batch_items_in_flight', -1)
+            if future in self._abandoned:
+                self._abandoned.discard(future)
+                continue
+            index, started = self._inflight.pop(future)
+            try:
+                result = future.result()
+            except BrokenProcessPool:
+                result = batch_error_result('Worker process crashed while verifying this image',
+                                            time.time() - started)
+                if self._pool is not None:
+                    reset_batch_pool(self._pool)
+                    self._pool = None
+            except Exception as e:
+                result = batch_error_result(f'Verification failed: {e}', time.time() - started)
+            self._finish(index, result)
+        
+        if self.item_timeout:
+            now = time.time()
+            for future, (index, started) in list(self._inflight.items()):
+                if now - started >= self.item_timeout:
+                    del self._inflight[future]
+                    if future.cancel():
+                        metrics.inc('verifier_batch_items_in_flight', -1)
+                    else:
+                        self._abandoned.add(future)
+                    self._finish(index, batch_error_result(
+                        f'Timed out after {self.item_timeout}s', now - started
+                    ))
+    
+    def completed(self):
+        """Yield rows that have finished so far without waiting."""
+        self._collect(block=False)
+        while self._finished:
+            yield self._finished.popleft()
+    
+    def drain(self):
+        """Yield every remaining row as it finishes."""
+        while self._inflight or self._finished or self._retry:
+            while self._finished:
+                yield self._finished.popleft()
+            if self._retry:
+                self._submit_retries()
+            elif self._inflight:
+                self._collect(block=True)
+    
+    def close(self):
+        for future in self._inflight:
+            future.cancel()
+        metrics.inc('verifier_batch_items_in_flight', -(len(self._inflight) + len(self._abandoned)))
+        self._inflight.clear()
+        self._abandoned.clear()
+
+
+def parse_batch_csv(csv_file):
+    """Read an uploaded batch CSV into a list of row dicts. Raises on undecodable input."""
+    csv_content = csv_file.read().decode('utf-8')
+    reader = csv.DictReader(io.StringIO(csv_content))
+    return list(reader)
+
+
+def upload_size(file):
+    """Size in bytes of an uploaded file, without reading it."""
+    stream = file.stream
+    position = stream.tell()
+    stream.seek(0, os.SEEK_END)
+    size = stream.tell()
+    stream.seek(position)
+    return size
+
+
+def read_upload(file, folder, memory_limit=None):
+    """
+    Image source for one upload: its bytes, read straight from the request
+    stream, or the path of a copy saved in folder when it is larger than
+    memory_limit (UPLOAD_MEMORY_LIMIT by default). Pass the result to
+    discard_upload when done.
+    """
+    if memory_limit is None:
+        memory_limit = app.config['UPLOAD_MEMORY_LIMIT']
+    if upload_size(file) <= memory_limit:
+        return file.read()
+    filepath = os.path.join(folder, f"{uuid.uuid4()}_{secure_filename(file.filename)}")
+    file.save(filepath)
+    return filepath
+
+
+def discard_upload(image_source):
+    """Remove the temp copy read_upload spilled to disk, if it made one."""
+    if isinstance(image_source, str):
+        try:
+            os.remove(image_source)
+        except OSError:
+            pass
+
+
+def save_uploaded_images(image_files, folder, memory_limit=0):
+    """
+    Collect allowed image uploads. Returns {secure filename: image source}.
+    
+    Images are kept in memory as bytes while their running total stays within
+    memory_limit; the rest are saved into folder and given as paths. The
+    default of 0 saves everything, for jobs that outlive the request.
+    """
+    saved_images = {}
+    in_memory = 0
+    for img_file in image_files:
+        if img_file.filename and allowed_file(img_file.filename):
+            filename = secure_filename(img_file.filename)
+            # A repeated filename replaces the earlier upload, as it always has
+            discard_upload(saved_images.pop(filename, None))
+            size = upload_size(img_file)
+            if in_memory + size <= memory_limit:
+                saved_images[filename] = img_file.read()
+                in_memory += size
+                continue
+            filepath = os.path.join(folder, f"{uuid.uuid4()}_{filename}")
+            img_file.save(filepath)
+            saved_images[filename] = filepath
+    return saved_images
+
+
+def prepare_batch_rows(rows, images):
+    """
+    Match CSV rows to uploaded images.
+    
+    Returns one entry per row with its filename, label_data and image_source.
+    Rows that can't be verified (no filename, image not uploaded) already carry
+    an error result; the rest have result None.
+    """
+    entries = []
+    for row in rows:
+        image_filename = (row.get('image_filename') or '').strip()
+        
+        if not image_filename:
+            entries.append({
+                'filename': 'Unknown',
+                'label_data': {},
+                'image_source': None,
+                'result': batch_error_result('No image_filename specified in CSV row')
+            })
+            continue
+        
+        image_source = images.get(image_filename)
+        if not image_source:
+            entries.append({
+                'filename': image_filename,
+                'label_data': {},
+                'image_source': None,
+                'result': batch_error_result(f'Image file "{image_filename}" not found in uploaded images')
+            })
+            continue
+        
+        entries.append({
+            'filename': image_filename,
+            'label_data': label_data_from(row),
+            'image_source': image_source,
+            'result': None
+        })
+    return entries
+
+
+def iter_multipart_parts(stream, boundary, chunk_size=64 * 1024):
+    """
+    Decode a multipart/form-data body as it arrives. Yields (name, filename, data)
+    for each part as soon as the whole part has been received; filename is None
+    for plain form fields. Only the part currently arriving is buffered.
+    Raises ValueError on a malformed or truncated body.
+    """
+    decoder = MultipartDecoder(boundary.encode('latin-1'))
+    part, buffer = None, bytearray()
+    while True:
+        data = stream.read(chunk_size)
+        decoder.receive_data(data or None)
+        event = decoder.next_event()
+        while not isinstance(event, (Epilogue, NeedData)):
+            if isinstance(event, (Field, File)):
+                part, buffer = event, bytearray()
+            elif isinstance(event, Data):
+                buffer += event.data
+                if not event.more_data:
+                    yield part.name, getattr(part, 'filename', None), buffer
+                    part, buffer = None, bytearray()
+            event = decoder.next_event()
+        if isinstance(event, Epilogue):
+            return
+        if not data:
+            raise ValueError('Upload ended before the multipart body was complete')
+
+
+def iter_batch_entries(entries, ocr_mode=None, read_source=None, quality=None):
+    """
+    Verify prepared batch entries (see prepare_batch_rows) as a batch event stream.
+    
+    Yields ('rows', filenames) first, then ('result', index, result) for every
+    row as it finishes, in completion order. Rows that already carry an error
+    result are reported straight away.
+    
+    read_source, if given, turns an entry's image_source into the image source
+    to verify just before the row is submitted, so only in-flight rows are loaded.
+    """
+    yield 'rows', [entry['filename'] for entry in entries]
+    with BatchExecutor(ocr_mode=ocr_mode, quality=quality) as executor:
+        for index, entry in enumerate(entries):
+            if entry['result'] is not None:
+                yield 'result', index, entry['result']
+                continue
+            image_source = entry['image_source']
+            if read_source is not None:
+                try:
+                    image_source = read_source(image_source)
+                except Exception as e:
+                    yield 'result', index, batch_error_result(f'Could not read image: {e}')
+                    continue
+            executor.submit(index, image_source, entry['label_data'])
+            for done_index, result in executor.completed():
+                yield 'result', done_index, result
+        for done_index, result in executor.drain():
+            yield 'result', done_index, result
+
+
+def iter_streaming_batch(parts, ocr_mode=None, quality=None):
+    """
+    Verify a batch straight from its multipart parts (see iter_multipart_parts),
+    as the same event stream as iter_batch_entries.
+    
+    The CSV part should come first (the upload form sends it first). Once it
+    has arrived, each image is handed to the BatchExecutor as soon as its part
+    is complete and dropped once its rows are submitted, so only the images in
+    flight are held and the upload itself waits while every worker is busy.
+    Images that arrive before the CSV are held (in memory up to
+    UPLOAD_MEMORY_LIMIT, then on disk) until it does. If a filename is
+    uploaded twice the first copy is used.
+    
+    Raises ValueError before the 'rows' event when the CSV is missing or
+    unreadable. If the upload breaks off after that, rows whose image never
+    arrived are reported as errors.
+    """
+    started = False
+    needed = {}
+    early_images, early_bytes = {}, 0
+    
+    def submit_image(executor, filename, image_source):
+        for index, label_data in needed.pop(filename, []):
+            executor.submit(index, image_source, label_data)
+    
+    try:
+        with BatchExecutor(ocr_mode=ocr_mode, quality=quality) as executor:
+            missing = 'not found in uploaded images'
+            try:
+                for name, filename, data in parts:
+                    if name == 'ocr_mode' and filename is None and not started:
+                        executor.ocr_mode = parse_ocr_mode(data.decode('utf-8', 'replace')) or executor.ocr_mode
+                    
+                    elif name == 'csv_file' and not started:
+                        reader = csv.DictReader(io.StringIO(bytes(data).decode('utf-8')))
+                        filenames, errors = [], []
+                        for index, row in enumerate(reader):
+                            image_filename = (row.get('image_filename') or '').strip()
+                            filenames.append(image_filename or 'Unknown')
+                            if not image_filename:
+                                errors.append((index, batch_error_result('No image_filename specified in CSV row')))
+                                continue
+                            needed.setdefault(image_filename, []).append((index, label_data_from(row)))
+                        started = True
+                        yield 'rows', filenames
+                        for index, result in errors:
+                            yield 'result', index, result
+                        for image_filename, image_source in early_images.items():
+                            submit_image(executor, image_filename, image_source)
+                    
+                    elif name == 'images' and filename and allowed_file(filename):
+                        filename = secure_filename(filename)
+                        if started:
+                            submit_image(executor, filename, data)
+                        elif filename not in early_images:
+                            if early_bytes + len(data) <= app.config['UPLOAD_MEMORY_LIMIT']:
+                                early_images[filename] = data
+                                early_bytes += len(data)
+                            else:
+                                filepath = os.path.join(app.config['UPLOAD_FOLDER'], f"{uuid.uuid4()}_{filename}")
+                                with open(filepath, 'wb') as f:
+                                    f.write(data)
+                                early_images[filename] = filepath
+                    
+                    if started:
+                        for index, result in executor.completed():
+                            yield 'result', index, result
+            except ValueError:
+                if not started:
+                    raise
+                missing = 'never arrived (the upload ended early)'
+            
+            if not started:
+                raise ValueError('No CSV file uploaded')
+            for image_filename, rows in needed.items():
+                for index, _ in rows:
+                    yield 'result', index, batch_error_result(f'Image file "{image_filename}" {missing}')
+            for index, result in executor.drain():
+                yield 'result', index, result
+    finally:
+        for image_source in early_images.values():
+            discard_upload(image_source)
+
+
+ZIP_MANIFEST_NAMES = ('manifest.csv', 'manifest.json')
+
+
+def zip_image_members(archive):
+    """
+    {name: ZipInfo} for the images in a ZIP archive, keyed by path inside the
+    archive and also by bare filename where that is unambiguous.
+    """
+    members = {}
+    basenames = Counter()
+    for info in archive.infolist():
+        name = info.filename
+        basename = os.path.basename(name)
+        if info.is_dir() or name.startswith('__MACOSX/') or basename.startswith('.') or not allowed_file(basename):
+            continue
+        members[name] = info
+        basenames[basename] += 1
+    for name, info in list(members.items()):
+        basename = os.path.basename(name)
+        if basenames[basename] == 1:
+            members.setdefault(basename, info)
+    return members
+
+
+def parse_json_manifest(content):
+    """Rows from a JSON manifest: a list of label objects, or {"labels": [...]}."""
+    data = json.loads(content)
+    if isinstance(data, dict):
+        data = data.get('labels')
+    if not isinstance(data, list) or not all(isinstance(row, dict) for row in data):
+        raise ValueError('JSON manifest must be a list of label objects or {"labels": [...]}')
+    return [{key: '' if value is None else str(value) for key, value in row.items()} for row in data]
+
+
+def read_zip_manifest(archive):
+    """
+    Rows from the archive's manifest.csv / manifest.json (the shallowest one if
+    several), or from its only CSV or JSON file. Raises ValueError if there is none.
+    """
+    candidates = [info for info in archive.infolist()
+                  if not info.is_dir() and not info.filename.startswith('__MACOSX/')
+                  and os.path.splitext(info.filename)[1].lower() in ('.csv', '.json')]
+    named = [info for info in candidates if os.path.basename(info.filename).lower() in ZIP_MANIFEST_NAMES]
+    if named:
+        manifest = min(named, key=lambda info: info.filename.count('/'))
+    elif len(candidates) == 1:
+        manifest = candidates[0]
+    else:
+        raise ValueError('Archive has no manifest.csv or manifest.json')
+    
+    content = archive.read(manifest).decode('utf-8-sig')
+    if manifest.filename.lower().endswith('.json'):
+        return parse_json_manifest(content)
+    return list(csv.DictReader(io.StringIO(content)))
+
+
+def zip_member_reader(archive, max_bytes):
+    """read_source for iter_batch_entries: a member's bytes, refusing members over max_bytes."""
+    def read(info):
+        if info.file_size > max_bytes:
+            raise ValueError(f'{info.file_size} bytes uncompressed, over the {max_bytes} byte limit')
+        with archive.open(info) as member:
+            data = member.read(max_bytes + 1)
+        if len(data) > max_bytes:
+            raise ValueError(f'over the {max_bytes} byte limit')
+        return data
+    return read
+
+
+def batch_timing(results, total_time):
+    """Aggregate timing for a finished batch: wall time plus per-label and per-stage totals."""
+    label_times = sorted(item['result']['processing_time'] for item in results)
+    stages = {}
+    for item in results:
+        for stage, seconds in item['result'].get('timings', {}).items():
+            stages[stage] = stages.get(stage, 0) + seconds
+    return {
+        'total_time': round(total_time, 4),
+        'label_time_total': round(sum(label_times), 4),
+        'label_time_mean': round(sum(label_times) / len(label_times), 4) if label_times else None,
+        'label_time_p95': round(label_times[min(len(label_times) - 1, int(0.95 * len(label_times)))], 4) if label_times else None,
+        'stages': {stage: round(seconds, 4) for stage, seconds in sorted(stages.items())},
+    }
+
+
+def collect_batch_results(events):
+    """Gather a batch event stream into [{'filename', 'result'}] in CSV order."""
+    results = []
+    for event in events:
+        if event[0] == 'rows':
+            results = [{'filename': filename, 'result': None} for filename in event[1]]
+        else:
+            _, index, result = event
+            results[index]['result'] = result
+    return results
+
+
+def batch_summary(passed, failed, total_time):
+    return {
+        'total': passed + failed,
+        'passed': passed,
+        'failed': failed,
+        'total_time': format_time(total_time),
+    }
+
+
+# ============================================================================
+# DATABASE
+# ============================================================================
+
+# Statements run at startup; every one must be idempotent
+DB_SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS jobs (
+        id TEXT PRIMARY KEY,
+        status TEXT NOT NULL,
+        ocr_mode TEXT,
+        total INTEGER NOT NULL,
+        completed INTEGER NOT NULL DEFAULT 0,
+        passed INTEGER NOT NULL DEFAULT 0,
+        failed INTEGER NOT NULL DEFAULT 0,
+        created_at REAL NOT NULL,
+        started_at REAL,
+        finished_at REAL,
+        heartbeat REAL,
+        worker_pid INTEGER,
+        error TEXT
+    )""",
+    "CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, created_at)",
+    """CREATE TABLE IF NOT EXISTS job_items (
+        job_id TEXT NOT NULL,
+        idx INTEGER NOT NULL,
+        filename TEXT NOT NULL,
+        image_path TEXT,
+        label_json TEXT NOT NULL,
+        result_json TEXT,
+        completed_seq INTEGER,
+        completed_at REAL,
+        PRIMARY KEY (job_id, idx)
+    )""",
+    "CREATE INDEX IF NOT EXISTS idx_job_items_seq ON job_items (job_id, completed_seq)",
+    """CREATE TABLE IF NOT EXISTS batches (
+        id TEXT PRIMARY KEY,
+        total INTEGER NOT NULL,
+        created_at REAL NOT NULL,
+        total_time REAL
+    )""",
+    """CREATE TABLE IF NOT EXISTS batch_results (
+        batch_id TEXT NOT NULL,
+        idx INTEGER NOT NULL,
+        filename TEXT NOT NULL,
+        passed INTEGER NOT NULL,
+        success INTEGER NOT NULL,
+        result_json TEXT NOT NULL,
+        extracted_text TEXT,
+        PRIMARY KEY (batch_id, idx)
+    )""",
+    "CREATE INDEX IF NOT EXISTS idx_batch_results_passed ON batch_results (batch_id, passed, idx)",
+    "CREATE INDEX IF NOT EXISTS idx_batches_created ON batches (created_at)",
+    """CREATE TABLE IF NOT EXISTS verifications (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        created_at REAL NOT NULL,
+        source TEXT NOT NULL,
+        batch_id TEXT,
+        filename TEXT,
+        image_hash TEXT,
+        success INTEGER NOT NULL,
+        overall_pass INTEGER NOT NULL,
+        ocr_mode TEXT,
+        quality TEXT,
+        processing_time REAL,
+        timings_json TEXT,
+        error TEXT
+    )""",
+    "CREATE INDEX IF NOT EXISTS idx_verifications_created ON verifications (created_at)",
+    "CREATE INDEX IF NOT EXISTS idx_verifications_pass ON verifications (overall_pass, created_at)",
+    "CREATE INDEX IF NOT EXISTS idx_verifications_hash ON verifications (image_hash)",
+    # created_at is repeated here so per-field queries over a date range use one index
+    """CREATE TABLE IF NOT EXISTS verification_fields (
+        verification_id INTEGER NOT NULL,
+        field TEXT NOT NULL,
+        passed INTEGER NOT NULL,
+        score REAL,
+        input TEXT,
+        details TEXT,
+        created_at REAL NOT NULL,
+        PRIMARY KEY (verification_id, field)
+    )""",
+    "CREATE INDEX IF NOT EXISTS idx_verification_fields_query ON verification_fields (field, passed, created_at)",
+    "CREATE INDEX IF NOT EXISTS idx_verification_fields_score ON verification_fields (field, score)",
+    """CREATE TABLE IF NOT EXISTS perceptual_index (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        variant TEXT NOT NULL,
+        image_hash TEXT NOT NULL,
+        dhash TEXT NOT NULL,
+        text TEXT NOT NULL,
+        blocks_json TEXT,
+        created_at REAL NOT NULL,
+        UNIQUE (variant, image_hash)
+    )""",
+    "CREATE INDEX IF NOT EXISTS idx_perceptual_index_created ON perceptual_index (created_at)",
+    # One row per 8-bit band of an entry's hash: key = band * 256 + band value
+    """CREATE TABLE IF NOT EXISTS perceptual_bands (
+        key INTEGER NOT NULL,
+        entry_id INTEGER NOT NULL
+    )""",
+    "CREATE INDEX IF NOT EXISTS idx_perceptual_bands_key ON perceptual_bands (key)",
+    "CREATE INDEX IF NOT EXISTS idx_perceptual_bands_entry ON perceptual_bands (entry_id)",
+]
+
+_db_local = threading.local()
+
+
+def get_db():
+    """Return this thread's connection to the SQLite database shared by all workers."""
+    conn = getattr(_db_local, 'conn', None)
+    if conn is None:
+        conn = sqlite3.connect(app.config['DATABASE'], timeout=30)
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        _db_local.conn = conn
+    return conn
+
+
+def init_db():
+    conn = get_db()
+    with conn:
+        for statement in DB_SCHEMA:
+            conn.execute(statement)
+
+
+# ============================================================================
+# BATCH JOBS
+# ============================================================================
+
+JOB_POLL_INTERVAL = 0.5
+JOB_FINISHED_STATES = ('done', 'failed')
+
+
+def create_job(job_id, entries, ocr_mode=None):
+    """
+    Queue a batch job from prepared batch rows (see prepare_batch_rows).
+    Rows that already failed up front are stored as completed.
+    """
+    now = time.time()
+    conn = get_db()
+    with conn:
+        conn.execute(
+            "INSERT INTO jobs (id, status, ocr_mode, total, created_at) VALUES (?, 'queued', ?, ?, ?)",
+            (job_id, ocr_mode, len(entries), now)
+        )
+        for index, entry in enumerate(entries):
+            conn.execute(
+                "INSERT INTO job_items (job_id, idx, filename, image_path, label_json) VALUES (?, ?, ?, ?, ?)",
+                (job_id, index, entry['filename'], entry['image_source'], json.dumps(entry['label_data']))
+            )
+        for index, entry in enumerate(entries):
+            if entry['result'] is not None:
+                _store_job_result(conn, job_id, index, entry['result'])
+    return job_id
+
+
+def _store_job_result(conn, job_id, index, result):
+    """Record one finished row and bump the job's progress counters (caller holds the transaction)."""
+    passed = 1 if result.get('overall_pass') else 0
+    conn.execute(
+        "UPDATE jobs SET completed = completed + 1, passed = passed + ?, failed = failed + ?, heartbeat = ? "
+        "WHERE id = ?",
+        (passed, 1 - passed, time.time(), job_id)
+    )
+    seq = conn.execute("SELECT completed FROM jobs WHERE id = ?", (job_id,)).fetchone()[0]
+    conn.execute(
+        "UPDATE job_items SET result_json = ?, completed_seq = ?, completed_at = ? WHERE job_id = ? AND idx = ?",
+        (json.dumps(result), seq, time.time(), job_id, index)
+    )
+
+
+def record_job_result(job_id, index, result):
+    conn = get_db()
+    with conn:
+        _store_job_result(conn, job_id, index, result)
+
+
+def get_job(job_id):
+    row = get_db().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+    return dict(row) if row else None
+
+
+def job_status(job):
+    """JSON-friendly progress summary for a job row."""
+    status = {
+        'job_id': job['id'],
+        'status': job['status'],
+        'total': job['total'],
+        'completed': job['completed'],
+        'passed': job['passed'],
+        'failed': job['failed'],
+        'created_at': job['created_at'],
+        'started_at': job['started_at'],
+        'finished_at': job['finished_at'],
+        'error': job['error'],
+    }
+    if job['status'] == 'queued':
+        status['queue_position'] = get_db().execute(
+            "SELECT COUNT(*) FROM jobs WHERE status = 'queued' AND created_at < ?", (job['created_at'],)
+        ).fetchone()[0] + 1
+    return status
+
+
+def job_results_after(job_id, after_seq=0):
+    """Finished rows of a job in completion order, starting after completion sequence after_seq."""
+    rows = get_db().execute(
+        "SELECT idx, filename, result_json, completed_seq FROM job_items "
+        "WHERE job_id = ? AND completed_seq > ? ORDER BY completed_seq",
+        (job_id, after_seq)
+    ).fetchall()
+    return [{
+        'seq': row['completed_seq'],
+        'index': row['idx'],
+        'filename': row['filename'],
+        'result': json.loads(row['result_json']),
+    } for row in rows]
+
+
+def claim_next_job():
+    """
+    Atomically take the oldest queued job, or one whose worker stopped heartbeating.
+    Returns the job id, or None when there is nothing to do.
+    """
+    now = time.time()
+    stale_before = now - app.config['JOB_STALE_SECONDS']
+    conn = get_db()
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        row = conn.execute(
+            "SELECT id FROM jobs WHERE status = 'queued' OR (status = 'running' AND heartbeat < ?) "
+            "ORDER BY created_at LIMIT 1",
+            (stale_before,)
+        ).fetchone()
+        if row is not None:
+            conn.execute(
+                "UPDATE jobs SET status = 'running', worker_pid = ?, heartbeat = ?, "
+                "started_at = COALESCE(started_at, ?) WHERE id = ?",
+                (os.getpid(), now, now, row['id'])
+            )
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return row['id'] if row is not None else None
+
+
+def run_job(job_id):
+    """Verify every unfinished row of a job on the batch pool, recording results as they land."""
+    conn = get_db()
+    job = get_job(job_id)
+    items = conn.execute(
+        "SELECT idx, filename, image_path, label_json FROM job_items WHERE job_id = ? AND result_json IS NULL ORDER BY idx",
+        (job_id,)
+    ).fetchall()
+    filenames = {item['idx']: item['filename'] for item in items}
+    
+    # Jobs are never turned away, but count toward the load requests are admitted against
+    token, _ = admission.acquire('job', force=True)
+    try:
+        # Nobody is waiting on a job, so it always runs at full quality
+        with BatchExecutor(ocr_mode=job['ocr_mode'], quality='full') as executor:
+            for item in items:
+                executor.submit(item['idx'], item['image_path'], json.loads(item['label_json']))
+                for index, result in executor.completed():
+                    record_job_result(job_id, index, result)
+                    history.record(result, filenames[index], 'job', job_id)
+            for index, result in executor.drain():
+                record_job_result(job_id, index, result)
+                history.record(result, filenames[index], 'job', job_id)
+    finally:
+        admission.release(token)
+    
+    with conn:
+        conn.execute("UPDATE jobs SET status = 'done', finished_at = ? WHERE id = ?", (time.time(), job_id))
+
+
+def _job_worker_loop():
+    while True:
+        try:
+            job_id = claim_next_job()
+        except sqlite3.Error:
+            job_id = None
+        if job_id is None:
+            time.sleep(JOB_POLL_INTERVAL * 2)
+            continue
+        try:
+            run_job(job_id)
+        except Exception as e:
+            conn = get_db()
+            with conn:
+                conn.execute(
+                    "UPDATE jobs SET status = 'failed', error = ?, finished_at = ? WHERE id = ?",
+                    (str(e), time.time(), job_id)
+                )
+        finally:
+            # Done or failed, the job's uploaded images are no longer needed
+            shutil.rmtree(os.path.join(app.config['JOBS_FOLDER'], job_id), ignore_errors=True)
+
+
+_job_worker = None
+_job_worker_lock = threading.Lock()
+
+
+def ensure_job_worker():
+    """Start this process's background job runner if it isn't running yet."""
+    global _job_worker
+    with _job_worker_lock:
+        if _job_worker is None or not _job_worker.is_alive():
+            _job_worker = threading.Thread(target=_job_worker_loop, name='job-worker', daemon=True)
+            _job_worker.start()
+
+
+def resume_pending_jobs():
+    """Start the job runner at boot if jobs are queued, or were running when a worker stopped."""
+    try:
+        pending = get_db().execute("SELECT 1 FROM jobs WHERE status IN ('queued', 'running') LIMIT 1").fetchone()
+    except sqlite3.Error:
+        return
+    if pending is not None:
+        ensure_job_worker()
+
+
+# ============================================================================
+# BATCH RESULT STORE
+# ============================================================================
+
+# show= filters for batch pages
+BATCH_RESULT_FILTERS = {
+    'all': '',
+    'failed': 'AND passed = 0',
+    'passed': 'AND passed = 1',
+    'errors': 'AND success = 0',
+}
+
+
+def create_batch_record(batch_id, total):
+    """Start storing a batch's results; also drops batches older than BATCH_RESULTS_TTL."""
+    conn = get_db()
+    expired_before = time.time() - app.config['BATCH_RESULTS_TTL']
+    with conn:
+        expired = [row['id'] for row in conn.execute("SELECT id FROM batches WHERE created_at < ?", (expired_before,))]
+        for expired_id in expired:
+            conn.execute("DELETE FROM batch_results WHERE batch_id = ?", (expired_id,))
+            conn.execute("DELETE FROM batches WHERE id = ?", (expired_id,))
+        conn.execute("INSERT INTO batches (id, total, created_at) VALUES (?, ?, ?)", (batch_id, total, time.time()))
+
+
+def store_batch_results(batch_id, items):
+    """Save finished rows, given as (index, filename, result), in one transaction."""
+    rows = []
+    for index, filename, result in items:
+        stored = {key: value for key, value in result.items() if key != 'extracted_text'}
+        rows.append((batch_id, index, filename, int(bool(result['overall_pass'])), int(bool(result['success'])),
+                     json.dumps(stored), result.get('extracted_text')))
+    conn = get_db()
+    with conn:
+        conn.executemany(
+            "INSERT OR REPLACE INTO batch_results (batch_id, idx, filename, passed, success, result_json, extracted_text) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)", rows
+        )
+
+
+def finish_batch_record(batch_id, total_time):
+    conn = get_db()
+    with conn:
+        conn.execute("UPDATE batches SET total_time = ? WHERE id = ?", (total_time, batch_id))
+
+
+def get_batch_page(batch_id, page=1, show='all', page_size=None):
+    """
+    One page of a stored batch, in CSV order, without extracted text. Returns
+    None for an unknown batch.
+    """
+    if page_size is None:
+        page_size = app.config['BATCH_PAGE_SIZE']
+    if show not in BATCH_RESULT_FILTERS:
+        show = 'all'
+    conn = get_db()
+    batch = conn.execute("SELECT * FROM batches WHERE id = ?", (batch_id,)).fetchone()
+    if batch is None:
+        return None
+    
+    counts = conn.execute(
+        "SELECT COUNT(*) AS done, COALESCE(SUM(passed), 0) AS passed, COALESCE(SUM(1 - success), 0) AS errors "
+        "FROM batch_results WHERE batch_id = ?", (batch_id,)
+    ).fetchone()
+    shown = conn.execute(
+        f"SELECT COUNT(*) FROM batch_results WHERE batch_id = ? {BATCH_RESULT_FILTERS[show]}", (batch_id,)
+    ).fetchone()[0]
+    pages = max(1, -(-shown // page_size))
+    page = min(max(1, page), pages)
+    rows = conn.execute(
+        f"SELECT idx, filename, result_json FROM batch_results WHERE batch_id = ? {BATCH_RESULT_FILTERS[show]} "
+        "ORDER BY idx LIMIT ? OFFSET ?", (batch_id, page_size, (page - 1) * page_size)
+    ).fetchall()
+    
+    return {
+        'batch_id': batch_id,
+        'total': batch['total'],
+        'completed': counts['done'],
+        'passed': counts['passed'],
+        'failed': counts['done'] - counts['passed'],
+        'errors': counts['errors'],
+        'total_time': format_time(batch['total_time']) if batch['total_time'] is not None else None,
+        'show': show,
+        'page': page,
+        'pages': pages,
+        'shown': shown,
+        'rows': [{'index': row['idx'], 'filename': row['filename'], 'result': json.loads(row['result_json'])}
+                 for row in rows],
+    }
+
+
+def get_batch_result_text(batch_id, index):
+    """A stored row's extracted text ('' if it had none), or None if there is no such row."""
+    row = get_db().execute(
+        "SELECT extracted_text FROM batch_results WHERE batch_id = ? AND idx = ?", (batch_id, index)
+    ).fetchone()
+    if row is None:
+        return None
+    return row['extracted_text'] or ''
+
+
+# ============================================================================
+# VERIFICATION HISTORY
+# ============================================================================
+
+class HistoryWriter:
+    """
+    Records served results in the verifications tables without touching the
+    database on the request path: record() only queues the row, and a
+    background thread writes whatever has queued up in one transaction, at
+    most every FLUSH_INTERVAL seconds or BATCH_SIZE rows. If the database falls
+    far behind, new rows are dropped (and counted) rather than held in memory.
+    """
+    
+    BATCH_SIZE = 200
+    FLUSH_INTERVAL = 1.0
+    MAX_QUEUED = 10000
+    # Delete rows past HISTORY_RETENTION_DAYS after this many writes
+    PRUNE_EVERY = 100
+    
+    def __init__(self):
+        self._queue = queue.Queue(maxsize=self.MAX_QUEUED)
+        self._thread = None
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.dropped = 0
+    
+    def record(self, result, filename, source, batch_id=None):
+        if not app.config['HISTORY_ENABLED']:
+            return
+        try:
+            self._queue.put_nowait((time.time(), result, filename, source, batch_id))
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            return
+        self._ensure_thread()
+    
+    def _ensure_thread(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='history-writer', daemon=True)
+                self._thread.start()
+    
+    def _take(self, block):
+        """Up to BATCH_SIZE queued rows; with block, wait for the first and give the rest FLUSH_INTERVAL to arrive."""
+        rows = []
+        deadline = None
+        while len(rows) < self.BATCH_SIZE:
+            try:
+                if not block:
+                    rows.append(self._queue.get_nowait())
+                elif deadline is None:
+                    rows.append(self._queue.get())
+                    deadline = time.time() + self.FLUSH_INTERVAL
+                else:
+                    rows.append(self._queue.get(timeout=max(0, deadline - time.time())))
+            except queue.Empty:
+                break
+        return rows
+    
+    def _run(self):
+        while True:
+            rows = self._take(block=True)
+            try:
+                self._write(rows)
+            except sqlite3.Error:
+                with self._lock:
+                    self.dropped += len(rows)
+    
+    def flush(self):
+        """Write everything queued so far from the calling thread (used at exit)."""
+        while True:
+            rows = self._take(block=False)
+            if not rows:
+                return
+            self._write(rows)
+    
+    def _write(self, rows):
+        conn = get_db()
+        with conn:
+            for created_at, result, filename, source, batch_id in rows:
+                image = result.get('image') or {}
+                quality = result.get('quality') or {}
+                cursor = conn.execute(
+                    "INSERT INTO verifications (created_at, source, batch_id, filename, image_hash, success, "
+                    "overall_pass, ocr_mode, quality, processing_time, timings_json, error) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (created_at, source, batch_id, filename, image.get('sha256'), int(bool(result.get('success'))),
+                     int(bool(result.get('overall_pass'))), result.get('ocr_mode'), quality.get('tier'),
+                     result.get('processing_time'), json.dumps(result.get('timings') or {}), result.get('error'))
+                )
+                conn.executemany(
+                    "INSERT INTO verification_fields (verification_id, field, passed, score, input, details, created_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [(cursor.lastrowid, name, int(bool(field.get('passed'))), field.get('score'),
+                      field.get('input'), field.get('details'), created_at)
+                     for name, field in (result.get('fields') or {}).items()]
+                )
+            self._writes += len(rows)
+            if self._writes >= self.PRUNE_EVERY:
+                self._writes = 0
+                cutoff = time.time() - app.config['HISTORY_RETENTION_DAYS'] * 86400
+                conn.execute("DELETE FROM verification_fields WHERE created_at < ?", (cutoff,))
+                conn.execute("DELETE FROM verifications WHERE created_at < ?", (cutoff,))
+
+
+history = HistoryWriter()
+atexit.register(history.flush)
+
+
+def record_batch_history(events, source, batch_id=None):
+    """Pass a batch event stream through, queueing each result for the history."""
+    filenames = []
+    for event in events:
+        if event[0] == 'rows':
+            filenames = event[1]
+        else:
+            history.record(event[2], filenames[event[1]], source, batch_id)
+        yield event
+
+
+HISTORY_PAGE_LIMIT = 500
+RELATIVE_TIME_UNITS = {'m': 60, 'h': 3600, 'd': 86400, 'w': 7 * 86400}
+
+
+def parse_time_param(value):
+    """
+    Epoch seconds for a since/until parameter: an ISO date or datetime (UTC
+    unless it has an offset), epoch seconds, or a relative age like 90m, 24h,
+    7d or 2w. Raises ValueError.
+    """
+    value = value.strip()
+    match = re.fullmatch(r'(\d+(?:\.\d+)?)([mhdw])', value)
+    if match:
+        return time.time() - float(match.group(1)) * RELATIVE_TIME_UNITS[match.group(2)]
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    moment = datetime.fromisoformat(value)
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.timestamp()
+
+
+def format_timestamp(seconds):
+    return datetime.fromtimestamp(seconds, timezone.utc).isoformat(timespec='seconds').replace('+00:00', 'Z')
+
+
+def history_filters(args):
+    """
+    SQL conditions and parameters for the /api/history query string.
     
-    # City (optional)
-    city_value = label_data.get('city', '')
-    if city_value:
-        passed, score, details = verify_location(city_value, extracted_text, 'city')
+    With `field`, `passed` and `min_score` / `max_score` apply to that field's
+    check; without it, `passed` is the overall outcome. Raises ValueError.
+    """
+    conditions, params = [], []
+    field = args.get('field', '').strip()
+    passed = args.get('passed', '').strip().lower()
+    if passed not in ('', '0', '1', 'true', 'false'):
+        raise ValueError('passed must be 0 or 1')
+    passed = None if passed == '' else int(passed in ('1', 'true'))
+    
+    for name, op in (('since', '>='), ('until', '<')):
+        if args.get(name):
+            conditions.append(f"v.created_at {op} ?")
+            params.append(parse_time_param(args[name]))
+    for name in ('source', 'image_hash', 'batch_id', 'ocr_mode', 'quality'):
+        if args.get(name):
+            conditions.append(f"v.{name} = ?")
+            params.append(args[name])
+    
+    if field:
+        clause = ["f.field = ?", "f.verification_id = v.id"]
+        field_params = [field]
+        if passed is not None:
+            clause.append("f.passed = ?")
+            field_params.append(passed)
+        for name, op in (('min_score', '>='), ('max_score', '<=')):
+            if args.get(name):
+                clause.append(f"f.score {op} ?")
+                field_params.append(float(args[name]))
+        conditions.append(f"EXISTS (SELECT 1 FROM verification_fields f WHERE {' AND '.join(clause)})")
+        params.extend(field_params)
     else:
-        passed, score, details = True, 100, "Optional field not provided"
-    results['fields']['city'] = {
-        'input': city_value,
-        'passed': passed,
-        'score': score,
-        'details': details,
-        'optional': True
+        if args.get('min_score') or args.get('max_score'):
+            raise ValueError('min_score / max_score need a field')
+        if passed is not None:
+            conditions.append("v.overall_pass = ?")
+            params.append(passed)
+    return conditions, params
+
+
+def history_record(row, fields):
+    return {
+        'id': row['id'],
+        'created_at': format_timestamp(row['created_at']),
+        'source': row['source'],
+        'batch_id': row['batch_id'],
+        'filename': row['filename'],
+        'image_hash': row['image_hash'],
+        'success': bool(row['success']),
+        'overall_pass': bool(row['overall_pass']),
+        'ocr_mode': row['ocr_mode'],
+        'quality': row['quality'],
+        'processing_time': row['processing_time'],
+        'timings': json.loads(row['timings_json'] or '{}'),
+        'error': row['error'],
+        'fields': {field['field']: {'passed': bool(field['passed']), 'score': field['score'], 'input': field['input'],
+                                    'details': field['details']} for field in fields},
     }
+
+
+def query_history(args):
+    """Matching history records, newest first, with their per-field results."""
+    conditions, params = history_filters(args)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+    limit = min(max(1, int(args.get('limit', 100))), HISTORY_PAGE_LIMIT)
+    offset = max(0, int(args.get('offset', 0)))
     
-    # Country (optional)
-    country_value = label_data.get('country', '')
-    if country_value:
-        passed, score, details = verify_location(country_value, extracted_text, 'country')
-    else:
-        passed, score, details = True, 100, "Optional field not provided"
-    results['fields']['country'] = {
-        'input': country_value,
-        'passed': passed,
-        'score': score,
-        'details': details,
-        'optional': True
+    conn = get_db()
+    total = conn.execute(f"SELECT COUNT(*) FROM verifications v {where}", params).fetchone()[0]
+    rows = conn.execute(
+        f"SELECT v.* FROM verifications v {where} ORDER BY v.created_at DESC, v.id DESC LIMIT ? OFFSET ?",
+        params + [limit, offset]
+    ).fetchall()
+    fields = {}
+    if rows:
+        placeholders = ','.join('?' * len(rows))
+        for field in conn.execute(
+            f"SELECT * FROM verification_fields WHERE verification_id IN ({placeholders})", [row['id'] for row in rows]
+        ):
+            fields.setdefault(field['verification_id'], []).append(field)
+    return {
+        'total': total,
+        'limit': limit,
+        'offset': offset,
+        'results': [history_record(row, fields.get(row['id'], [])) for row in rows],
+    }
+
+
+def history_summary(args):
+    """Per-field pass/fail counts and mean score over the records matching args."""
+    conditions, params = history_filters(args)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+    conn = get_db()
+    overall = conn.execute(
+        f"SELECT COUNT(*) AS total, COALESCE(SUM(v.overall_pass), 0) AS passed, "
+        f"COALESCE(SUM(1 - v.success), 0) AS errors, AVG(v.processing_time) AS mean_time FROM verifications v {where}",
+        params
+    ).fetchone()
+    fields = conn.execute(
+        f"SELECT f.field, COUNT(*) AS total, SUM(f.passed) AS passed, AVG(f.score) AS mean_score "
+        f"FROM verification_fields f JOIN verifications v ON v.id = f.verification_id {where} "
+        f"GROUP BY f.field ORDER BY f.field", params
+    ).fetchall()
+    return {
+        'total': overall['total'],
+        'passed': overall['passed'],
+        'failed': overall['total'] - overall['passed'],
+        'errors': overall['errors'],
+        'mean_processing_time': round(overall['mean_time'], 4) if overall['mean_time'] is not None else None,
+        'fields': {row['field']: {'total': row['total'], 'passed': row['passed'], 'failed': row['total'] - row['passed'],
+                                  'mean_score': round(row['mean_score'], 1) if row['mean_score'] is not None else None}
+                   for row in fields},
     }
+
+
+# ============================================================================
+# ADMISSION CONTROL
+# ============================================================================
+
+ADMISSION_CLASSES = ('interactive', 'batch', 'job')
+
+
+class AdmissionController:
+    """
+    Host-wide admission control for OCR work, shared by every gunicorn worker.
     
-    # Alcohol content
-    alcohol_value = label_data.get('alcohol_content', '')
-    if alcohol_value:
-        passed, score, details = verify_alcohol_content(alcohol_value, extracted_text)
-    else:
-        passed, score, details = True, 100, "Field not provided (optional)"
+    Each admitted request holds a token file in `directory`, named after its
+    traffic class and weight in units, and flocked for as long as the request
+    runs; a token whose lock can be taken belongs to a dead process and is
+    removed. Single-label ('interactive') requests may use every unit, batches
+    all but `interactive_reserve`. Requests are also refused when the predicted
+    time to serve them exceeds the class's latency limit. Background jobs
+    ('job') are never refused but count toward the load.
+    """
     
-    results['fields']['alcohol_content'] = {
-        'input': alcohol_value,
-        'passed': passed,
-        'score': score,
-        'details': details,
-        'optional': not bool(alcohol_value)  # Required if provided
-    }
-    if alcohol_value and not passed:
-        results['overall_pass'] = False
+    # Assumed seconds per single-label request until one has been timed
+    DEFAULT_SERVICE_TIME = 2.0
+    SERVICE_TIME_WEIGHT = 0.2
+    MAX_RETRY_AFTER = 120
+    # Seconds before an unlocked .new token file counts as abandoned
+    ORPHAN_AGE = 60
     
-    # Government warning
-    passed, score, details = verify_government_warning(extracted_text)
-    results['fields']['government_warning'] = {
-        'input': 'Required',
-        'passed': passed,
-        'score': score,
-        'details': details,
-        'optional': False
-    }
-    if not passed:
-        results['overall_pass'] = False
+    def __init__(self, directory, max_units, interactive_reserve, max_latency, batch_max_latency):
+        self.directory = directory
+        self.max_units = max_units
+        self.interactive_reserve = interactive_reserve
+        self.max_latency = {'interactive': max_latency, 'batch': batch_max_latency}
+        self.service_time = None
+        self._lock = threading.Lock()
     
-    results['processing_time'] = time.time() - start_time
+    def units_for(self, kind):
+        return 1 if kind == 'interactive' else max(1, app.config['BATCH_WORKERS'])
     
-    return results
+    def in_flight(self):
+        """{class: units} held by live tokens, dropping tokens left by dead processes."""
+        units = dict.fromkeys(ADMISSION_CLASSES, 0)
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.token.new'):
+                self._remove_orphaned_new(entry)
+                continue
+            if not entry.name.endswith('.token'):
+                continue
+            try:
+                fd = os.open(entry.path, os.O_RDONLY)
+            except OSError:
+                continue
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                kind, weight = entry.name.split('-')[:2]
+                units[kind] = units.get(kind, 0) + int(weight)
+            else:
+                # Either a dead process's token, or one release() removed since we opened it
+                try:
+                    os.remove(entry.path)
+                except FileNotFoundError:
+                    pass
+            finally:
+                os.close(fd)
+        return units
+    
+    def _remove_orphaned_new(self, entry):
+        """
+        Remove a token left half-created by a process that died between creating
+        and renaming it. A live acquire() holds its .new file for microseconds, so
+        only unlocked ones older than ORPHAN_AGE are touched.
+        """
+        try:
+            if time.time() - entry.stat().st_mtime < self.ORPHAN_AGE:
+                return
+            fd = os.open(entry.path, os.O_RDONLY)
+        except OSError:
+            return
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            os.remove(entry.path)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
+    
+    def _retry_after(self, seconds):
+        return max(1, min(self.MAX_RETRY_AFTER, math.ceil(seconds)))
+    
+    def acquire(self, kind, force=False):
+        """
+        Admit one request of the given class. Returns (token, None) when admitted,
+        or (None, (reason, retry_after_seconds)) when it should be turned away.
+        """
+        if self.max_units <= 0:
+            return None, None
+        weight = self.units_for(kind)
+        service_time = self.service_time or self.DEFAULT_SERVICE_TIME
+        concurrency = max(1, app.config['OCR_SLOTS'])
+        
+        lock_fd = os.open(os.path.join(self.directory, 'admission.lock'), os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(lock_fd, fcntl.LOCK_EX)
+            if not force:
+                load = sum(self.in_flight().values())
+                limit = self.max_units if kind == 'interactive' else self.max_units - self.interactive_reserve
+                if load + weight > limit:
+                    excess = load + weight - limit
+                    return None, ('queue_full', self._retry_after(excess * service_time / concurrency))
+                predicted = service_time * (1 + load / concurrency)
+                if predicted > self.max_latency[kind]:
+                    return None, ('latency', self._retry_after(predicted - self.max_latency[kind]))
+            
+            # Locked before it gets its .token name, so in_flight() never sees it unlocked
+            path = os.path.join(self.directory, f"{kind}-{weight}-{os.getpid()}-{uuid.uuid4().hex}.token")
+            fd = os.open(f"{path}.new", os.O_RDWR | os.O_CREAT, 0o644)
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            os.rename(f"{path}.new", path)
+        finally:
+            os.close(lock_fd)
+        return {'path': path, 'fd': fd, 'kind': kind, 'start': time.time()}, None
+    
+    def release(self, token):
+        if token is None:
+            return
+        try:
+            os.remove(token['path'])
+        except OSError:
+            pass
+        os.close(token['fd'])
+        if token['kind'] == 'interactive':
+            elapsed = time.time() - token['start']
+            with self._lock:
+                if self.service_time is None:
+                    self.service_time = elapsed
+                else:
+                    self.service_time += self.SERVICE_TIME_WEIGHT * (elapsed - self.service_time)
 
 
-def format_time(seconds):
-    """Format time for display."""
-    if seconds < 1:
-        return f"{seconds * 1000:.0f}ms"
-    elif seconds < 60:
-        return f"{seconds:.2f}s"
-    else:
-        mins = int(seconds // 60)
-        secs = seconds % 60
-        return f"{mins}m {secs:.1f}s"
+admission = AdmissionController(
+    app.config['ADMISSION_DIR'],
+    max_units=app.config['ADMISSION_MAX_INFLIGHT'],
+    interactive_reserve=app.config['ADMISSION_INTERACTIVE_RESERVE'],
+    max_latency=app.config['ADMISSION_MAX_LATENCY'],
+    batch_max_latency=app.config['ADMISSION_BATCH_MAX_LATENCY'],
+)
+
+
+def admission_controlled(kind):
+    """
+    Route decorator: admit the request under `kind` before its upload is read,
+    or answer 429 with Retry-After. The token is released when the request
+    (including a streamed response) finishes.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            token, rejection = admission.acquire(kind)
+            if rejection is not None:
+                reason, retry_after = rejection
+                metrics.inc('verifier_admission_rejections_total', kind=kind, reason=reason)
+                message = f'Server is busy, retry in {retry_after}s'
+                if request.path.startswith('/api/'):
+                    response = jsonify({'error': message, 'reason': reason, 'retry_after': retry_after})
+                else:
+                    response = Response(message, mimetype='text/plain')
+                response.status_code = 429
+                response.headers['Retry-After'] = str(retry_after)
+                return response
+            g.admission_token = token
+            return view(*args, **kwargs)
+        return wrapper
+    return decorator
 
 
 # ============================================================================
@@ -983,31 +4613,87 @@ BASE_TEMPLATE = """
                 <button type="submit">Verify All Labels</button>
             </form>
             
-            {% if batch_results %}
+            {% if batch_page %}
             <div class="results">
                 <div class="summary">
                     <div class="summary-card">
-                        <div class="summary-number total">{{ batch_results|length }}</div>
+                        <div class="summary-number total">{{ batch_page.total }}</div>
                         <div class="summary-label">Total Images</div>
                     </div>
                     <div class="summary-card">
-                        <div class="summary-number pass">{{ batch_results|selectattr('result.overall_pass')|list|length }}</div>
+                        <div class="summary-number pass">{{ batch_page.passed }}</div>
                         <div class="summary-label">Passed</div>
                     </div>
                     <div class="summary-card">
-                        <div class="summary-number fail">{{ batch_results|rejectattr('result.overall_pass')|list|length }}</div>
+                        <div class="summary-number fail">{{ batch_page.failed }}</div>
                         <div class="summary-label">Failed</div>
                     </div>
                     <div class="summary-card">
-                        <div class="summary-number time">{{ total_time }}</div>
+                        <div class="summary-number time">{{ batch_page.total_time or '…' }}</div>
                         <div class="summary-label">Total Time</div>
                     </div>
                 </div>
                 
-                {% for item in batch_results %}
-                {{ render_result(item.result, item.filename) }}
+                <div class="result-filters">
+                    {% for value, label in [('all', 'All'), ('failed', 'Failed'), ('passed', 'Passed'), ('errors', 'Errors')] %}
+                    <a href="{{ url_for('batch_view', batch_id=batch_page.batch_id, show=value) }}" class="{{ 'active' if batch_page.show == value }}">{{ label }}</a>
+                    {% endfor %}
+                    <span class="result-count">{{ batch_page.shown }} shown</span>
+                </div>
+                
+                {% for item in batch_page.rows %}
+                {{ render_result(item.result, item.filename, url_for('batch_result_text', batch_id=batch_page.batch_id, index=item.index), item.index) }}
                 {% endfor %}
+                
+                {% if batch_page.pages > 1 %}
+                <div class="pagination">
+                    {% if batch_page.page > 1 %}
+                    <a href="{{ url_for('batch_view', batch_id=batch_page.batch_id, show=batch_page.show, page=batch_page.page - 1) }}">&larr; Previous</a>
+                    {% endif %}
+                    <span>Page {{ batch_page.page }} of {{ batch_page.pages }}</span>
+                    {% if batch_page.page < batch_page.pages %}
+                    <a href="{{ url_for('batch_view', batch_id=batch_page.batch_id, show=batch_page.show, page=batch_page.page + 1) }}">Next &rarr;</a>
+                    {% endif %}
+                </div>
+                {% endif %}
+            </div>
+            {% elif batch_stream is defined %}
+            <div class="results">
+                <div class="summary">
+                    <div class="summary-card">
+                        <div class="summary-number total">{{ batch_total }}</div>
+                        <div class="summary-label">Total Images</div>
+                    </div>
+                    <div class="summary-card">
+                        <div id="batch-summary-passed" class="summary-number pass">…</div>
+                        <div class="summary-label">Passed</div>
+                    </div>
+                    <div class="summary-card">
+                        <div id="batch-summary-failed" class="summary-number fail">…</div>
+                        <div class="summary-label">Failed</div>
+                    </div>
+                    <div class="summary-card">
+                        <div id="batch-summary-time" class="summary-number time">…</div>
+                        <div class="summary-label">Total Time</div>
+                    </div>
+                </div>
+                
+                <!-- Cards arrive in completion order; CSS order puts them back in CSV order -->
+                <div class="streamed-results">
+                    {% for item in batch_stream %}
+                    <div style="order: {{ item.index }}">{{ render_result(item.result, item.filename, url_for('batch_result_text', batch_id=batch_id, index=item.index), item.index) }}</div>
+                    {% endfor %}
+                </div>
+                <div class="result-filters">
+                    <a href="{{ url_for('batch_view', batch_id=batch_id) }}">Paged view</a>
+                    <a href="{{ url_for('batch_view', batch_id=batch_id, show='failed') }}">Failures only</a>
+                </div>
             </div>
+            <script>
+            document.getElementById('batch-summary-passed').textContent = {{ batch_summary.passed|tojson }};
+            document.getElementById('batch-summary-failed').textContent = {{ batch_summary.failed|tojson }};
+            document.getElementById('batch-summary-time').textContent = {{ batch_summary.total_time|tojson }};
+            </script>
             {% endif %}
         </div>
     </div>
@@ -1044,7 +4730,8 @@ BASE_TEMPLATE = """
 """
 
 RESULT_MACRO = """
-{% macro render_result(result, filename) %}
+{% macro render_result(result, filename, text_url=None, card_id=None) %}
+{% set extracted_id = 'extracted-' ~ (card_id if card_id is not none else filename|replace('.', '-')) %}
 <div class="result-card {{ 'pass' if result.overall_pass else 'fail' }}">
     <div class="result-header">
         <span class="result-title">📄 {{ filename }}</span>
@@ -1061,6 +4748,12 @@ RESULT_MACRO = """
     {% if result.error %}
     <p style="color: #ef4444;">{{ result.error }}</p>
     {% else %}
+    {% if result.quality and result.quality.recheck_advised %}
+    <p class="quality-note">Checked at reduced OCR quality ({{ result.quality.tier }}){% if result.quality.reason != 'pinned' %} because the server is busy{% endif %}. Verify again for a full-quality check.</p>
+    {% endif %}
+    {% if result.ocr_source and result.ocr_source.kind == 'perceptual' %}
+    <p class="quality-note">Checked against the text read from a near-identical image seen earlier ({{ result.ocr_source.distance }} of 64 hash bits differ).</p>
+    {% endif %}
     <div class="field-results">
         {% for field_name, field_data in result.fields.items() %}
         <div class="field-row">
@@ -1074,24 +4767,70 @@ RESULT_MACRO = """
         {% endfor %}
     </div>
     
-    <button class="toggle-text" onclick="toggleExtracted('extracted-{{ filename|replace('.', '-') }}')">
+    <button class="toggle-text" onclick="toggleExtracted('{{ extracted_id }}')">
         Toggle Extracted Text
     </button>
-    <div id="extracted-{{ filename|replace('.', '-') }}" class="extracted-text" style="display: none;">{{ result.extracted_text }}</div>
+    {% if text_url %}
+    <div id="{{ extracted_id }}" class="extracted-text" style="display: none;" data-text-url="{{ text_url }}"></div>
+    {% else %}
+    <div id="{{ extracted_id }}" class="extracted-text" style="display: none;">{{ result.extracted_text }}</div>
+    {% endif %}
     {% endif %}
 </div>
 {% endmacro %}
 """
 
+# Registered once so Jinja compiles the page a single time and caches it,
+# instead of re-parsing the template strings on every request
+PAGE_TEMPLATE = 'verifier.html'
+app.jinja_loader = DictLoader({PAGE_TEMPLATE: RESULT_MACRO + BASE_TEMPLATE})
+
 
 # ============================================================================
 # FLASK ROUTES
 # ============================================================================
 
+@app.before_request
+def ensure_process_initialized():
+    # gunicorn.conf.py does this at worker boot; this covers any other server
+    init_server()
+
+
+@app.before_request
+def start_request_metrics():
+    g.metrics_start = time.time()
+    metrics.inc('verifier_http_requests_in_flight')
+
+
+@app.after_request
+def note_response_status(response):
+    g.metrics_status = response.status_code
+    if 'request_id' in g:
+        response.headers['X-Request-ID'] = g.request_id
+    if 'profile_path' in g:
+        response.headers['X-Profile'] = os.path.basename(g.profile_path)
+    return response
+
+
+@app.teardown_request
+def release_admission(exc):
+    admission.release(g.pop('admission_token', None))
+
+
+@app.teardown_request
+def record_request_metrics(exc):
+    if 'metrics_start' not in g:
+        return
+    endpoint = request.endpoint or 'unmatched'
+    metrics.inc('verifier_http_requests_in_flight', -1)
+    metrics.inc('verifier_http_requests_total', endpoint=endpoint, status=g.get('metrics_status', 500))
+    metrics.observe('verifier_http_request_duration_seconds', time.time() - g.metrics_start, endpoint=endpoint)
+    schedule_metrics_flush()
+
+
 @app.route('/')
 def index():
-    template = RESULT_MACRO + BASE_TEMPLATE
-    return render_template_string(template, single_result=None, batch_results=None, active_tab='single')
+    return render_template(PAGE_TEMPLATE, single_result=None, batch_page=None, active_tab='single')
 
 
 @app.route('/static/<path:filename>')
@@ -1100,6 +4839,7 @@ def serve_static(filename):
 
 
 @app.route('/verify/single', methods=['POST'])
+@admission_controlled('interactive')
 def verify_single():
     if 'image' not in request.files:
         return "No image uploaded", 400
@@ -1112,29 +4852,98 @@ def verify_single():
         return "Invalid file type. Please upload PNG, JPG, or JPEG.", 400
     
     filename = secure_filename(file.filename)
-    filepath = os.path.join(app.config['UPLOAD_FOLDER'], f"{uuid.uuid4()}_{filename}")
-    file.save(filepath)
+    image_source = read_upload(file, app.config['UPLOAD_FOLDER'])
     
-    label_data = {
-        'brand_name': request.form.get('brand_name', ''),
-        'class_type': request.form.get('class_type', ''),
-        'alcohol_content': request.form.get('alcohol_content', ''),
-        'net_contents': request.form.get('net_contents', ''),
-        'producer_name': request.form.get('producer_name', ''),
-        'city': request.form.get('city', ''),
-        'country': request.form.get('country', ''),
-    }
+    label_data = label_data_from(request.form)
+    
+    try:
+        with request_profile():
+            result = verify_label(image_source, label_data, ocr_mode=requested_ocr_mode(),
+                                  quality=requested_quality())
+    finally:
+        discard_upload(image_source)
+    history.record(result, filename, 'single')
+    
+    return render_template(PAGE_TEMPLATE, single_result=result, single_filename=filename, batch_page=None, active_tab='single')
+
+
+def requested_batch_output():
+    """'html', 'stream' or 'ndjson' for this /verify/batch request (query string only)."""
+    output = request.args.get('output', '').strip().lower()
+    if output in BATCH_OUTPUTS:
+        return output
+    if request.accept_mimetypes.best == 'application/x-ndjson':
+        return 'ndjson'
+    return app.config['BATCH_OUTPUT'] if app.config['BATCH_OUTPUT'] in BATCH_OUTPUTS else 'html'
+
+
+def batch_response(events, batch_start_time, output):
+    """
+    Render a batch event stream (see iter_batch_entries) in the requested
+    output format, recording each result in the history under the batch's id.
+    """
+    batch_id = uuid.uuid4().hex
+    # NDJSON batches aren't stored, so their history rows have no batch to point at
+    events = record_batch_history(events, 'batch', batch_id if output != 'ndjson' else None)
+    if output == 'html':
+        # Results go to the batch store and the first page is rendered from
+        # there; later pages and extracted text are fetched from /batches/<id>
+        results = collect_batch_results(events)
+        create_batch_record(batch_id, len(results))
+        store_batch_results(batch_id, [(index, item['filename'], item['result']) for index, item in enumerate(results)])
+        finish_batch_record(batch_id, time.time() - batch_start_time)
+        return render_template(PAGE_TEMPLATE, single_result=None, batch_page=get_batch_page(batch_id), active_tab='batch')
+    
+    # The CSV has been read once the 'rows' event is out, so anything wrong
+    # with the upload is still reported as a plain 400 before streaming starts
+    _, filenames = next(events)
+    summary = {}
+    if output == 'stream':
+        create_batch_record(batch_id, len(filenames))
     
-    result = verify_label(filepath, label_data)
-    os.remove(filepath)
+    def stream_results():
+        passed = failed = 0
+        for _, index, result in events:
+            passed += bool(result['overall_pass'])
+            failed += not result['overall_pass']
+            if output == 'stream':
+                store_batch_results(batch_id, [(index, filenames[index], result)])
+            yield {'index': index, 'filename': filenames[index], 'result': result}
+        summary.update(batch_summary(passed, failed, time.time() - batch_start_time))
+        if output == 'stream':
+            finish_batch_record(batch_id, time.time() - batch_start_time)
     
-    template = RESULT_MACRO + BASE_TEMPLATE
-    return render_template_string(template, single_result=result, single_filename=filename, batch_results=None, active_tab='single')
+    if output == 'ndjson':
+        def generate():
+            yield json.dumps({'event': 'start', 'total': len(filenames)}) + '\n'
+            for item in stream_results():
+                yield json.dumps(dict(item, event='result')) + '\n'
+            yield json.dumps(dict(summary, event='done')) + '\n'
+        response = Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+    else:
+        response = Response(stream_template(
+            PAGE_TEMPLATE, single_result=None, batch_page=None, batch_stream=stream_results(),
+            batch_id=batch_id, batch_total=len(filenames), batch_summary=summary, active_tab='batch'
+        ))
+    # Keep reverse proxies from buffering the stream
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
 
 
 @app.route('/verify/batch', methods=['POST'])
+@admission_controlled('batch')
 def verify_batch():
+    """
+    Verify a CSV of label data against uploaded images.
+    
+    Responds with the finished results page, a page that streams in each
+    result card as it completes, or NDJSON records (see requested_batch_output).
+    """
     batch_start_time = time.time()
+    output = requested_batch_output()
+    
+    if request.args.get('stream_upload', '1' if app.config['BATCH_STREAM_UPLOADS'] else '') not in ('', '0'):
+        return verify_batch_streaming(batch_start_time, output)
     
     if 'csv_file' not in request.files:
         return "No CSV file uploaded", 400
@@ -1150,82 +4959,79 @@ def verify_batch():
     if not image_files or image_files[0].filename == '':
         return "No images selected", 400
     
-    saved_images = {}
-    for img_file in image_files:
-        if img_file.filename and allowed_file(img_file.filename):
-            filename = secure_filename(img_file.filename)
-            filepath = os.path.join(app.config['UPLOAD_FOLDER'], f"{uuid.uuid4()}_{filename}")
-            img_file.save(filepath)
-            saved_images[filename] = filepath
-    
     try:
-        csv_content = csv_file.read().decode('utf-8')
-        reader = csv.DictReader(io.StringIO(csv_content))
-        rows = list(reader)
+        rows = parse_batch_csv(csv_file)
     except Exception as e:
         return f"Error parsing CSV: {str(e)}", 400
     
-    results = []
-    for row in rows:
-        image_filename = row.get('image_filename', '').strip()
-        
-        if not image_filename:
-            results.append({
-                'filename': 'Unknown',
-                'result': {
-                    'success': False,
-                    'error': 'No image_filename specified in CSV row',
-                    'overall_pass': False,
-                    'fields': {},
-                    'processing_time': 0
-                }
-            })
-            continue
-        
-        image_path = saved_images.get(image_filename)
-        if not image_path:
-            results.append({
-                'filename': image_filename,
-                'result': {
-                    'success': False,
-                    'error': f'Image file "{image_filename}" not found in uploaded images',
-                    'overall_pass': False,
-                    'fields': {},
-                    'processing_time': 0
-                }
-            })
-            continue
-        
-        label_data = {
-            'brand_name': row.get('brand_name', ''),
-            'class_type': row.get('class_type', ''),
-            'alcohol_content': row.get('alcohol_content', ''),
-            'net_contents': row.get('net_contents', ''),
-            'producer_name': row.get('producer_name', ''),
-            'city': row.get('city', ''),
-            'country': row.get('country', ''),
-        }
-        
-        result = verify_label(image_path, label_data)
-        results.append({
-            'filename': image_filename,
-            'result': result
-        })
+    saved_images = save_uploaded_images(image_files, app.config['UPLOAD_FOLDER'],
+                                        memory_limit=app.config['UPLOAD_MEMORY_LIMIT'])
+    entries = prepare_batch_rows(rows, saved_images)
+    ocr_mode = requested_ocr_mode()
+    quality = requested_quality()
     
-    for filepath in saved_images.values():
+    def events():
         try:
-            os.remove(filepath)
-        except:
-            pass
+            yield from iter_batch_entries(entries, ocr_mode=ocr_mode, quality=quality)
+        finally:
+            for image_source in saved_images.values():
+                discard_upload(image_source)
     
-    total_time = time.time() - batch_start_time
-    total_time_str = format_time(total_time)
+    return batch_response(events(), batch_start_time, output)
+
+
+def verify_batch_streaming(batch_start_time, output):
+    """/verify/batch reading the upload part by part instead of waiting for all of it."""
+    mimetype, options = parse_options_header(request.content_type or '')
+    if mimetype != 'multipart/form-data' or not options.get('boundary'):
+        return "Expected a multipart/form-data upload", 400
     
-    template = RESULT_MACRO + BASE_TEMPLATE
-    return render_template_string(template, single_result=None, batch_results=results, total_time=total_time_str, active_tab='batch')
+    # request.form / request.files would read the whole body first, so only
+    # the query string is consulted up front
+    parts = iter_multipart_parts(request.stream, options['boundary'])
+    events = iter_streaming_batch(parts, ocr_mode=parse_ocr_mode(request.args.get('ocr_mode')),
+                                  quality=parse_quality(request.args.get('quality')))
+    try:
+        first = next(events)
+    except (ValueError, UnicodeDecodeError, csv.Error) as e:
+        return f"Error reading batch upload: {str(e)}", 400
+    
+    def replay():
+        yield first
+        yield from events
+    
+    return batch_response(replay(), batch_start_time, output)
+
+
+@app.route('/batches/<batch_id>')
+def batch_view(batch_id):
+    """A stored batch's results, one page at a time; ?show=failed|passed|errors filters, ?page= pages."""
+    page = get_batch_page(batch_id, page=request.args.get('page', 1, type=int), show=request.args.get('show', 'all'))
+    if page is None:
+        return "Batch not found (results are kept for a limited time)", 404
+    return render_template(PAGE_TEMPLATE, single_result=None, batch_page=page, active_tab='batch')
+
+
+@app.route('/batches/<batch_id>/results/<int:index>/text')
+def batch_result_text(batch_id, index):
+    """Extracted text of one stored batch row, fetched when its card is expanded."""
+    text = get_batch_result_text(batch_id, index)
+    if text is None:
+        return jsonify({'error': 'Result not found'}), 404
+    return jsonify({'extracted_text': text})
+
+
+@app.route('/api/batches/<batch_id>')
+def api_batch_results(batch_id):
+    """JSON form of a stored batch page (same page/show parameters as /batches/<id>)."""
+    page = get_batch_page(batch_id, page=request.args.get('page', 1, type=int), show=request.args.get('show', 'all'))
+    if page is None:
+        return jsonify({'error': 'Batch not found'}), 404
+    return jsonify(page)
 
 
 @app.route('/api/verify', methods=['POST'])
+@admission_controlled('interactive')
 def api_verify():
     """API endpoint for single image verification."""
     if 'image' not in request.files:
@@ -1236,24 +5042,20 @@ def api_verify():
         return jsonify({'error': 'Invalid file'}), 400
     
     filename = secure_filename(file.filename)
-    filepath = os.path.join(app.config['UPLOAD_FOLDER'], f"{uuid.uuid4()}_{filename}")
-    file.save(filepath)
+    image_source = read_upload(file, app.config['UPLOAD_FOLDER'])
     
     if request.content_type and 'application/json' in request.content_type:
         label_data = request.json or {}
     else:
-        label_data = {
-            'brand_name': request.form.get('brand_name', ''),
-            'class_type': request.form.get('class_type', ''),
-            'alcohol_content': request.form.get('alcohol_content', ''),
-            'net_contents': request.form.get('net_contents', ''),
-            'producer_name': request.form.get('producer_name', ''),
-            'city': request.form.get('city', ''),
-            'country': request.form.get('country', ''),
-        }
+        label_data = label_data_from(request.form)
     
-    result = verify_label(filepath, label_data)
-    os.remove(filepath)
+    try:
+        with request_profile():
+            result = verify_label(image_source, label_data, ocr_mode=requested_ocr_mode(),
+                                  quality=requested_quality())
+    finally:
+        discard_upload(image_source)
+    history.record(result, filename, 'api')
     
     return jsonify({
         'filename': filename,
@@ -1261,6 +5063,266 @@ def api_verify():
     })
 
 
+@app.route('/api/verify/batch', methods=['POST'])
+@admission_controlled('batch')
+def api_verify_batch():
+    """
+    Verify a ZIP of label images plus a manifest (CSV with the batch columns, or JSON).
+    
+    The archive is the request body (Content-Type: application/zip) or a multipart
+    `archive` file; a multipart `manifest` file overrides the one in the archive.
+    Members are read one at a time as rows are handed to the batch pool.
+    """
+    batch_start_time = time.time()
+    spooled = None
+    if request.mimetype == 'multipart/form-data':
+        upload = request.files.get('archive')
+        if upload is None or upload.filename == '':
+            return jsonify({'error': 'No archive uploaded'}), 400
+        archive_file = upload.stream
+    else:
+        # The raw body stream can't seek, which zipfile needs
+        spooled = archive_file = tempfile.SpooledTemporaryFile(
+            max_size=app.config['UPLOAD_MEMORY_LIMIT'], dir=app.config['UPLOAD_FOLDER']
+        )
+        shutil.copyfileobj(request.stream, spooled)
+        spooled.seek(0)
+    
+    try:
+        try:
+            archive = zipfile.ZipFile(archive_file)
+        except zipfile.BadZipFile:
+            return jsonify({'error': 'Upload is not a ZIP archive'}), 400
+        
+        with archive:
+            manifest = request.files.get('manifest')
+            try:
+                if manifest is not None and manifest.filename:
+                    if manifest.filename.lower().endswith('.json'):
+                        rows = parse_json_manifest(manifest.read().decode('utf-8-sig'))
+                    else:
+                        rows = parse_batch_csv(manifest)
+                else:
+                    rows = read_zip_manifest(archive)
+            except (ValueError, UnicodeDecodeError, csv.Error, zipfile.BadZipFile) as e:
+                return jsonify({'error': f'Error reading manifest: {str(e)}'}), 400
+            
+            entries = prepare_batch_rows(rows, zip_image_members(archive))
+            reader = zip_member_reader(archive, app.config['UPLOAD_MEMORY_LIMIT'])
+            results = collect_batch_results(record_batch_history(
+                iter_batch_entries(entries, ocr_mode=requested_ocr_mode(), read_source=reader,
+                                   quality=requested_quality()),
+                'zip'
+            ))
+    finally:
+        if spooled is not None:
+            spooled.close()
+    
+    passed = sum(1 for item in results if item['result']['overall_pass'])
+    total_time = time.time() - batch_start_time
+    return jsonify(dict(
+        batch_summary(passed, len(results) - passed, total_time),
+        errors=sum(1 for item in results if not item['result']['success']),
+        timing=batch_timing(results, total_time),
+        results=[dict(item, index=index) for index, item in enumerate(results)],
+    ))
+
+
+@app.route('/api/jobs', methods=['POST'])
+def api_submit_job():
+    """Queue a batch (same CSV + images as /verify/batch) and return its job id immediately."""
+    if 'csv_file' not in request.files or request.files['csv_file'].filename == '':
+        return jsonify({'error': 'No CSV file uploaded'}), 400
+    
+    image_files = request.files.getlist('images')
+    if not image_files or image_files[0].filename == '':
+        return jsonify({'error': 'No images uploaded'}), 400
+    
+    try:
+        rows = parse_batch_csv(request.files['csv_file'])
+    except Exception as e:
+        return jsonify({'error': f'Error parsing CSV: {str(e)}'}), 400
+    
+    # Images stay on disk until the job finishes; one folder per job so cleanup is one rmtree
+    job_id = uuid.uuid4().hex
+    job_folder = os.path.join(app.config['JOBS_FOLDER'], job_id)
+    os.makedirs(job_folder, exist_ok=True)
+    saved_images = save_uploaded_images(image_files, job_folder)
+    entries = prepare_batch_rows(rows, saved_images)
+    create_job(job_id, entries, ocr_mode=requested_ocr_mode())
+    ensure_job_worker()
+    
+    return jsonify({
+        'job_id': job_id,
+        'status': 'queued',
+        'total': len(entries),
+        'status_url': f'/api/jobs/{job_id}',
+        'stream_url': f'/api/jobs/{job_id}/stream',
+    }), 202
+
+
+@app.route('/api/jobs/<job_id>')
+def api_job_status(job_id):
+    """Progress counts for a job; add ?results=1 to include finished rows in CSV order."""
+    job = get_job(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    ensure_job_worker()
+    
+    status = job_status(job)
+    if request.args.get('results'):
+        status['results'] = sorted(job_results_after(job_id), key=lambda item: item['index'])
+    return jsonify(status)
+
+
+@app.route('/api/jobs/<job_id>/stream')
+def api_job_stream(job_id):
+    """
+    NDJSON stream of a job's per-label results as they complete.
+    
+    Ends with a 'done' event. Long-running jobs end the stream with a 'reconnect'
+    event before the gunicorn timeout; resume with ?after=<seq>.
+    """
+    job = get_job(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    ensure_job_worker()
+    after = request.args.get('after', 0, type=int)
+    
+    def generate(after):
+        deadline = time.time() + app.config['JOB_STREAM_MAX_SECONDS']
+        while True:
+            for item in job_results_after(job_id, after):
+                after = item['seq']
+                yield json.dumps(dict(item, event='result')) + '\n'
+            job = get_job(job_id)
+            if job['status'] in JOB_FINISHED_STATES and after >= job['completed']:
+                yield json.dumps({'event': 'done', 'job': job_status(job)}) + '\n'
+                return
+            if time.time() >= deadline:
+                yield json.dumps({'event': 'reconnect', 'after': after}) + '\n'
+                return
+            time.sleep(JOB_POLL_INTERVAL)
+    
+    return Response(generate(after), mimetype='application/x-ndjson')
+
+
+@app.route('/api/history')
+def api_history():
+    """
+    Recorded results, newest first. Filters: field, passed, min_score, max_score,
+    since, until (ISO dates, epoch seconds or ages like 7d), source, image_hash,
+    batch_id, ocr_mode, quality; paged with limit / offset.
+    """
+    try:
+        return jsonify(query_history(request.args))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+
+@app.route('/api/history/summary')
+def api_history_summary():
+    """Pass/fail counts and mean score per field, with the same filters as /api/history."""
+    try:
+        return jsonify(history_summary(request.args))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+
+@app.route('/api/history/<int:record_id>')
+def api_history_record(record_id):
+    """One history record with its per-field results."""
+    conn = get_db()
+    row = conn.execute("SELECT * FROM verifications WHERE id = ?", (record_id,)).fetchone()
+    if row is None:
+        return jsonify({'error': 'Record not found'}), 404
+    fields = conn.execute("SELECT * FROM verification_fields WHERE verification_id = ?", (record_id,)).fetchall()
+    return jsonify(history_record(row, fields))
+
+
+@app.route('/api/stats')
+def api_stats():
+    """Runtime counters for this worker."""
+    return jsonify({
+        'ocr_cache': ocr_cache.get_stats() if ocr_cache is not None else None,
+        'ocr_backend': get_ocr_backend().get_stats(),
+        'ocr_governor': ocr_governor.get_stats(),
+        'history': {'queued': history._queue.qsize(), 'dropped': history.dropped},
+        'perceptual_index': perceptual_index.get_stats() if perceptual_index is not None else None,
+    })
+
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Prometheus metrics summed over every worker process."""
+    # This process's OCR cache counters as of now, not the last timed flush
+    flush_metrics()
+    totals = metrics.collect()
+    pending = get_db().execute(
+        "SELECT COUNT(*) FROM job_items JOIN jobs ON jobs.id = job_items.job_id "
+        "WHERE jobs.status IN ('queued', 'running') AND job_items.result_json IS NULL"
+    ).fetchone()[0]
+    totals[MetricsStore._key('verifier_job_queue_depth', {})] = pending
+    if admission.max_units > 0:
+        for kind, units in admission.in_flight().items():
+            totals[MetricsStore._key('verifier_admission_units_in_flight', {'kind': kind})] = units
+    return Response(render_metrics(totals), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+_process_initialized = False
+_server_initialized = False
+_process_init_lock = threading.Lock()
+
+
+def init_process():
+    """
+    One-time setup before serving or verifying: shared directories, the
+    database and the OCR backend. Importing the module does none of it; the
+    server entry points (through init_server) and the benchmark commands that
+    verify labels call this (later calls do nothing). Batch pool processes
+    never do, as the process that started them already has.
+    """
+    global _process_initialized
+    with _process_init_lock:
+        if _process_initialized:
+            return
+        _init_process()
+        _process_initialized = True
+
+
+def _init_process():
+    directories = [app.config['UPLOAD_FOLDER'], app.config['JOBS_FOLDER'], metrics.directory]
+    if ocr_cache is not None:
+        directories.append(ocr_cache.directory)
+    if ocr_governor.slots > 0:
+        directories.append(ocr_governor.directory)
+    if admission.max_units > 0:
+        directories.append(admission.directory)
+    for directory in directories:
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+    
+    init_db()
+    if app.config['OCR_PRELOAD']:
+        preload_ocr_backend()
+
+
+def init_server():
+    """
+    init_process, then start the job runner if jobs are queued or were left
+    running. Only processes that serve requests call this, so a CLI that
+    imports the module can't claim a job and exit halfway through it.
+    """
+    global _server_initialized
+    init_process()
+    with _process_init_lock:
+        if _server_initialized:
+            return
+        _server_initialized = True
+    resume_pending_jobs()
+
+
 if __name__ == '__main__':
+    init_server()
     port = int(os.environ.get('PORT', 5000))
     app.run(host='0.0.0.0', port=port, debug=False)
@@ -0,0 +1,432 @@
+"""
+Benchmarks for the Alcohol Label Verifier.
+
+Usage:
+    python benchmark.py corrections [--sizes 2000 20000 200000] [--repeat 5] [--fuzz 20000]
+    python benchmark.py fuzzy [--synthetic]
+    python benchmark.py warning [--synthetic] [--repeat 50] [--extra-variants 0 10 40 100]
+    python benchmark.py backends [--images N] [--rounds 2]
+    python benchmark.py run [--repeat 3] [--ocr-mode full] [--quality full] [--cache] [--output report.json]
+    python benchmark.py compare BASE.json NEW.json [--threshold 0.2] [--min-ms 5]
+
+corrections: times the compiled correction engines against the original
+per-entry replace loops on synthetic long OCR text, and checks that both
+produce identical output, there and on --fuzz short strings of misreads run
+together without spaces.
+
+fuzzy: checks that fuzzy_partial_ratio returns exactly the same scores as the
+original sliding-window implementation for every CSV field against the OCR
+output of every test_data image, and times both. Images that produce no text
+(e.g. tesseract not installed) fall back to synthetic label text; --synthetic
+skips OCR entirely.
+
+warning: checks that the government warning keyword matcher finds the same
+keywords as the original per-variant substring scans, on test_data OCR output,
+partial/garbled warnings and labels with no warning, and times both. Each
+--extra-variants count adds that many synthetic misreads per keyword to show
+how both approaches scale with the variant list.
+
+backends: runs every OCR strategy on the test_data images through each
+available OCR backend (pytesseract subprocesses, resident tesserocr engines)
+with the OCR cache bypassed, and compares per-call latency. The first call
+of each backend includes its start-up cost and is reported separately.
+
+run: end-to-end suite. Every row of test_data/test_batch_clean.csv goes
+through verify_label `--repeat` times with the OCR cache disabled (unless
+--cache). It records wall time and per-stage time (decode, each preprocessing
+strategy, each tesseract pass, each verifier) with p50/p95, and checks each
+file against its expected pass/fail outcome. It writes a JSON report.
+
+compare: reads two `run` reports and flags p50 latency regressions (overall,
+per file and per stage) beyond --threshold and --min-ms, and any change in
+outcome. It exits 1 if anything was flagged.
+
+The corrections, fuzzy and warning checks reuse the reference implementations
+and seeded inputs in equivalence_check.py, which runs them without OCR or
+timing and must pass before merging.
+"""
+
+import argparse
+import glob
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+import app as verifier
+from equivalence_check import (
+    CORRECTION_CASES, TEST_DATA, check_corrections, load_batch_rows, run_together_misreads,
+    sliding_window_partial_ratio, substring_scan_keywords, synthetic_label_text, synthetic_ocr_text,
+    verifier_pairs, warning_texts as synthetic_warning_texts, warning_variants,
+)
+
+# Expected outcome per test image: (overall pass, fields expected to fail).
+# None for the fields means only the overall outcome is checked.
+EXPECTED_OUTCOMES = {
+    'test_01_perfect_match.png': (True, []),
+    'test_02_case_difference.png': (True, []),
+    'test_03_wrong_abv.png': (False, ['alcohol_content']),
+    'test_04_missing_warning.png': (False, ['government_warning']),
+    'test_05_wrong_volume.png': (False, ['net_contents']),
+    'test_06_beer_correct.png': (True, []),
+    'test_07_wrong_brand.png': (False, ['brand_name']),
+    'test_08_import_correct.png': (True, []),
+    'test_09_vodka_correct.png': (True, []),
+    'test_10_multiple_errors.png': (False, None),
+}
+
+
+def test_data_texts(synthetic=False):
+    """(name, extracted text) for every test_data image."""
+    rows = {row['image_filename']: row for row in load_batch_rows()}
+    if not synthetic:
+        verifier.init_process()
+    texts = []
+    for path in sorted(glob.glob(os.path.join(TEST_DATA, '*.png'))):
+        name = os.path.basename(path)
+        text = '' if synthetic else verifier.extract_text_from_image(path)
+        if not text:
+            row = rows.get(name, next(iter(rows.values())))
+            text = synthetic_label_text(row)
+            name += ' (synthetic)'
+        texts.append((name, text))
+    return texts
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile in milliseconds (values in seconds)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return round(ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] * 1000, 2)
+
+
+def latency_summary(values):
+    return {
+        'p50_ms': percentile(values, 0.5),
+        'p95_ms': percentile(values, 0.95),
+        'mean_ms': round(sum(values) / len(values) * 1000, 2) if values else None,
+        'samples': len(values),
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def best_time(func, text, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(text)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+# ============================================================================
+# COMMANDS
+# ============================================================================
+
+def cmd_corrections(args):
+    print(f"{'engine':<8} {'chars':>8} {'loop ms':>10} {'compiled ms':>12} {'speedup':>8}  identical")
+    mismatches = 0
+    for name, old_func, new_func, corrections_dict in CORRECTION_CASES:
+        for size in args.sizes:
+            text = synthetic_ocr_text(size, corrections_dict)
+            identical = old_func(text) == new_func(text)
+            mismatches += not identical
+            old_time = best_time(old_func, text, args.repeat)
+            new_time = best_time(new_func, text, args.repeat)
+            print(f"{name:<8} {len(text):>8} {old_time * 1000:>10.2f} {new_time * 1000:>12.2f} "
+                  f"{old_time / new_time:>7.1f}x  {'yes' if identical else 'NO'}")
+    
+    print(f"\nrun-together misreads ({args.fuzz} per engine)")
+    for name, old_func, new_func, corrections_dict in CORRECTION_CASES:
+        samples = run_together_misreads(corrections_dict, args.fuzz)
+        differ = check_corrections(old_func, new_func, samples)
+        mismatches += bool(differ)
+        print(f"{name:<8} {len(differ):>6} differ" + (f"  e.g. {differ[0][0]!r}: loop {differ[0][1]!r}, "
+                                                     f"compiled {differ[0][2]!r}" if differ else ''))
+    return 1 if mismatches else 0
+
+
+def cmd_fuzzy(args):
+    rows = load_batch_rows()
+    texts = test_data_texts(args.synthetic)
+    checked = mismatches = 0
+    old_total = new_total = 0.0
+    for name, raw in texts:
+        pairs = verifier_pairs(rows, raw)
+        for needle, haystack in pairs:
+            start = time.perf_counter()
+            expected = sliding_window_partial_ratio(needle, haystack)
+            old_total += time.perf_counter() - start
+            start = time.perf_counter()
+            actual = verifier.fuzzy_partial_ratio(needle, haystack)
+            new_total += time.perf_counter() - start
+            checked += 1
+            if actual != expected:
+                mismatches += 1
+                print(f"MISMATCH {name}: {needle!r} expected {expected}, got {actual}")
+        print(f"{name:<45} {len(pairs)} pairs")
+
+    print(f"\n{checked} pairs, {mismatches} mismatches")
+    print(f"sliding window: {old_total * 1000:.1f} ms   pruned: {new_total * 1000:.1f} ms   "
+          f"speedup: {old_total / new_total:.1f}x")
+    return 1 if mismatches else 0
+
+
+def warning_texts(synthetic=False):
+    """(group, text) pairs: test_data OCR output, garbled partial warnings, labels without a warning."""
+    return [('test_data', text) for _, text in test_data_texts(synthetic)] + synthetic_warning_texts()
+
+
+def cmd_warning(args):
+    texts = [(group, verifier.LabelText(raw).alnum_nospace) for group, raw in warning_texts(args.synthetic)]
+    groups = list(dict.fromkeys(group for group, _ in texts))
+    mismatches = 0
+    print(f"{'variants':>8} {'texts':<12} {'scans us':>10} {'matcher us':>11} {'speedup':>8}")
+    for extra in args.extra_variants:
+        variants = warning_variants(extra)
+        matcher = verifier.KeywordMatcher(verifier.WARNING_KEYWORDS, variants)
+        scan = lambda text: substring_scan_keywords(text, variants)
+        total = sum(len(spellings) for spellings in variants.values())
+        for group in groups:
+            old_total = new_total = 0.0
+            members = [text for g, text in texts if g == group]
+            for text in members:
+                expected = scan(text)
+                actual = matcher.find(text)
+                if actual != expected:
+                    mismatches += 1
+                    print(f"MISMATCH ({group}): expected {sorted(expected)}, got {sorted(actual)}")
+                old_total += best_time(scan, text, args.repeat)
+                new_total += best_time(matcher.find, text, args.repeat)
+            print(f"{total:>8} {group:<12} {old_total / len(members) * 1e6:>10.1f} "
+                  f"{new_total / len(members) * 1e6:>11.1f} {old_total / new_total:>7.1f}x")
+    print(f"\n{mismatches} mismatches")
+    return 1 if mismatches else 0
+
+
+def cmd_backends(args):
+    verifier.init_process()
+    paths = sorted(glob.glob(os.path.join(TEST_DATA, '*.png')))[:args.images]
+    images = []
+    for path in paths:
+        image, _ = verifier.load_image(path)
+        image, _ = verifier.normalize_image(image)
+        images.append(image)
+    passes = [(preprocess(image), verifier.tesseract_config(image))
+              for image in images for _, preprocess in verifier.OCR_STRATEGIES]
+    
+    print(f"{'backend':<12} {'first ms':>9} {'calls':>6} {'mean ms':>8} {'p50 ms':>7} {'p95 ms':>7}")
+    for name in verifier.OCR_BACKENDS:
+        try:
+            start = time.perf_counter()
+            backend = verifier.create_ocr_backend(name)
+            backend.image_to_string(*passes[0])
+            first = time.perf_counter() - start
+        except Exception as e:
+            print(f"{name:<12} unavailable: {e}")
+            continue
+        backend = verifier.create_ocr_backend(name)
+        backend.preload()
+        for _ in range(args.rounds):
+            for image, config in passes:
+                backend.image_to_string(image, config)
+        stats = backend.get_stats()
+        print(f"{name:<12} {first * 1000:>9.1f} {stats['calls']:>6} {stats['mean_ms']:>8} "
+              f"{stats['p50_ms']:>7} {stats['p95_ms']:>7}")
+    return 0
+
+
+def cmd_run(args):
+    if not args.cache:
+        verifier.ocr_cache = None
+    verifier.init_process()
+    rows = [row for row in load_batch_rows() if os.path.exists(os.path.join(TEST_DATA, row['image_filename']))]
+    
+    files = {}
+    all_walls = []
+    all_stages = defaultdict(list)
+    correct = 0
+    print(f"{'file':<32} {'expected':>8} {'got':>6} {'p50 ms':>9} {'p95 ms':>9}")
+    for row in rows:
+        filename = row['image_filename']
+        label_data = verifier.label_data_from(row)
+        walls = []
+        stages = defaultdict(list)
+        result = None
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            with verifier.record_stages() as timings:
+                result = verifier.verify_label(os.path.join(TEST_DATA, filename), label_data, ocr_mode=args.ocr_mode,
+                                               quality=args.quality)
+            walls.append(time.perf_counter() - start)
+            per_run = defaultdict(float)
+            for stage, seconds in timings:
+                per_run[stage] += seconds
+            for stage, seconds in per_run.items():
+                stages[stage].append(seconds)
+                all_stages[stage].append(seconds)
+        all_walls.extend(walls)
+        
+        failed_fields = sorted(name for name, field in result['fields'].items() if not field['passed'])
+        expected_pass, expected_failed = EXPECTED_OUTCOMES.get(filename, (None, None))
+        is_correct = None
+        if expected_pass is not None:
+            is_correct = result['overall_pass'] == expected_pass
+            if expected_failed is not None and result['success']:
+                is_correct = is_correct and failed_fields == sorted(expected_failed)
+            correct += is_correct
+        
+        files[filename] = {
+            'expected_pass': expected_pass,
+            'expected_failed_fields': expected_failed,
+            'passed': result['overall_pass'],
+            'success': result['success'],
+            'failed_fields': failed_fields,
+            'correct': is_correct,
+            'wall': latency_summary(walls),
+            'stages': {stage: latency_summary(values) for stage, values in sorted(stages.items())},
+        }
+        got = 'pass' if result['overall_pass'] else 'fail'
+        expected = {True: 'pass', False: 'fail', None: '?'}[expected_pass]
+        mark = '' if is_correct in (True, None) else '  <-- unexpected'
+        print(f"{filename:<32} {expected:>8} {got:>6} {files[filename]['wall']['p50_ms']:>9} "
+              f"{files[filename]['wall']['p95_ms']:>9}{mark}")
+    
+    checked = sum(1 for item in files.values() if item['correct'] is not None)
+    report = {
+        'meta': {
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'revision': git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'ocr_mode': args.ocr_mode or verifier.app.config['OCR_MODE'],
+            'quality': args.quality,
+            'ocr_backend': verifier.get_ocr_backend().name,
+            'ocr_parallelism': verifier.app.config['OCR_PARALLELISM'],
+            'cache': bool(args.cache),
+            'repeat': args.repeat,
+        },
+        'summary': {
+            'files': len(files),
+            'correct': correct,
+            'checked': checked,
+            'accuracy': round(correct / checked, 3) if checked else None,
+            'wall': latency_summary(all_walls),
+            'stages': {stage: latency_summary(values) for stage, values in sorted(all_stages.items())},
+        },
+        'files': files,
+    }
+    
+    print(f"\naccuracy {correct}/{checked}   wall p50 {report['summary']['wall']['p50_ms']} ms   "
+          f"p95 {report['summary']['wall']['p95_ms']} ms")
+    print(f"\n{'stage':<32} {'p50 ms':>9} {'p95 ms':>9}")
+    for stage, summary in report['summary']['stages'].items():
+        print(f"{stage:<32} {summary['p50_ms']:>9} {summary['p95_ms']:>9}")
+    
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nreport written to {args.output}")
+    return 0
+
+
+def cmd_compare(args):
+    with open(args.base) as f:
+        base = json.load(f)
+    with open(args.new) as f:
+        new = json.load(f)
+    
+    flagged = []
+    
+    def check_latency(label, old, current):
+        if not old or not current or old.get('p50_ms') is None or current.get('p50_ms') is None:
+            return
+        delta = current['p50_ms'] - old['p50_ms']
+        if delta > args.min_ms and delta > old['p50_ms'] * args.threshold:
+            flagged.append(f"SLOWER  {label}: p50 {old['p50_ms']} -> {current['p50_ms']} ms "
+                           f"(+{delta / old['p50_ms'] * 100 if old['p50_ms'] else float('inf'):.0f}%)")
+    
+    check_latency('overall', base['summary']['wall'], new['summary']['wall'])
+    for stage, summary in new['summary']['stages'].items():
+        check_latency(f"stage {stage}", base['summary']['stages'].get(stage), summary)
+    
+    for filename, current in new['files'].items():
+        old = base['files'].get(filename)
+        if old is None:
+            continue
+        check_latency(filename, old['wall'], current['wall'])
+        if old['passed'] != current['passed'] or old['failed_fields'] != current['failed_fields']:
+            flagged.append(f"OUTCOME {filename}: {'pass' if old['passed'] else 'fail'} {old['failed_fields']} -> "
+                           f"{'pass' if current['passed'] else 'fail'} {current['failed_fields']}")
+    
+    old_accuracy, new_accuracy = base['summary']['accuracy'], new['summary']['accuracy']
+    if old_accuracy != new_accuracy:
+        flagged.append(f"ACCURACY {old_accuracy} -> {new_accuracy}")
+    
+    print(f"base: {base['meta'].get('revision')} {base['meta']['created']}   "
+          f"new: {new['meta'].get('revision')} {new['meta']['created']}")
+    print(f"wall p50 {base['summary']['wall']['p50_ms']} -> {new['summary']['wall']['p50_ms']} ms   "
+          f"accuracy {old_accuracy} -> {new_accuracy}")
+    for line in flagged:
+        print(line)
+    if not flagged:
+        print("no regressions")
+    return 1 if flagged else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    corrections = subparsers.add_parser('corrections', help='compiled correction engine vs sequential loops')
+    corrections.add_argument('--sizes', type=int, nargs='+', default=[2000, 20000, 200000])
+    corrections.add_argument('--repeat', type=int, default=5)
+    corrections.add_argument('--fuzz', type=int, default=20000, help='run-together misread samples per engine')
+    corrections.set_defaults(func=cmd_corrections)
+
+    fuzzy = subparsers.add_parser('fuzzy', help='fuzzy_partial_ratio equivalence and speed over test_data')
+    fuzzy.add_argument('--synthetic', action='store_true', help='use synthetic label text instead of running OCR')
+    fuzzy.set_defaults(func=cmd_fuzzy)
+
+    warning = subparsers.add_parser('warning', help='government warning keyword matcher vs substring scans')
+    warning.add_argument('--synthetic', action='store_true', help='use synthetic label text instead of running OCR')
+    warning.add_argument('--repeat', type=int, default=50)
+    warning.add_argument('--extra-variants', type=int, nargs='+', default=[0, 10, 40, 100])
+    warning.set_defaults(func=cmd_warning)
+
+    backends = subparsers.add_parser('backends', help='per-call OCR latency of each OCR backend')
+    backends.add_argument('--images', type=int, default=3, help='number of test_data images to OCR')
+    backends.add_argument('--rounds', type=int, default=2)
+    backends.set_defaults(func=cmd_backends)
+
+    run = subparsers.add_parser('run', help='end-to-end latency and accuracy suite over test_data')
+    run.add_argument('--repeat', type=int, default=3)
+    run.add_argument('--ocr-mode', choices=verifier.OCR_MODES, default=None)
+    run.add_argument('--quality', choices=list(verifier.QUALITY_TIERS), default='full')
+    run.add_argument('--cache', action='store_true', help='leave the OCR cache enabled')
+    run.add_argument('--output', default='benchmark_report.json')
+    run.set_defaults(func=cmd_run)
+
+    compare = subparsers.add_parser('compare', help='flag regressions between two run reports')
+    compare.add_argument('base')
+    compare.add_argument('new')
+    compare.add_argument('--threshold', type=float, default=0.2, help='relative p50 slowdown to flag')
+    compare.add_argument('--min-ms', type=float, default=5.0, help='ignore slowdowns smaller than this')
+    compare.set_defaults(func=cmd_compare)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,330 @@
+"""
+Equivalence checks for the optimized text matchers in app.py.
+
+Usage:
+    python equivalence_check.py [--seed 0] [--pairs 400] [--fuzz 20000]
+
+Each optimized routine must return exactly what the original implementation
+returned. This script keeps those originals (the per-entry correction loops,
+the sliding-window partial ratio and the per-variant warning substring scans)
+and compares them with app.py on seeded synthetic input, so a run is
+deterministic and needs neither tesseract nor test_data OCR:
+
+fuzzy: fuzzy_partial_ratio against the sliding window, on the (needle,
+haystack) pairs the verifiers score for every test_data CSV row, plus --pairs
+seeded pairs of misread field values against noisy label text.
+
+corrections: the compiled correction engines against the sequential loops, on
+synthetic long OCR text and on --fuzz short strings of misreads run together
+without spaces.
+
+warning: the government warning KeywordMatcher against the substring scans, on
+garbled partial warnings and labels with no warning, with 0, 10, 40 and 100
+extra synthetic misreads per keyword.
+
+It prints each mismatch and exits 1 if there was any. benchmark.py reuses
+these references and inputs to time the same comparisons.
+"""
+
+import argparse
+import csv
+import os
+import random
+import re
+import sys
+from difflib import SequenceMatcher
+
+import app as verifier
+
+TEST_DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'test_data')
+
+
+# ============================================================================
+# REFERENCE IMPLEMENTATIONS (the original sequential loops)
+# ============================================================================
+
+def sequential_corrections(text, corrections_dict):
+    if not text:
+        return ""
+    result = text.lower()
+    for wrong, correct in corrections_dict.items():
+        result = result.replace(wrong.lower(), correct)
+    return result
+
+
+def sequential_brand_corrections(text):
+    result = sequential_corrections(text, verifier.BRAND_CORRECTIONS)
+    for word in verifier.RN_TO_M_WORDS:
+        result = result.replace(word.replace('m', 'rn'), word)
+    return result
+
+
+def sequential_case_insensitive_corrections(text, corrections_dict):
+    result = text
+    for wrong, correct in corrections_dict.items():
+        pattern = re.compile(re.escape(wrong), re.IGNORECASE)
+        result = pattern.sub(correct, result)
+    return result
+
+
+def sliding_window_partial_ratio(s1, s2):
+    if not s1 or not s2:
+        return 0
+    s1_lower = s1.lower()
+    s2_lower = s2.lower()
+    shorter, longer = (s1_lower, s2_lower) if len(s1_lower) <= len(s2_lower) else (s2_lower, s1_lower)
+    if shorter in longer:
+        return 100
+    if len(shorter) == 0:
+        return 0
+    best_ratio = 0
+    for i in range(len(longer) - len(shorter) + 1):
+        window = longer[i:i + len(shorter)]
+        ratio = SequenceMatcher(None, shorter, window).ratio() * 100
+        best_ratio = max(best_ratio, ratio)
+    return int(best_ratio)
+
+
+def substring_scan_keywords(text_nospace, variants):
+    found = set()
+    for keyword in verifier.WARNING_KEYWORDS:
+        for spelling in [keyword] + variants.get(keyword, []):
+            if spelling.replace(' ', '') in text_nospace:
+                found.add(keyword)
+                break
+    return found
+
+
+CORRECTION_CASES = [
+    ('brand', sequential_brand_corrections, verifier.apply_brand_corrections, verifier.BRAND_CORRECTIONS),
+    ('type', lambda t: sequential_corrections(t, verifier.TYPE_CORRECTIONS),
+     verifier.apply_type_corrections, verifier.TYPE_CORRECTIONS),
+    ('volume', lambda t: sequential_case_insensitive_corrections(t, verifier.VOLUME_CORRECTIONS),
+     verifier.apply_volume_corrections, verifier.VOLUME_CORRECTIONS),
+    ('alcohol', lambda t: sequential_case_insensitive_corrections(t, verifier.ALCOHOL_CORRECTIONS),
+     verifier.apply_alcohol_corrections, verifier.ALCOHOL_CORRECTIONS),
+]
+
+
+# ============================================================================
+# SEEDED SYNTHETIC INPUT
+# ============================================================================
+
+SAMPLE_LABEL_TEXT = (
+    "SILVER OAK RANCH California Cabernet Sauvignon 14.8% ALC/VOL 750 mL "
+    "Produced and bottled by Silver Oak Winery Alexander Valley, CA Product of USA "
+)
+
+# Characters OCR commonly confuses, used to misread synthetic text
+MISREAD_CHARS = '1l0oqce3rn'
+
+
+def load_batch_rows():
+    with open(os.path.join(TEST_DATA, 'test_batch_clean.csv'), newline='') as f:
+        return list(csv.DictReader(f))
+
+
+def synthetic_label_text(row):
+    """Label-like OCR text for a CSV row, four times over like the multi-strategy output."""
+    fields = [row.get(field) or '' for field in verifier.LABEL_FIELDS]
+    return " ".join([" ".join(fields) + " " + verifier.GOVERNMENT_WARNING] * 4)
+
+
+def synthetic_ocr_text(size, corrections_dict, seed=0):
+    """Label-like text of roughly `size` characters with known OCR misreads mixed in."""
+    rng = random.Random(seed)
+    misreads = list(corrections_dict)
+    words = (SAMPLE_LABEL_TEXT + verifier.GOVERNMENT_WARNING).split()
+    out = []
+    length = 0
+    while length < size:
+        word = rng.choice(misreads) if rng.random() < 0.15 else rng.choice(words)
+        out.append(word)
+        length += len(word) + 1
+    return " ".join(out)
+
+
+def run_together_misreads(corrections_dict, count, seed=0):
+    """
+    Short strings made of misreads, their corrections and stray letters run
+    together with no space (or an occasional one), in mixed case: where one
+    entry's rewrite can create or break another entry's key.
+    """
+    rng = random.Random(seed)
+    pieces = list(corrections_dict) + list(corrections_dict.values())
+    samples = []
+    for _ in range(count):
+        parts = []
+        for _ in range(rng.randint(2, 4)):
+            roll = rng.random()
+            if roll < 0.7:
+                piece = rng.choice(pieces)
+                # Pieces cut at either end, so they overlap their neighbours
+                start = rng.randint(0, len(piece) // 3)
+                piece = piece[start:len(piece) - rng.randint(0, len(piece) // 3)]
+            elif roll < 0.9:
+                piece = ''.join(rng.choice('aeilnorsuv01|') for _ in range(rng.randint(1, 3)))
+            else:
+                piece = ' '
+            parts.append(''.join(ch.upper() if rng.random() < 0.2 else ch for ch in piece))
+        samples.append(''.join(parts))
+    return samples
+
+
+def misread(text, rng, rate=0.1):
+    """text with about `rate` of its characters substituted, dropped or doubled."""
+    out = []
+    for ch in text:
+        roll = rng.random()
+        if roll < rate / 2:
+            out.append(rng.choice(MISREAD_CHARS))
+        elif roll < rate * 3 / 4:
+            continue
+        elif roll < rate:
+            out.append(ch + ch)
+        else:
+            out.append(ch)
+    return ''.join(out)
+
+
+def verifier_pairs(rows, raw):
+    """The (needle, haystack) pairs the verifiers score for every CSV row against one label's text."""
+    view = verifier.LabelText(raw)
+    pairs = []
+    for row in rows:
+        for field in ('brand_name', 'producer_name'):
+            pairs.append((verifier.apply_brand_corrections(verifier.normalize_text(row[field])), view.brand_corrected))
+        pairs.append((verifier.apply_type_corrections(verifier.normalize_text(row['class_type'])), view.type_corrected))
+        for field in ('city', 'country'):
+            pairs.append((verifier.normalize_text(row[field]), view.normalized))
+    return pairs
+
+
+def random_fuzzy_pairs(rows, count, seed=0):
+    """`count` seeded pairs: a misread CSV field value against a noisy slice of label text."""
+    rng = random.Random(seed)
+    values = [row[field] for row in rows for field in verifier.LABEL_FIELDS if row.get(field)]
+    pairs = []
+    for _ in range(count):
+        row = rng.choice(rows)
+        text = misread(synthetic_label_text(row), rng, rate=rng.choice((0.0, 0.05, 0.2)))
+        start = rng.randrange(len(text) // 2)
+        haystack = verifier.normalize_text(text[start:start + rng.randint(20, 300)])
+        needle = verifier.normalize_text(misread(rng.choice(values), rng, rate=rng.choice((0.0, 0.1, 0.3))))
+        pairs.append((needle, haystack))
+    return pairs
+
+
+def warning_texts(seed=0):
+    """(group, text) pairs: garbled partial warnings and labels without a warning."""
+    rng = random.Random(seed)
+    words = verifier.GOVERNMENT_WARNING.split()
+    for variants in verifier.WARNING_KEYWORD_VARIANTS.values():
+        words += variants
+    texts = []
+    for n in range(100):
+        picked = [word for word in words if rng.random() < 0.6]
+        rng.shuffle(picked)
+        joiner = '' if n % 4 == 0 else ' '
+        texts.append(('garbled', SAMPLE_LABEL_TEXT + joiner.join(picked)))
+    for size in (500, 2000, 8000):
+        texts.append(('no warning', synthetic_ocr_text(size, verifier.BRAND_CORRECTIONS, seed=seed + size).replace(
+            'GOVERNMENT WARNING', '')))
+    return texts
+
+
+def synthetic_misreads(keyword, count, rng):
+    """`count` distinct single-character OCR misreads of a keyword."""
+    word = keyword.replace(' ', '')
+    misreads = set()
+    while len(misreads) < min(count, len(word) * 9):
+        i = rng.randrange(len(word))
+        misread = word[:i] + rng.choice(MISREAD_CHARS) + word[i + 1:]
+        if misread != word:
+            misreads.add(misread)
+    return sorted(misreads)
+
+
+def warning_variants(extra, seed=0):
+    """WARNING_KEYWORD_VARIANTS with `extra` seeded synthetic misreads added per keyword."""
+    rng = random.Random(seed * 1000 + extra)
+    return {keyword: spellings + synthetic_misreads(keyword, extra, rng)
+            for keyword, spellings in verifier.WARNING_KEYWORD_VARIANTS.items()}
+
+
+# ============================================================================
+# CHECKS
+# ============================================================================
+
+def check_fuzzy(pairs):
+    """Pairs where fuzzy_partial_ratio differs from the sliding window, as (needle, haystack, expected, got)."""
+    mismatches = []
+    for needle, haystack in pairs:
+        expected = sliding_window_partial_ratio(needle, haystack)
+        actual = verifier.fuzzy_partial_ratio(needle, haystack)
+        if actual != expected:
+            mismatches.append((needle, haystack, expected, actual))
+    return mismatches
+
+
+def check_corrections(old_func, new_func, samples):
+    """Samples where the compiled engine differs from the loop, as (sample, expected, got)."""
+    mismatches = []
+    for sample in samples:
+        expected, actual = old_func(sample), new_func(sample)
+        if actual != expected:
+            mismatches.append((sample, expected, actual))
+    return mismatches
+
+
+def check_warning(matcher, variants, texts):
+    """Texts (already alnum_nospace) where the matcher differs from the scans, as (text, expected, got)."""
+    mismatches = []
+    for text in texts:
+        expected, actual = substring_scan_keywords(text, variants), matcher.find(text)
+        if actual != expected:
+            mismatches.append((text, expected, actual))
+    return mismatches
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--pairs', type=int, default=400, help='seeded fuzzy pairs on top of the CSV ones')
+    parser.add_argument('--fuzz', type=int, default=20000, help='run-together misread samples per engine')
+    args = parser.parse_args(argv)
+    failed = 0
+
+    rows = load_batch_rows()
+    pairs = [pair for row in rows for pair in verifier_pairs(rows, synthetic_label_text(row))]
+    pairs += random_fuzzy_pairs(rows, args.pairs, args.seed)
+    mismatches = check_fuzzy(pairs)
+    for needle, haystack, expected, actual in mismatches[:10]:
+        print(f"MISMATCH fuzzy: {needle!r} in {haystack[:60]!r}...: expected {expected}, got {actual}")
+    print(f"fuzzy        {len(pairs):>6} pairs    {len(mismatches)} mismatches")
+    failed += bool(mismatches)
+
+    for name, old_func, new_func, corrections_dict in CORRECTION_CASES:
+        samples = [synthetic_ocr_text(size, corrections_dict, seed=args.seed) for size in (2000, 20000)]
+        samples += run_together_misreads(corrections_dict, args.fuzz, args.seed)
+        mismatches = check_corrections(old_func, new_func, samples)
+        for sample, expected, actual in mismatches[:10]:
+            print(f"MISMATCH {name}: {sample[:60]!r}: loop {expected[:60]!r}, compiled {actual[:60]!r}")
+        print(f"{name:<12} {len(samples):>6} samples  {len(mismatches)} mismatches")
+        failed += bool(mismatches)
+
+    texts = [verifier.LabelText(raw).alnum_nospace for _, raw in warning_texts(args.seed)]
+    for extra in (0, 10, 40, 100):
+        variants = warning_variants(extra, args.seed)
+        matcher = verifier.KeywordMatcher(verifier.WARNING_KEYWORDS, variants)
+        mismatches = check_warning(matcher, variants, texts)
+        for text, expected, actual in mismatches[:10]:
+            print(f"MISMATCH warning: {text[:60]!r}: expected {sorted(expected)}, got {sorted(actual)}")
+        print(f"warning +{extra:<3}  {len(texts):>6} texts    {len(mismatches)} mismatches")
+        failed += bool(mismatches)
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
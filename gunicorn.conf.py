@@ -0,0 +1,7 @@
+"""gunicorn settings, read from the working directory by `gunicorn app:app`."""
+
+
+def post_worker_init(worker):
+    # Set up at boot rather than on each worker's first request
+    from app import init_server
+    init_server()
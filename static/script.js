@@ -19,9 +19,26 @@ function toggleExtracted(id) {
     const el = document.getElementById(id);
     if (el) {
         el.style.display = el.style.display === 'none' ? 'block' : 'none';
+        if (el.style.display === 'block') {
+            loadExtracted(el);
+        }
     }
 }
 
+// Batch cards carry a data-text-url instead of their extracted text; fetch it on first open
+function loadExtracted(el) {
+    if (!el.dataset.textUrl || el.dataset.loaded) return;
+    el.dataset.loaded = '1';
+    el.textContent = 'Loading…';
+    fetch(el.dataset.textUrl)
+        .then(response => response.json())
+        .then(data => { el.textContent = data.extracted_text || '(no text extracted)'; })
+        .catch(() => {
+            el.textContent = 'Could not load extracted text';
+            delete el.dataset.loaded;
+        });
+}
+
 // Show loading overlay
 function showLoading(message, subtext) {
     const overlay = document.getElementById('loading-overlay');